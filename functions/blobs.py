@@ -0,0 +1,165 @@
+import sqlite3
+
+try:
+    from .schema import quote_identifier
+    from .utils import format_size
+except ImportError:
+    from schema import quote_identifier
+    from utils import format_size
+
+TEXT_INLINE_LIMIT = 1024
+TEXT_PREVIEW_CHARS = 200
+BLOB_PREVIEW_BYTES = 16
+CHUNK_SIZE = 1024 * 1024
+PREVIEW_CACHE_SIZE = 20000
+
+class BlobRef:
+    """Заглушка для BLOB или большого TEXT: размер и короткое превью.
+    
+    Само значение в Python не загружается, его читает по запросу
+    open_blob через Connection.blobopen.
+    """
+    __slots__ = ('table', 'column', 'rowid', 'size', 'is_text', 'preview')
+    
+    def __init__(self, table, column, rowid, size, is_text=False, preview=None):
+        self.table = table
+        self.column = column
+        self.rowid = rowid
+        self.size = size
+        self.is_text = is_text
+        self.preview = preview
+    
+    def __str__(self):
+        if self.is_text:
+            return f"{self.preview or ''}… [{format_size(self.size)}]"
+        if self.preview is None:
+            return f"<BLOB {format_size(self.size)}>"
+        return f"<BLOB {format_size(self.size)}> {self.preview.hex(' ').upper()}"
+
+def blob_display(value):
+    """Короткое представление байтов вместо str(b'...')"""
+    preview = bytes(value[:BLOB_PREVIEW_BYTES]).hex(' ').upper()
+    return f"<BLOB {format_size(len(value))}> {preview}"
+
+def column_affinity(declared_type):
+    """Родство типа колонки по правилам SQLite"""
+    declared = (declared_type or "").upper()
+    if "INT" in declared:
+        return "INTEGER"
+    if "CHAR" in declared or "CLOB" in declared or "TEXT" in declared:
+        return "TEXT"
+    if "BLOB" in declared or not declared:
+        return "BLOB"
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return "REAL"
+    return "NUMERIC"
+
+def build_table_select(schema, table_name, limit=None, where=None, order_by=None):
+    """SELECT, который заменяет BLOB и большие строки на размер.
+    
+    Возвращает (sql, columns, wrapped), где wrapped - индексы колонок,
+    для которых в конце строки добавлена служебная колонка с длиной.
+    Для BLOB длину SQLite берет из заголовка записи без чтения значения.
+    """
+    columns = schema.get_columns(table_name)
+    select = [quote_identifier(schema.rowid_alias(table_name))]
+    meta = []
+    wrapped = []
+    for index, column in enumerate(columns):
+        name = quote_identifier(column.name)
+        if column_affinity(column.type) in ("INTEGER", "REAL"):
+            select.append(name)
+            continue
+        select.append(
+            f"CASE WHEN typeof({name}) = 'blob' THEN NULL "
+            f"WHEN typeof({name}) = 'text' AND length({name}) > {TEXT_INLINE_LIMIT} "
+            f"THEN substr({name}, 1, {TEXT_PREVIEW_CHARS}) ELSE {name} END")
+        meta.append(
+            f"CASE WHEN typeof({name}) = 'blob' THEN length({name}) "
+            f"WHEN typeof({name}) = 'text' AND length({name}) > {TEXT_INLINE_LIMIT} "
+            f"THEN -length(CAST({name} AS BLOB)) END")
+        wrapped.append(index)
+    
+    sql = f"SELECT {', '.join(select + meta)} FROM {quote_identifier(table_name)}"
+    if where:
+        sql += f" WHERE {where}"
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return sql, [column.name for column in columns], wrapped
+
+def materialize_rows(table_name, columns, wrapped, raw_rows):
+    """Разделить строки на rowid и значения, подставив BlobRef по длинам"""
+    width = len(columns)
+    meta_start = width + 1
+    rowids = []
+    rows = []
+    for raw in raw_rows:
+        rowid = raw[0]
+        rowids.append(rowid)
+        row = raw[1:meta_start]
+        if any(raw[meta_start + i] is not None for i in range(len(wrapped))):
+            row = list(row)
+            for i, index in enumerate(wrapped):
+                size = raw[meta_start + i]
+                if size is None:
+                    continue
+                if size < 0:
+                    row[index] = BlobRef(table_name, columns[index], rowid, -size,
+                                         is_text=True, preview=row[index])
+                else:
+                    row[index] = BlobRef(table_name, columns[index], rowid, size)
+            row = tuple(row)
+        rows.append(row)
+    return rowids, rows
+
+def open_blob(connection, ref):
+    """Открыть значение для потокового чтения"""
+    return connection.blobopen(ref.table, ref.column, ref.rowid, readonly=True)
+
+def load_preview(connection, ref):
+    """Прочитать первые байты BLOB для превью (только видимые ячейки)"""
+    try:
+        with open_blob(connection, ref) as blob:
+            ref.preview = blob.read(BLOB_PREVIEW_BYTES)
+    except sqlite3.Error:
+        ref.preview = b""
+    return ref.preview
+
+class PreviewCache:
+    """Превью BLOB по (таблица, колонка, rowid) до следующего изменения данных.
+    
+    BlobRef создаются заново при каждой загрузке окна; кэш избавляет от
+    повторного blobopen при возврате к уже показанным строкам.
+    """
+    def __init__(self, limit=PREVIEW_CACHE_SIZE):
+        self.limit = limit
+        self.key = None
+        self.entries = {}
+    
+    def get(self, ref, key):
+        if key != self.key:
+            self.entries = {}
+            self.key = key
+            return None
+        return self.entries.get((ref.table, ref.column, ref.rowid))
+    
+    def put(self, ref):
+        if len(self.entries) >= self.limit:
+            # Словарь хранит порядок вставки - вытесняем самое старое превью
+            del self.entries[next(iter(self.entries))]
+        self.entries[(ref.table, ref.column, ref.rowid)] = ref.preview
+    
+    def clear(self):
+        self.entries = {}
+        self.key = None
+
+def iter_chunks(connection, ref, chunk_size=CHUNK_SIZE):
+    """Последовательное чтение значения кусками"""
+    with open_blob(connection, ref) as blob:
+        while True:
+            chunk = blob.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
\ No newline at end of file
@@ -0,0 +1,198 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PyQt6.QtCore import *
+
+try:
+    from .database import open_connection
+    from .schema import SchemaCache, quote_identifier
+    from .tracing import tracer
+    from .utils import safe_table_name
+except ImportError:
+    from database import open_connection
+    from schema import SchemaCache, quote_identifier
+    from tracing import tracer
+    from utils import safe_table_name
+
+FORMATS = {'csv': '.csv', 'jsonl': '.jsonl'}
+
+def encode_batch(fmt, columns, rows, header=False):
+    """Сериализовать порцию строк в байты выбранного формата"""
+    if fmt == 'jsonl':
+        lines = []
+        for row in rows:
+            record = {column: value.hex() if isinstance(value, bytes) else value
+                      for column, value in zip(columns, row)}
+            lines.append(json.dumps(record, ensure_ascii=False))
+        return ("\n".join(lines) + "\n").encode('utf-8') if lines else b""
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows([[value.hex() if isinstance(value, bytes) else value for value in row] for row in rows])
+    return buffer.getvalue().encode('utf-8')
+
+def export_shard(task):
+    """Выгрузить одну таблицу или диапазон rowid в файл (выполняется в отдельном процессе).
+    
+    Каждый процесс открывает свое соединение только для чтения, поэтому
+    задачи не делят ни соединение, ни GIL.
+    """
+    started = time.perf_counter()
+    connection = open_connection(task['db_path'], 'readonly')
+    try:
+        query = f"SELECT * FROM {quote_identifier(task['table'])}"
+        params = ()
+        if task.get('rowid_range'):
+            rowid = quote_identifier(task['rowid'])
+            query += f" WHERE {rowid} >= ? AND {rowid} < ?"
+            params = tuple(task['rowid_range'])
+        
+        cursor = connection.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        digest = hashlib.sha256()
+        rows = 0
+        size = 0
+        
+        with open(task['file_path'], 'wb') as f:
+            # Первая порция - заголовок CSV (для JSON Lines пустая)
+            data = encode_batch(task['format'], columns, [], header=True)
+            while data is not None:
+                digest.update(data)
+                f.write(data)
+                size += len(data)
+                batch = cursor.fetchmany(task['chunk_size'])
+                rows += len(batch)
+                data = encode_batch(task['format'], columns, batch) if batch else None
+    finally:
+        connection.close()
+    
+    return {
+        'table': task['table'],
+        'file': os.path.basename(task['file_path']),
+        'rowid_range': task.get('rowid_range'),
+        'rows': rows,
+        'bytes': size,
+        'sha256': digest.hexdigest(),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+class BulkExporter:
+    """Параллельная выгрузка нескольких таблиц и шардирование больших таблиц"""
+    def __init__(self, db_path, output_dir, fmt='csv', workers=None, chunk_size=10000):
+        self.db_path = db_path
+        self.output_dir = output_dir
+        self.format = fmt
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+    
+    def plan(self, tables, shards=1, min_shard_rows=100000):
+        """Разбить выгрузку на задачи: таблица целиком или диапазоны rowid.
+        
+        Диапазоны делятся по значениям rowid поровну, min/max берутся из
+        индекса rowid за O(log n).
+        """
+        connection = open_connection(self.db_path, 'readonly')
+        schema = SchemaCache()
+        schema.attach(connection)
+        extension = FORMATS[self.format]
+        tasks = []
+        try:
+            for table in tables:
+                base = safe_table_name(table)
+                task = {
+                    'db_path': self.db_path,
+                    'table': table,
+                    'format': self.format,
+                    'chunk_size': self.chunk_size
+                }
+                
+                count = schema.row_count(table) if shards > 1 and schema.has_rowid(table) else 0
+                if count < max(min_shard_rows, shards):
+                    tasks.append(dict(task, file_path=os.path.join(self.output_dir, base + extension)))
+                    continue
+                
+                table_sql = quote_identifier(table)
+                rowid = schema.rowid_alias(table)
+                rowid_sql = quote_identifier(rowid)
+                # min и max в одном SELECT отключают оптимизацию и сканируют таблицу
+                low, high = connection.execute(
+                    f"SELECT (SELECT min({rowid_sql}) FROM {table_sql}), "
+                    f"(SELECT max({rowid_sql}) FROM {table_sql})").fetchone()
+                step = (high - low + 1) // shards + 1
+                for number in range(shards):
+                    start = low + number * step
+                    if start > high:
+                        break
+                    tasks.append(dict(task,
+                                      rowid=rowid,
+                                      rowid_range=[start, min(start + step, high + 1)],
+                                      file_path=os.path.join(self.output_dir,
+                                                             f"{base}.part{number + 1:03d}{extension}")))
+        finally:
+            connection.close()
+        return tasks
+    
+    def run(self, tasks, progress=None):
+        """Выполнить задачи в пуле процессов и записать manifest.json"""
+        started = time.perf_counter()
+        results = []
+        
+        if self.workers <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                results.append(export_shard(task))
+                if progress:
+                    progress(len(results), len(tasks), results[-1])
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(tasks))) as pool:
+                futures = [pool.submit(export_shard, task) for task in tasks]
+                for future in as_completed(futures):
+                    results.append(future.result())
+                    if progress:
+                        progress(len(results), len(tasks), results[-1])
+        
+        results.sort(key=lambda item: item['file'])
+        manifest = {
+            'database': os.path.basename(self.db_path),
+            'format': self.format,
+            'workers': self.workers,
+            'seconds': round(time.perf_counter() - started, 3),
+            'tables': {},
+            'files': results
+        }
+        for item in results:
+            manifest['tables'][item['table']] = manifest['tables'].get(item['table'], 0) + item['rows']
+        
+        with open(os.path.join(self.output_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+class BulkExportWorker(QThread):
+    """Планирование и ожидание процессов выгрузки в фоне, чтобы не блокировать интерфейс"""
+    planned = pyqtSignal(int)
+    progress = pyqtSignal(int, int, object)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, exporter, tables, shards, parent=None):
+        super().__init__(parent)
+        self.exporter = exporter
+        self.tables = tables
+        self.shards = shards
+    
+    def run(self):
+        try:
+            with tracer.span("db.bulk_export", "db", tables=len(self.tables)) as span:
+                tasks = self.exporter.plan(self.tables, self.shards)
+                self.planned.emit(len(tasks))
+                manifest = self.exporter.run(tasks, self.progress.emit)
+                span.set(rows=sum(manifest['tables'].values()))
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.done.emit(manifest)
\ No newline at end of file
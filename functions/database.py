@@ -2,66 +2,154 @@ import sqlite3
 import os
 from datetime import datetime
 import shutil
+from pathlib import Path
+
+try:
+    from .tracing import tracer, traced
+    from .schema import SchemaCache
+    from .udf import registry
+    from .sorting import register_collation
+    from .script import run_statements, split_statements
+    from .memory import budget
+except ImportError:
+    from tracing import tracer, traced
+    from schema import SchemaCache
+    from udf import registry
+    from sorting import register_collation
+    from script import run_statements, split_statements
+    from memory import budget
+
+# Профили открытия: параметры URI и PRAGMA, применяемые после подключения.
+# cache_size в отрицательных значениях задается в КиБ, mmap_size - в байтах
+# (SQLite сам ограничит его значением SQLITE_MAX_MMAP_SIZE своей сборки)
+PROFILES = {
+    'default': {
+        'title': "Обычный",
+        'uri': None,
+        'pragmas': [("journal_mode", "WAL"), ("foreign_keys", "ON")]
+    },
+    'readonly': {
+        'title': "Только чтение",
+        'uri': "mode=ro",
+        'pragmas': [("query_only", "ON"), ("cache_size", -65536), ("mmap_size", 268435456)]
+    },
+    'immutable': {
+        'title': "Неизменяемый снимок",
+        'uri': "mode=ro&immutable=1",
+        'pragmas': [("query_only", "ON"), ("cache_size", -131072), ("mmap_size", 1 << 40)]
+    },
+    'bulk': {
+        'title': "Массовая загрузка",
+        'uri': None,
+        'pragmas': [("journal_mode", "WAL"), ("synchronous", "OFF"), ("cache_size", -262144),
+                    ("temp_store", "MEMORY"), ("foreign_keys", "ON")]
+    },
+    'analytic': {
+        'title': "Аналитика больших файлов",
+        'uri': None,
+        'pragmas': [("cache_size", -524288), ("mmap_size", 1 << 40), ("temp_store", "MEMORY"),
+                    ("foreign_keys", "ON")]
+    }
+}
+
+def open_connection(db_path, profile='default', skipped=None, **kwargs):
+    """Открыть соединение с параметрами профиля.
+    
+    PRAGMA, которые SQLite не принял, не прерывают открытие; если передан
+    список skipped, в него добавляются описания пропущенных настроек.
+    """
+    settings = PROFILES.get(profile, PROFILES['default'])
+    if settings['uri']:
+        uri = Path(db_path).absolute().as_uri() + "?" + settings['uri']
+        connection = sqlite3.connect(uri, uri=True, **kwargs)
+    else:
+        connection = sqlite3.connect(db_path, **kwargs)
+    
+    for name, value in settings['pragmas']:
+        try:
+            connection.execute(f"PRAGMA {name}={value}")
+        except sqlite3.OperationalError as e:
+            # Например, WAL недоступен на носителе только для чтения
+            if skipped is not None:
+                skipped.append(f"{name}: {e}")
+    # Функции нужны и фоновым соединениям: индекс по выражению с UDF без них не читается
+    registry.register(connection)
+    register_collation(connection)
+    return connection
 
 class DatabaseManager:
     def __init__(self):
         self.connection = None
         self.current_db = None
+        self.profile = 'default'
+        # Настройки профиля, которые не удалось применить при подключении
+        self.skipped_pragmas = []
         self.query_history = []
+        self.schema = SchemaCache()
+        registry.load_plugins()
     
-    def connect(self, db_path):
+    @traced("db.connect", "db")
+    def connect(self, db_path, profile='default'):
         try:
-            self.connection = sqlite3.connect(db_path)
-            self.connection.execute("PRAGMA journal_mode=WAL")
-            self.connection.execute("PRAGMA foreign_keys=ON")
+            skipped = []
+            self.connection = open_connection(db_path, profile, skipped)
+            self.skipped_pragmas = skipped
             self.current_db = db_path
+            self.profile = profile
+            self.schema.attach(self.connection)
             return True
         except Exception as e:
             print(f"Error connecting to database: {e}")
             return False
     
+    @traced("db.create_database", "db")
     def create_database(self, db_path):
         try:
-            self.connection = sqlite3.connect(db_path)
-            self.connection.execute("PRAGMA journal_mode=WAL")
-            self.connection.execute("PRAGMA foreign_keys=ON")
+            skipped = []
+            self.connection = open_connection(db_path, 'default', skipped)
+            self.skipped_pragmas = skipped
             self.current_db = db_path
+            self.profile = 'default'
+            self.schema.attach(self.connection)
             return True
         except Exception as e:
             print(f"Error creating database: {e}")
             return False
     
+    def is_read_only(self):
+        return self.profile in ('readonly', 'immutable')
+    
     def close(self):
         if self.connection:
             self.connection.close()
             self.connection = None
             self.current_db = None
+            self.profile = 'default'
+            self.schema.detach()
     
+    @traced("db.get_tables", "db")
     def get_tables(self):
         if not self.connection:
             return []
         
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;")
-        tables = cursor.fetchall()
-        
         result = []
-        for table in tables:
-            table_name = table[0]
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
-            count = cursor.fetchone()[0]
-            result.append((table_name, count))
+        for table_name in self.schema.table_names():
+            result.append((table_name, self.schema.row_count(table_name)))
         
+        tracer.annotate(rows=len(result))
         return result
     
+    @traced("db.get_table_names", "db")
     def get_table_names(self):
         if not self.connection:
             return []
         
-        cursor = self.connection.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        return [table[0] for table in cursor.fetchall()]
+        return self.schema.table_names()
+    
+    def get_columns(self, table_name):
+        return [column.name for column in self.schema.get_columns(table_name)]
     
+    @traced("db.execute_query", "db")
     def execute_query(self, query):
         if not self.connection:
             return False, "Нет подключения к БД", None
@@ -73,25 +161,35 @@ class DatabaseManager:
                 'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             })
             
-            cursor = self.connection.cursor()
-            cursor.execute(query)
-            
-            if query.upper().strip().startswith("SELECT"):
-                data = cursor.fetchall()
-                columns = [description[0] for description in cursor.description] if cursor.description else []
-                
-                # Ограничиваем для производительности
-                if len(data) > 10000:
-                    data = data[:10000]
-                
-                return True, data, columns
-            else:
-                self.connection.commit()
-                return True, None, None
-                
+            # Через run_statements: RETURNING применяется ко всем строкам, транзакция фиксируется,
+            # а у SELECT лишние строки даже не читаются
+            result = run_statements(self.connection, [(1, query)], max_rows=10000)[0][0]
+            if result.cursor:
+                result.cursor.close()
+            if result.error:
+                return False, result.error, None
+            if result.has_result():
+                tracer.annotate(rows=len(result.rows))
+                return True, result.rows, result.columns
+            tracer.annotate(rows=result.rowcount)
+            return True, None, None
         except Exception as e:
             return False, str(e), None
     
+    @traced("db.run_script", "db")
+    def run_script(self, script, transaction=True, progress=None):
+        """Выполнить скрипт из нескольких операторов: (результаты, откачена ли транзакция)"""
+        statements = split_statements(script)
+        self.query_history.append({
+            'query': script,
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+        results, rolled_back = run_statements(self.connection, statements, transaction, progress,
+                                              budget=budget)
+        tracer.annotate(rows=len(results))
+        return results, rolled_back
+    
+    @traced("db.backup_database", "db")
     def backup_database(self):
         if not self.current_db:
             return False, "Нет открытой базы данных"
@@ -103,6 +201,7 @@ class DatabaseManager:
         except Exception as e:
             return False, f"Ошибка создания резервной копии: {str(e)}"
     
+    @traced("db.optimize_database", "db")
     def optimize_database(self):
         if not self.connection:
             return False, "Нет подключения к БД"
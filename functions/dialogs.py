@@ -1,7 +1,15 @@
+import os
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 
+try:
+    from .blobs import BlobRef, open_blob, iter_chunks
+    from .utils import format_size
+except ImportError:
+    from blobs import BlobRef, open_blob, iter_chunks
+    from utils import format_size
+
 class HistoryDialog(QDialog):
     def __init__(self, history, parent=None):
         super().__init__(parent)
@@ -93,4 +101,497 @@ class HistoryDialog(QDialog):
             # Убираем временную метку
             if '] ' in text:
                 text = text.split('] ', 1)[1]
-            QApplication.clipboard().setText(text)
\ No newline at end of file
+            QApplication.clipboard().setText(text)
+
+class BlobInspectorDialog(QDialog):
+    """Просмотр BLOB или длинного текста с чтением по частям"""
+    PAGE_SIZE = 64 * 1024
+    IMAGE_LIMIT = 64 * 1024 * 1024
+    IMAGE_SIGNATURES = (b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'BM', b'RIFF')
+    
+    def __init__(self, value, connection=None, parent=None):
+        super().__init__(parent)
+        self.value = value
+        self.connection = connection
+        self.hex_offset = 0
+        
+        if isinstance(value, BlobRef):
+            self.size = value.size
+        elif isinstance(value, str):
+            self.value = value.encode('utf-8')
+            self.size = len(self.value)
+        else:
+            self.size = len(value)
+        
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setWindowTitle("Просмотр значения")
+        self.setGeometry(200, 200, 800, 600)
+        self.setStyleSheet("""
+            QDialog {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                    stop:0 #151515, stop:1 #1a1a1a);
+            }
+            QPlainTextEdit, QScrollArea {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 4px;
+                font-family: 'Consolas', 'Monaco', monospace;
+                font-size: 11px;
+            }
+            QLabel {
+                color: #a0a0a0;
+                padding: 5px;
+            }
+            QTabWidget::pane {
+                border: 1px solid #303030;
+            }
+            QTabBar::tab {
+                background: #202020;
+                color: #808080;
+                padding: 6px 12px;
+            }
+            QTabBar::tab:selected {
+                background: #303030;
+                color: #ffffff;
+            }
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #252525, stop:1 #1f1f1f);
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 8px 20px;
+            }
+            QPushButton:hover {
+                background: #303030;
+                border-color: #404040;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        
+        info = f"Размер: {format_size(self.size)}"
+        if isinstance(self.value, BlobRef):
+            info += f"  |  {self.value.table}.{self.value.column}, rowid {self.value.rowid}"
+        layout.addWidget(QLabel(info))
+        
+        self.tabs = QTabWidget()
+        
+        hex_widget = QWidget()
+        hex_layout = QVBoxLayout()
+        hex_layout.setContentsMargins(0, 0, 0, 0)
+        self.hex_view = QPlainTextEdit()
+        self.hex_view.setReadOnly(True)
+        hex_layout.addWidget(self.hex_view)
+        self.more_btn = QPushButton("Показать еще")
+        self.more_btn.clicked.connect(self.load_hex_page)
+        hex_layout.addWidget(self.more_btn)
+        hex_widget.setLayout(hex_layout)
+        self.tabs.addTab(hex_widget, "Hex")
+        
+        self.text_view = QPlainTextEdit()
+        self.text_view.setReadOnly(True)
+        self.tabs.addTab(self.text_view, "Текст")
+        
+        head = self.read_range(0, self.PAGE_SIZE)
+        self.text_view.setPlainText(head.decode('utf-8', errors='replace'))
+        if self.size > self.PAGE_SIZE:
+            self.text_view.appendPlainText(f"\n… показано {format_size(self.PAGE_SIZE)} из {format_size(self.size)}")
+        
+        if head.startswith(self.IMAGE_SIGNATURES) and self.size <= self.IMAGE_LIMIT:
+            pixmap = QPixmap()
+            if pixmap.loadFromData(self.read_range(0, self.size)):
+                image_label = QLabel()
+                image_label.setPixmap(pixmap)
+                scroll = QScrollArea()
+                scroll.setWidget(image_label)
+                self.tabs.addTab(scroll, "Изображение")
+                self.tabs.setCurrentWidget(scroll)
+        
+        layout.addWidget(self.tabs)
+        self.load_hex_page()
+        
+        btn_layout = QHBoxLayout()
+        
+        save_btn = QPushButton("Сохранить в файл")
+        save_btn.clicked.connect(self.save_to_file)
+        btn_layout.addWidget(save_btn)
+        
+        close_btn = QPushButton("Закрыть")
+        close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(close_btn)
+        
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+    
+    def read_range(self, offset, length):
+        if isinstance(self.value, BlobRef):
+            with open_blob(self.connection, self.value) as blob:
+                blob.seek(offset)
+                return blob.read(length)
+        return bytes(self.value[offset:offset + length])
+    
+    def load_hex_page(self):
+        chunk = self.read_range(self.hex_offset, self.PAGE_SIZE)
+        lines = []
+        for pos in range(0, len(chunk), 16):
+            part = chunk[pos:pos + 16]
+            text = ''.join(chr(b) if 32 <= b < 127 else '.' for b in part)
+            lines.append(f"{self.hex_offset + pos:08X}  {part.hex(' ').upper():<47}  {text}")
+        if lines:
+            self.hex_view.appendPlainText('\n'.join(lines))
+        self.hex_offset += len(chunk)
+        self.more_btn.setEnabled(self.hex_offset < self.size)
+    
+    def save_to_file(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить значение", "value.bin", "All files (*.*)")
+        if not file_path:
+            return
+        
+        try:
+            with open(file_path, 'wb') as f:
+                if isinstance(self.value, BlobRef):
+                    for chunk in iter_chunks(self.connection, self.value):
+                        f.write(chunk)
+                else:
+                    f.write(self.value)
+            QMessageBox.information(self, "Успех", f"Сохранено: {format_size(self.size)}")
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Ошибка сохранения: {str(e)}")
+
+class BulkExportDialog(QDialog):
+    """Параметры массового экспорта таблиц"""
+    def __init__(self, tables, parent=None):
+        super().__init__(parent)
+        self.tables = tables
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setWindowTitle("Массовый экспорт")
+        self.setGeometry(200, 200, 500, 500)
+        self.setStyleSheet("""
+            QDialog {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                    stop:0 #151515, stop:1 #1a1a1a);
+            }
+            QListWidget, QLineEdit, QComboBox, QSpinBox {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 4px;
+            }
+            QLabel, QCheckBox {
+                color: #a0a0a0;
+            }
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #252525, stop:1 #1f1f1f);
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 8px 20px;
+            }
+            QPushButton:hover {
+                background: #303030;
+                border-color: #404040;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Таблицы:"))
+        
+        self.list_widget = QListWidget()
+        for table in self.tables:
+            item = QListWidgetItem(table)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            self.list_widget.addItem(item)
+        layout.addWidget(self.list_widget)
+        
+        form = QFormLayout()
+        
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("CSV", 'csv')
+        self.format_combo.addItem("JSON Lines", 'jsonl')
+        form.addRow("Формат:", self.format_combo)
+        
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 256)
+        self.workers_spin.setValue(os.cpu_count() or 1)
+        form.addRow("Процессов:", self.workers_spin)
+        
+        self.shards_spin = QSpinBox()
+        self.shards_spin.setRange(1, 1024)
+        self.shards_spin.setValue(1)
+        self.shards_spin.setToolTip("Большие таблицы (от 100 000 строк) делятся на части по диапазонам rowid")
+        form.addRow("Частей на таблицу:", self.shards_spin)
+        
+        dir_layout = QHBoxLayout()
+        self.dir_input = QLineEdit()
+        dir_layout.addWidget(self.dir_input)
+        browse_btn = QPushButton("...")
+        browse_btn.clicked.connect(self.choose_directory)
+        dir_layout.addWidget(browse_btn)
+        form.addRow("Папка:", dir_layout)
+        
+        layout.addLayout(form)
+        
+        btn_layout = QHBoxLayout()
+        
+        ok_btn = QPushButton("Экспорт")
+        ok_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(ok_btn)
+        
+        cancel_btn = QPushButton("Отмена")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+    
+    def choose_directory(self):
+        directory = QFileDialog.getExistingDirectory(self, "Папка для экспорта")
+        if directory:
+            self.dir_input.setText(directory)
+    
+    def get_options(self):
+        return {
+            'tables': [self.list_widget.item(i).text() for i in range(self.list_widget.count())
+                       if self.list_widget.item(i).checkState() == Qt.CheckState.Checked],
+            'format': self.format_combo.currentData(),
+            'workers': self.workers_spin.value(),
+            'shards': self.shards_spin.value(),
+            'output_dir': self.dir_input.text().strip()
+        }
+
+class ExcelImportDialog(QDialog):
+    """Выбор листов книги Excel и строки заголовка"""
+    def __init__(self, sheets, existing_tables, parent=None):
+        super().__init__(parent)
+        self.sheets = sheets
+        self.existing_tables = existing_tables
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setWindowTitle("Импорт Excel")
+        self.setGeometry(200, 200, 450, 450)
+        self.setStyleSheet("""
+            QDialog {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                    stop:0 #151515, stop:1 #1a1a1a);
+            }
+            QListWidget, QSpinBox {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 4px;
+            }
+            QLabel {
+                color: #a0a0a0;
+            }
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #252525, stop:1 #1f1f1f);
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 8px 20px;
+            }
+            QPushButton:hover {
+                background: #303030;
+                border-color: #404040;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("Листы (каждый загружается в таблицу с именем листа):"))
+        
+        self.list_widget = QListWidget()
+        for sheet in self.sheets:
+            item = QListWidgetItem(sheet)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            if sheet in self.existing_tables:
+                item.setText(f"{sheet} (таблица будет заменена)")
+            item.setData(Qt.ItemDataRole.UserRole, sheet)
+            self.list_widget.addItem(item)
+        layout.addWidget(self.list_widget)
+        
+        form = QFormLayout()
+        self.header_spin = QSpinBox()
+        self.header_spin.setRange(0, 1000)
+        self.header_spin.setValue(1)
+        self.header_spin.setSpecialValueText("нет заголовка")
+        self.header_spin.setToolTip("Строки выше заголовка пропускаются; типы колонок определяются по первым строкам данных")
+        form.addRow("Строка заголовка:", self.header_spin)
+        layout.addLayout(form)
+        
+        btn_layout = QHBoxLayout()
+        
+        ok_btn = QPushButton("Импорт")
+        ok_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(ok_btn)
+        
+        cancel_btn = QPushButton("Отмена")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+    
+    def get_options(self):
+        return {
+            'sheets': [self.list_widget.item(i).data(Qt.ItemDataRole.UserRole)
+                       for i in range(self.list_widget.count())
+                       if self.list_widget.item(i).checkState() == Qt.CheckState.Checked],
+            'header_row': self.header_spin.value()
+        }
+
+class ImportIntoTableDialog(QDialog):
+    """Загрузка файла в существующую таблицу: сопоставление колонок и режим"""
+    MODES = [
+        ("Добавить строки", 'append'),
+        ("Пропускать конфликтующие (INSERT OR IGNORE)", 'ignore'),
+        ("Обновлять при конфликте (ON CONFLICT DO UPDATE)", 'upsert')
+    ]
+    
+    def __init__(self, source_columns, schema, parent=None):
+        super().__init__(parent)
+        self.source_columns = source_columns
+        self.schema = schema
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setWindowTitle("Импорт в существующую таблицу")
+        self.setGeometry(200, 200, 600, 600)
+        self.setStyleSheet("""
+            QDialog {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                    stop:0 #151515, stop:1 #1a1a1a);
+            }
+            QTableWidget, QComboBox {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 4px;
+            }
+            QHeaderView::section {
+                background-color: #1f1f1f;
+                color: #a0a0a0;
+                border: 1px solid #303030;
+                padding: 4px;
+            }
+            QLabel, QCheckBox {
+                color: #a0a0a0;
+            }
+            QPushButton {
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                    stop:0 #252525, stop:1 #1f1f1f);
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 8px 20px;
+            }
+            QPushButton:hover {
+                background: #303030;
+                border-color: #404040;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        form = QFormLayout()
+        
+        self.table_combo = QComboBox()
+        self.table_combo.addItems([name for name in self.schema.table_names() if name != "sqlite_sequence"])
+        self.table_combo.currentTextChanged.connect(self.load_table)
+        form.addRow("Таблица:", self.table_combo)
+        
+        self.mode_combo = QComboBox()
+        for title, mode in self.MODES:
+            self.mode_combo.addItem(title, mode)
+        self.mode_combo.currentIndexChanged.connect(self.update_key_state)
+        form.addRow("Режим:", self.mode_combo)
+        
+        self.key_combo = QComboBox()
+        self.key_combo.setToolTip("Уникальный ключ, по которому определяется конфликт")
+        form.addRow("Ключ конфликта:", self.key_combo)
+        
+        layout.addLayout(form)
+        
+        self.mapping_table = QTableWidget(0, 2)
+        self.mapping_table.setHorizontalHeaderLabels(["Колонка таблицы", "Колонка файла"])
+        self.mapping_table.horizontalHeader().setStretchLastSection(True)
+        self.mapping_table.verticalHeader().setVisible(False)
+        layout.addWidget(self.mapping_table)
+        
+        self.defer_check = QCheckBox("Удалить неуникальные индексы на время загрузки и построить заново")
+        self.defer_check.setChecked(True)
+        layout.addWidget(self.defer_check)
+        
+        btn_layout = QHBoxLayout()
+        
+        ok_btn = QPushButton("Импорт")
+        ok_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(ok_btn)
+        
+        cancel_btn = QPushButton("Отмена")
+        cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(cancel_btn)
+        
+        layout.addLayout(btn_layout)
+        self.setLayout(layout)
+        
+        self.load_table(self.table_combo.currentText())
+        self.update_key_state()
+    
+    def load_table(self, table_name):
+        """Сопоставить колонки по имени без учета регистра"""
+        by_name = {column.lower(): column for column in self.source_columns}
+        columns = self.schema.get_columns(table_name)
+        
+        self.mapping_table.setRowCount(len(columns))
+        for row, column in enumerate(columns):
+            item = QTableWidgetItem(f"{column.name} ({column.type})" if column.type else column.name)
+            item.setData(Qt.ItemDataRole.UserRole, column.name)
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            self.mapping_table.setItem(row, 0, item)
+            
+            combo = QComboBox()
+            combo.addItem("(не загружать)", None)
+            for source in self.source_columns:
+                combo.addItem(source, source)
+            match = by_name.get(column.name.lower())
+            if match is not None:
+                combo.setCurrentIndex(self.source_columns.index(match) + 1)
+            self.mapping_table.setCellWidget(row, 1, combo)
+        
+        # Цель ON CONFLICT должна совпадать с первичным ключом или уникальным индексом
+        self.key_combo.clear()
+        primary_key = self.schema.primary_key(table_name)
+        if primary_key:
+            self.key_combo.addItem(f"PRIMARY KEY ({', '.join(primary_key)})", primary_key)
+        for index in self.schema.get_indexes(table_name):
+            if index.unique and not index.partial and index.columns != primary_key:
+                self.key_combo.addItem(f"{index.name} ({', '.join(index.columns)})", index.columns)
+    
+    def update_key_state(self):
+        self.key_combo.setEnabled(self.mode_combo.currentData() == 'upsert')
+    
+    def get_options(self):
+        mapping = {}
+        for row in range(self.mapping_table.rowCount()):
+            column = self.mapping_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+            mapping[column] = self.mapping_table.cellWidget(row, 1).currentData()
+        return {
+            'table': self.table_combo.currentText(),
+            'mapping': mapping,
+            'mode': self.mode_combo.currentData(),
+            'conflict_columns': self.key_combo.currentData() or [],
+            'defer_indexes': self.defer_check.isChecked()
+        }
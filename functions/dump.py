@@ -0,0 +1,225 @@
+import gzip
+import io
+import math
+import os
+import sqlite3
+import time
+
+try:
+    from .database import open_connection
+    from .schema import quote_identifier
+except ImportError:
+    from database import open_connection
+    from schema import quote_identifier
+
+ROWS_PER_INSERT = 500
+COMMIT_BYTES = 32 * 1024 * 1024
+STATE_TABLE = "_dump_restore_state"
+DEFERRED_PREFIXES = ("CREATE INDEX", "CREATE UNIQUE INDEX", "CREATE TRIGGER")
+
+def sql_literal(value):
+    """Значение Python в виде SQL литерала"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NULL"
+        if math.isinf(value):
+            return "1e999" if value > 0 else "-1e999"
+        return repr(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "X'" + bytes(value).hex() + "'"
+    return "'" + str(value).replace("'", "''") + "'"
+
+def open_dump(file_path, mode):
+    """Открыть дамп как текст, файлы .gz сжимаются на лету"""
+    if file_path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(file_path, mode + "b", compresslevel=6),
+                                encoding='utf-8', newline='\n')
+    return open(file_path, mode, encoding='utf-8', newline='\n')
+
+def _table_kinds(connection):
+    """Тип каждой таблицы: table, virtual или shadow (служебные таблицы FTS и R-Tree)"""
+    try:
+        return dict(connection.execute(
+            "SELECT name, type FROM pragma_table_list WHERE schema = 'main'").fetchall())
+    except sqlite3.Error:
+        # pragma table_list появилась в SQLite 3.37
+        return {}
+
+def dump_database(db_path, file_path, progress=None, rows_per_insert=ROWS_PER_INSERT):
+    """Записать схему и данные в SQL файл.
+    
+    В отличие от Connection.iterdump строки пишутся многострочными INSERT
+    по rows_per_insert значений, а индексы и триггеры идут после данных.
+    Чтение идет из отдельного соединения в одной транзакции, поэтому дамп
+    согласован, а память не зависит от размера базы.
+    """
+    started = time.perf_counter()
+    connection = open_connection(db_path, 'readonly')
+    stats = {'tables': 0, 'rows': 0}
+    try:
+        connection.execute("BEGIN")
+        kinds = _table_kinds(connection)
+        objects = connection.execute(
+            "SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL "
+            "AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' AND name != ? ORDER BY rowid",
+            (STATE_TABLE,)).fetchall()
+        has_sequence = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone() is not None
+        
+        with open_dump(file_path, 'w') as f:
+            f.write(f"-- Dump of {os.path.basename(db_path)}\n")
+            f.write("PRAGMA foreign_keys=OFF;\n")
+            f.write("BEGIN TRANSACTION;\n")
+            
+            for obj_type, name, sql in objects:
+                if obj_type == 'table' and kinds.get(name) != 'shadow':
+                    f.write(f"{sql};\n")
+            
+            for obj_type, name, sql in objects:
+                if obj_type != 'table' or kinds.get(name) == 'shadow':
+                    continue
+                stats['tables'] += 1
+                table = quote_identifier(name)
+                # Вычисляемые и скрытые колонки вставить нельзя, пишем только обычные
+                columns = ", ".join(quote_identifier(column) for column, hidden in connection.execute(
+                    "SELECT name, hidden FROM pragma_table_xinfo(?) ORDER BY cid", (name,)) if not hidden)
+                cursor = connection.execute(f"SELECT {columns} FROM {table}")
+                while True:
+                    batch = cursor.fetchmany(rows_per_insert)
+                    if not batch:
+                        break
+                    values = ",".join("(" + ",".join(map(sql_literal, row)) + ")" for row in batch)
+                    f.write(f"INSERT INTO {table} ({columns}) VALUES {values};\n")
+                    stats['rows'] += len(batch)
+                    if progress:
+                        progress(name, stats['rows'])
+            
+            if has_sequence:
+                f.write('DELETE FROM "sqlite_sequence";\n')
+                for name, seq in connection.execute("SELECT name, seq FROM sqlite_sequence"):
+                    f.write(f'INSERT INTO "sqlite_sequence" VALUES({sql_literal(name)},{seq});\n')
+            
+            # Представления раньше триггеров: INSTEAD OF триггеры ссылаются на них
+            for kind in ('view', 'index', 'trigger'):
+                for obj_type, name, sql in objects:
+                    if obj_type == kind:
+                        f.write(f"{sql};\n")
+            
+            f.write("COMMIT;\n")
+    finally:
+        connection.close()
+    
+    stats['seconds'] = time.perf_counter() - started
+    stats['size'] = os.path.getsize(file_path)
+    return stats
+
+def iter_statements(f):
+    """Разбить поток на SQL операторы, не загружая файл целиком"""
+    buffer = []
+    for line in f:
+        if not buffer and (line.startswith("--") or not line.strip()):
+            continue
+        buffer.append(line)
+        # complete_statement проверяем только на строках, похожих на конец оператора
+        if line.rstrip().endswith(";"):
+            statement = "".join(buffer)
+            if sqlite3.complete_statement(statement):
+                buffer = []
+                yield statement.strip()
+    rest = "".join(buffer).strip()
+    if rest:
+        yield rest
+
+def restore_dump(file_path, db_path, progress=None, commit_bytes=COMMIT_BYTES):
+    """Выполнить SQL дамп в базу пакетами транзакций.
+    
+    Создание индексов и триггеров откладывается до загрузки данных.
+    Номер последнего выполненного оператора сохраняется в служебной
+    таблице в той же транзакции, что и данные, поэтому после сбоя или
+    отмены повторный запуск продолжит с места остановки.
+    progress(done_bytes, total_bytes) может вернуть False для остановки.
+    """
+    started = time.perf_counter()
+    key = os.path.basename(file_path)
+    total = os.path.getsize(file_path)
+    connection = open_connection(db_path, 'bulk')
+    connection.execute("PRAGMA foreign_keys=OFF")
+    stats = {'statements': 0, 'skipped': 0, 'completed': False}
+    
+    try:
+        connection.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} "
+                           f"(dump TEXT PRIMARY KEY, statement INTEGER)")
+        row = connection.execute(f"SELECT statement FROM {STATE_TABLE} WHERE dump = ?",
+                                 (key,)).fetchone()
+        resume_from = row[0] if row else 0
+        connection.commit()
+        
+        # Позицию для прогресса берем у исходного файла, для .gz это сжатые байты
+        raw = open(file_path, 'rb')
+        source = gzip.GzipFile(fileobj=raw) if file_path.endswith(".gz") else raw
+        stream = io.TextIOWrapper(source, encoding='utf-8', newline='\n')
+        deferred = []
+        pending = 0
+        number = 0
+        
+        def checkpoint():
+            connection.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} VALUES (?, ?)", (key, number))
+            connection.commit()
+        
+        with raw, stream:
+            for statement in iter_statements(stream):
+                number += 1
+                head = statement[:32].upper()
+                if head.startswith(DEFERRED_PREFIXES):
+                    deferred.append(statement)
+                    continue
+                if number <= resume_from:
+                    stats['skipped'] += 1
+                    continue
+                if head.startswith(("BEGIN", "COMMIT", "END", "ROLLBACK")):
+                    continue
+                if head.startswith("PRAGMA"):
+                    # Часть pragma не действует внутри транзакции
+                    checkpoint()
+                    connection.execute(statement)
+                    continue
+                
+                if not connection.in_transaction:
+                    connection.execute("BEGIN")
+                connection.execute(statement)
+                stats['statements'] += 1
+                pending += len(statement)
+                
+                stop = progress is not None and stats['statements'] % 64 == 0 and \
+                    progress(raw.tell(), total) is False
+                if pending >= commit_bytes or stop:
+                    checkpoint()
+                    pending = 0
+                if stop:
+                    stats['seconds'] = time.perf_counter() - started
+                    return stats
+            
+            # Индексы строятся один раз по загруженным данным; вместе с удалением
+            # служебной таблицы это одна транзакция
+            checkpoint()
+            connection.execute("BEGIN")
+            for statement in deferred:
+                connection.execute(statement)
+                if progress:
+                    progress(total, total)
+            connection.execute(f"DROP TABLE {STATE_TABLE}")
+            connection.commit()
+    except Exception:
+        # Незафиксированный пакет откатывается, продолжить можно повторным запуском
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    
+    stats['completed'] = True
+    stats['seconds'] = time.perf_counter() - started
+    return stats
\ No newline at end of file
@@ -0,0 +1,125 @@
+import sqlite3
+
+try:
+    from .schema import quote_identifier
+    from .tracing import tracer
+except ImportError:
+    from schema import quote_identifier
+    from tracing import tracer
+
+def coerce_value(text, old_value=None):
+    """Преобразовать введенный текст в значение для SQLite"""
+    if text is None or not isinstance(text, str):
+        return text
+    if text.upper() == "NULL":
+        return None
+    if isinstance(old_value, str):
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+class ChangeSet:
+    """Набор отложенных изменений таблицы.
+    
+    Изменения копятся в памяти и применяются одной транзакцией:
+    обновления группируются по набору колонок и уходят через executemany.
+    Ключ строки - rowid или кортеж значений первичного ключа.
+    """
+    def __init__(self, table_name, columns, key_columns):
+        self.table_name = table_name
+        self.columns = columns
+        self.key_columns = key_columns
+        self.updates = {}
+        self.inserts = []
+        self.deletes = set()
+    
+    def is_empty(self):
+        return self.count() == 0
+    
+    def count(self):
+        inserts = sum(1 for values in self.inserts if values is not None)
+        return sum(len(values) for values in self.updates.values()) + inserts + len(self.deletes)
+    
+    def clear(self):
+        self.updates = {}
+        self.inserts = []
+        self.deletes = set()
+    
+    def set_value(self, key, column, value):
+        self.updates.setdefault(key, {})[column] = value
+    
+    def add_insert(self, values):
+        self.inserts.append(values)
+        return len(self.inserts) - 1
+    
+    def cancel_insert(self, index):
+        self.inserts[index] = None
+    
+    def delete(self, key):
+        self.updates.pop(key, None)
+        self.deletes.add(key)
+    
+    def _key_params(self, key):
+        return list(key) if isinstance(key, tuple) else [key]
+    
+    def _where(self):
+        return " AND ".join(f"{quote_identifier(column)} = ?" for column in self.key_columns)
+    
+    def statements(self):
+        """Сгруппированные (sql, список параметров) для executemany"""
+        table = quote_identifier(self.table_name)
+        where = self._where()
+        result = []
+        
+        if self.deletes:
+            result.append((f"DELETE FROM {table} WHERE {where}",
+                           [self._key_params(key) for key in self.deletes]))
+        
+        groups = {}
+        for key, values in self.updates.items():
+            if key in self.deletes:
+                continue
+            columns = tuple(sorted(values))
+            groups.setdefault(columns, []).append([values[column] for column in columns] + self._key_params(key))
+        for columns, params in groups.items():
+            assignments = ", ".join(f"{quote_identifier(column)} = ?" for column in columns)
+            result.append((f"UPDATE {table} SET {assignments} WHERE {where}", params))
+        
+        groups = {}
+        for values in self.inserts:
+            if values is None:
+                continue
+            columns = tuple(column for column in self.columns if values.get(column) is not None)
+            groups.setdefault(columns, []).append([values[column] for column in columns])
+        for columns, params in groups.items():
+            if columns:
+                names = ", ".join(quote_identifier(column) for column in columns)
+                marks = ", ".join("?" for _ in columns)
+                result.append((f"INSERT INTO {table} ({names}) VALUES ({marks})", params))
+            else:
+                result.append((f"INSERT INTO {table} DEFAULT VALUES", [[] for _ in params]))
+        
+        return result
+    
+    def apply(self, connection):
+        """Применить изменения одной транзакцией, при ошибке - откат"""
+        if self.is_empty():
+            return True, "Нет изменений"
+        
+        total = self.count()
+        with tracer.span("db.apply_changes", "db", table=self.table_name, rows=total):
+            try:
+                with connection:
+                    for sql, params in self.statements():
+                        connection.executemany(sql, params)
+            except sqlite3.Error as e:
+                return False, f"Изменения отменены: {str(e)}"
+        
+        self.clear()
+        return True, f"Сохранено изменений: {total}"
\ No newline at end of file
@@ -0,0 +1,93 @@
+from PyQt6.QtWidgets import *
+from PyQt6.QtCore import *
+from PyQt6.QtGui import *
+
+try:
+    from .styles import SQLHighlighter
+    from .udf import registry
+except ImportError:
+    from styles import SQLHighlighter
+    from udf import registry
+
+class SQLEditor(QPlainTextEdit):
+    """Редактор SQL с автодополнением ключевых слов и объектов схемы"""
+    MIN_PREFIX = 2
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.schema = None
+        self._schema_version = None
+        
+        self.completion_model = QStringListModel(self)
+        self.completer = QCompleter(self.completion_model, self)
+        self.completer.setWidget(self)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.setModelSorting(QCompleter.ModelSorting.CaseInsensitivelySortedModel)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+        self.completer.activated.connect(self.insert_completion)
+        self.completer.popup().setStyleSheet("""
+            QListView {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                selection-background-color: #303030;
+            }
+        """)
+        self.update_completions()
+    
+    def set_schema(self, schema):
+        self.schema = schema
+        self._schema_version = None
+        self.update_completions()
+    
+    def update_completions(self):
+        """Обновить список слов, если схема изменилась"""
+        words = set(SQLHighlighter.KEYWORDS) | {spec.name for spec in registry.functions.values()}
+        if self.schema is not None and self.schema.connection is not None:
+            self.schema.refresh()
+            if self.schema.schema_version == self._schema_version:
+                return
+            self._schema_version = self.schema.schema_version
+            words.update(self.schema.completion_words())
+        self.completion_model.setStringList(sorted(words, key=str.lower))
+    
+    def text_under_cursor(self):
+        """Начало слова до курсора - префикс для дополнения, без хвоста слова справа"""
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.StartOfWord, QTextCursor.MoveMode.KeepAnchor)
+        return cursor.selectedText()
+    
+    def insert_completion(self, completion):
+        cursor = self.textCursor()
+        prefix = self.completer.completionPrefix()
+        cursor.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor, len(prefix))
+        cursor.insertText(completion)
+        self.setTextCursor(cursor)
+    
+    def keyPressEvent(self, event):
+        popup = self.completer.popup()
+        if popup.isVisible() and event.key() in (Qt.Key.Key_Enter, Qt.Key.Key_Return,
+                                                 Qt.Key.Key_Tab, Qt.Key.Key_Escape):
+            event.ignore()
+            return
+        
+        forced = (event.key() == Qt.Key.Key_Space and
+                  event.modifiers() & Qt.KeyboardModifier.ControlModifier)
+        if not forced:
+            super().keyPressEvent(event)
+        
+        prefix = self.text_under_cursor()
+        if not forced and (len(prefix) < self.MIN_PREFIX or not event.text() or
+                           not (event.text()[-1].isalnum() or event.text()[-1] == '_')):
+            popup.hide()
+            return
+        
+        if forced:
+            self.update_completions()
+        if prefix != self.completer.completionPrefix():
+            self.completer.setCompletionPrefix(prefix)
+            popup.setCurrentIndex(self.completer.completionModel().index(0, 0))
+        
+        rect = self.cursorRect()
+        rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+        self.completer.complete(rect)
\ No newline at end of file
@@ -0,0 +1,352 @@
+import re
+import sys
+import weakref
+import numpy as np
+from PyQt6.QtCore import *
+
+try:
+    from .blobs import BlobRef, blob_display
+    from .editing import coerce_value
+    from .memory import SAMPLE_ROWS, budget
+except ImportError:
+    from blobs import BlobRef, blob_display
+    from editing import coerce_value
+    from memory import SAMPLE_ROWS, budget
+
+OPERATORS = [
+    ('contains', "содержит"),
+    ('regex', "regex"),
+    ('=', "="),
+    ('<', "<"),
+    ('>', ">"),
+    ('between', "между"),
+    ('null', "NULL")
+]
+
+def display_text(value):
+    """Текст значения, как он виден в таблице; NULL - пустая строка"""
+    if value is None:
+        return ""
+    if isinstance(value, bytes):
+        return blob_display(value)
+    return str(value)
+
+class TextIndex:
+    """Текстовое представление колонки для поиска.
+    
+    Строки хранятся как есть и в нижнем регистре списками строк Python, а
+    не массивом фиксированной ширины, где одно длинное значение раздувает
+    каждую ячейку колонки. Память индекса учитывается в бюджете, пока
+    индекс жив.
+    """
+    def __init__(self, buffer):
+        values = buffer.values.tolist()
+        texts = list(map(str, values))
+        for row in np.flatnonzero(~buffer.present).tolist():
+            texts[row] = ""
+        # BLOB и прочие нестроковые значения - как в таблице, но в поиске BLOB не участвует
+        blobs = np.zeros(len(values), dtype=bool)
+        for row in np.flatnonzero(buffer.present & ~buffer.numeric & (buffer.kinds != id(str))).tolist():
+            value = values[row]
+            texts[row] = display_text(value)
+            blobs[row] = isinstance(value, bytes) or isinstance(value, BlobRef) and not value.is_text
+        self.texts = texts
+        self.blobs = blobs
+        self.lower = list(map(str.lower, texts))
+        self._exact = None
+        
+        self.budget_key = object()
+        budget.charge(self.budget_key, len(texts), self.entry_size(values))
+        weakref.finalize(self, budget.release, self.budget_key)
+    
+    def entry_size(self, values, sample=SAMPLE_ROWS):
+        """Средний размер индекса на строку: новые строки и три указателя (texts, lower, exact)"""
+        if not values:
+            return 0
+        rows = range(0, len(values), max(len(values) // sample, 1))
+        size = 0
+        for row in rows:
+            text, lower = self.texts[row], self.lower[row]
+            size += 24
+            if text is not values[row]:
+                size += sys.getsizeof(text)
+            if lower is not text:
+                size += sys.getsizeof(lower)
+        return size / len(rows)
+    
+    @property
+    def exact(self):
+        if self._exact is None:
+            self._exact = np.array(self.texts, dtype=object)
+        return self._exact
+    
+    def contains(self, needle):
+        needle = needle.lower()
+        return np.fromiter((needle in text for text in self.lower), bool, len(self.lower)) & ~self.blobs
+    
+    def compare(self, operator, value):
+        return COMPARISONS[operator](self.exact, value)
+
+COMPARISONS = {
+    '=': lambda left, right: left == right,
+    '<': lambda left, right: left < right,
+    '>': lambda left, right: left > right
+}
+
+def text_index(buffer):
+    """Текстовый индекс колонки, строится один раз на снимок данных"""
+    if buffer.text_index is None:
+        buffer.text_index = TextIndex(buffer)
+    return buffer.text_index
+
+class ColumnPredicate:
+    """Условие на одну колонку: операнды разбираются и проверяются при создании.
+    
+    Числовой операнд сравнивается только с числами колонки, текстовый - с
+    текстом, как сравнивает значения разных типов SQLite. BLOB не подходит
+    ни под одно текстовое условие - одинаково в таблице и в SQL.
+    """
+    def __init__(self, column, name, operator, text=""):
+        self.column = column
+        self.name = name
+        self.operator = operator
+        self.text = text.strip()
+        self.pattern = None
+        self.operands = []
+        
+        if operator == 'contains':
+            if not self.text:
+                raise ValueError("Введите текст для поиска")
+        elif operator == 'regex':
+            try:
+                self.pattern = re.compile(self.text, re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"Ошибка в регулярном выражении: {e}")
+        elif operator == 'between':
+            parts = [part.strip() for part in self.text.split(",")]
+            if len(parts) != 2 or not all(parts):
+                raise ValueError("Для «между» введите два значения через запятую")
+            self.operands = [coerce_value(part) for part in parts]
+        elif operator in COMPARISONS:
+            if not self.text:
+                raise ValueError("Введите значение для сравнения")
+            self.operands = [coerce_value(self.text)]
+        elif operator != 'null':
+            raise ValueError(f"Неизвестная операция: {operator}")
+        
+        if any(operand is None for operand in self.operands):
+            raise ValueError("Для сравнения с NULL используйте операцию NULL")
+        numeric = [isinstance(operand, (int, float)) for operand in self.operands]
+        if self.operands and any(numeric) and not all(numeric):
+            raise ValueError("Границы должны быть одного типа")
+        self.numeric = bool(self.operands) and all(numeric)
+    
+    def describe(self):
+        label = dict(OPERATORS)[self.operator]
+        if self.operator == 'null':
+            return f"{self.name} IS NULL"
+        return f"{self.name} {label} {self.text}"
+    
+    def sql(self, column):
+        """То же условие на SQL для колонки column (имя в кавычках): (условие, параметры).
+        
+        Регистр при поиске не учитывается так же, как в таблице: через
+        regexp с флагом (?i), а не lower(), который в SQLite знает только ASCII.
+        """
+        if self.operator == 'null':
+            return f"{column} IS NULL", []
+        if self.operator == 'contains':
+            return f"typeof({column}) != 'blob' AND {column} REGEXP ?", [contains_pattern(self.text)]
+        if self.operator == 'regex':
+            return f"typeof({column}) != 'blob' AND {column} REGEXP ?", ["(?i)" + self.text]
+        
+        if self.numeric:
+            kind = f"typeof({column}) IN ('integer', 'real')"
+            operands = sorted(self.operands)
+        else:
+            kind = f"typeof({column}) = 'text'"
+            operands = sorted(str(operand) for operand in self.operands)
+        if self.operator == 'between':
+            return f"{kind} AND {column} BETWEEN ? AND ?", operands
+        return f"{kind} AND {column} {self.operator} ?", operands
+    
+    def evaluate(self, buffer):
+        """Маска строк (массив bool) для колонки buffer"""
+        if self.operator == 'null':
+            return ~buffer.present
+        if self.operator == 'contains':
+            return text_index(buffer).contains(self.text)
+        if self.operator == 'regex':
+            search = self.pattern.search
+            texts = text_index(buffer).texts
+            mask = np.fromiter((search(text) is not None for text in texts), bool, len(texts))
+            return mask & buffer.present & ~text_index(buffer).blobs
+        
+        if self.numeric:
+            values = buffer.numbers
+            if self.operator == 'between':
+                low, high = sorted(self.operands)
+                mask = (values >= low) & (values <= high)
+            else:
+                mask = COMPARISONS[self.operator](values, self.operands[0])
+            return mask & buffer.numeric
+        
+        index = text_index(buffer)
+        if self.operator == 'between':
+            low, high = sorted(str(operand) for operand in self.operands)
+            mask = index.compare('>', low) | index.compare('=', low)
+            mask &= index.compare('<', high) | index.compare('=', high)
+        else:
+            mask = index.compare(self.operator, str(self.operands[0]))
+        return mask & buffer.present & ~buffer.numeric & ~index.blobs
+
+def contains_pattern(text):
+    """Шаблон regexp для поиска подстроки без учета регистра"""
+    return "(?i)" + re.escape(text)
+
+def search_sql(columns, text):
+    """Условие строки поиска по всем колонкам на SQL: (условие, параметры)"""
+    pattern = contains_pattern(text)
+    condition = " OR ".join(f"(typeof({column}) != 'blob' AND {column} REGEXP ?)" for column in columns)
+    return condition, [pattern for _ in columns]
+
+def filter_mask(buffers, row_count, predicates=(), search="", columns=0):
+    """Маска строк, прошедших все условия и строку поиска (по всем колонкам)"""
+    mask = np.ones(row_count, dtype=bool)
+    for predicate in predicates:
+        mask &= predicate.evaluate(buffers.column(predicate.column))
+    if search:
+        found = np.zeros(row_count, dtype=bool)
+        for col in range(columns):
+            found |= text_index(buffers.column(col)).contains(search)
+        mask &= found
+    return mask
+
+class RowMapProxyModel(QAbstractProxyModel):
+    """Строки исходной модели в порядке row_map.
+    
+    Отфильтрованные строки не скрываются в представлении, а просто
+    отсутствуют в отображении, поэтому Qt не пересчитывает раскладку
+    для каждой строки; сортировка переставляет номера, не трогая данные.
+    row_map = None - все строки по порядку.
+    """
+    # Сортировку по щелчку на заголовке выполняет владелец модели
+    sort_requested = pyqtSignal(int, Qt.SortOrder)
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.row_map = None
+        self._positions = None
+    
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sort_requested.emit(column, order)
+    
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        super().setSourceModel(model)
+        model.dataChanged.connect(self._source_data_changed)
+        model.headerDataChanged.connect(self.headerDataChanged)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._source_reset)
+        model.rowsAboutToBeInserted.connect(self._source_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self._source_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._source_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._source_rows_removed)
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        if self.row_map is None:
+            return self.sourceModel().rowCount()
+        return len(self.row_map)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+    
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount() and 0 <= column < self.columnCount()):
+            return QModelIndex()
+        return self.createIndex(row, column)
+    
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+    
+    def source_row(self, row):
+        return row if self.row_map is None else int(self.row_map[row])
+    
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.source_row(index.row()), index.column())
+    
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        if self.row_map is None:
+            return self.index(index.row(), index.column())
+        if self._positions is None:
+            # Обратное отображение строится при первом обращении
+            self._positions = np.full(self.sourceModel().rowCount(), -1, dtype=np.intp)
+            self._positions[self.row_map] = np.arange(len(self.row_map))
+        row = index.row()
+        if row >= len(self._positions) or self._positions[row] < 0:
+            return QModelIndex()
+        return self.index(int(self._positions[row]), index.column())
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if self.sourceModel() is None:
+            return None
+        if orientation == Qt.Orientation.Vertical and 0 <= section < self.rowCount():
+            section = self.source_row(section)
+        return self.sourceModel().headerData(section, orientation, role)
+    
+    def set_row_map(self, row_map):
+        self.beginResetModel()
+        self.row_map = row_map
+        self._positions = None
+        self.endResetModel()
+    
+    def _source_data_changed(self, top_left, bottom_right, roles=()):
+        if self.row_map is None:
+            self.dataChanged.emit(self.index(top_left.row(), top_left.column()),
+                                  self.index(bottom_right.row(), bottom_right.column()), roles)
+        elif len(self.row_map):
+            # Исходный диапазон в отображении не непрерывен - обновляем видимые колонки целиком
+            self.dataChanged.emit(self.index(0, top_left.column()),
+                                  self.index(len(self.row_map) - 1, bottom_right.column()), roles)
+    
+    def _source_reset(self):
+        self.row_map = None
+        self._positions = None
+        self.endResetModel()
+    
+    def _source_rows_about_to_be_inserted(self, parent, first, last):
+        start = self.rowCount()
+        self.beginInsertRows(QModelIndex(), start, start + last - first)
+    
+    def _source_rows_inserted(self, parent, first, last):
+        # Новые строки всегда видны в конце, даже если не проходят фильтр
+        if self.row_map is not None:
+            self.row_map = np.concatenate([self.row_map, np.arange(first, last + 1)])
+            self._positions = None
+        self.endInsertRows()
+    
+    def _source_rows_about_to_be_removed(self, parent, first, last):
+        if self.row_map is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+        else:
+            # Удаленные строки разбросаны по отображению - пересобираем его
+            self.beginResetModel()
+    
+    def _source_rows_removed(self, parent, first, last):
+        if self.row_map is None:
+            self.endRemoveRows()
+            return
+        count = last - first + 1
+        rows = self.row_map[(self.row_map < first) | (self.row_map > last)]
+        self.row_map = np.where(rows > last, rows - count, rows)
+        self._positions = None
+        self.endResetModel()
\ No newline at end of file
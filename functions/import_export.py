@@ -1,27 +1,189 @@
 import pandas as pd
 import json
 import os
+import csv
+import re
+import time
+from itertools import chain, islice
+from datetime import date, datetime, time as clock_time
+
+try:
+    from .tracing import tracer, traced
+    from .schema import quote_identifier
+    from .utils import format_size
+except ImportError:
+    from tracing import tracer, traced
+    from schema import quote_identifier
+    from utils import format_size
+
+EXCEL_MAX_ROWS = 1000000
+# Строк листа Excel, по которым определяются типы колонок
+EXCEL_SAMPLE_ROWS = 1000
+# Символов JSON, дочитываемых за раз при потоковом разборе массива
+JSON_CHUNK = 65536
+# Хвост буфера, который может быть началом числа из следующей порции
+NUMBER_TAIL_RE = re.compile(r'[\d.eE+-]*$')
+
+def export_value(value):
+    """Значение ячейки для текстовых форматов: BLOB пишется в hex"""
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+def excel_value(value):
+    """Значение ячейки Excel для SQLite: даты и время - текстом ISO 8601"""
+    if isinstance(value, (datetime, date, clock_time)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat()
+    return value
+
+def infer_column_type(values):
+    """Тип колонки по выборке: INTEGER, REAL или TEXT (пустые ячейки не учитываются)"""
+    kind = None
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, int):
+            kind = kind or "INTEGER"
+        elif isinstance(value, float):
+            kind = "REAL" if kind in (None, "INTEGER", "REAL") else "TEXT"
+        else:
+            return "TEXT"
+        if kind == "TEXT":
+            return kind
+    return kind or "TEXT"
+
+def excel_headers(row, header_row):
+    """Имена колонок из строки заголовка: пустые - column_N, повторы - с номером"""
+    names = []
+    seen = set()
+    for index, value in enumerate(row, 1):
+        name = str(value).strip() if header_row and value is not None else ""
+        name = name or f"column_{index}"
+        base, number = name, 2
+        while name.lower() in seen:
+            name = f"{base}_{number}"
+            number += 1
+        seen.add(name.lower())
+        names.append(name)
+    return names
+
+def iter_json_array(f, chunk_size=JSON_CHUNK):
+    """Элементы JSON-массива верхнего уровня по одному, без чтения всего файла.
+    
+    Буфер дочитывается, пока очередной элемент не разберется целиком, поэтому
+    в памяти лежит одна запись, а не весь документ. Недочитанный элемент
+    разбирается заново с удвоенным буфером.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    state = 'start'
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position >= len(buffer):
+            if eof:
+                raise ValueError("Неожиданный конец JSON")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        
+        char = buffer[position]
+        if state == 'start':
+            if char != '[':
+                raise ValueError("Ожидается массив JSON")
+            position += 1
+            state = 'first'
+        elif state == 'separator':
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError(f"Ожидается ',' или ']' в позиции {position}")
+            position += 1
+            state = 'value'
+        elif state == 'first' and char == ']':
+            return
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # Число на краю буфера может продолжаться в следующей порции
+                complete = eof or not NUMBER_TAIL_RE.match(buffer, end)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(max(chunk_size, len(buffer)))
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield value
+            position = end
+            state = 'separator'
 
 class ImportExportManager:
     def __init__(self):
         self.chunk_size = 10000
+        self.last_stats = None
+    
+    def open_source(self, table_name, connection, query=None, params=()):
+        """Курсор по таблице или произвольному запросу с параметрами"""
+        if query is None:
+            query = f"SELECT * FROM {quote_identifier(table_name)}"
+        cursor = connection.cursor()
+        cursor.execute(query, params)
+        if cursor.description is None:
+            # Оператор без результата мог изменить данные - они не сохраняются
+            if connection.in_transaction:
+                connection.rollback()
+            raise ValueError("Запрос не возвращает данные")
+        return cursor
+    
+    def iter_batches(self, cursor):
+        """Строки курсора порциями, без загрузки всего результата"""
+        while True:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            yield rows
+    
+    def finish_export(self, file_path, rows, started, note=""):
+        """Сохранить статистику экспорта и сформировать сообщение"""
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        size = os.path.getsize(file_path)
+        self.last_stats = {
+            'rows': rows,
+            'bytes': size,
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed
+        }
+        tracer.annotate(rows=rows, bytes=size)
+        return (f"Экспортировано в {os.path.basename(file_path)}{note}: {rows} строк, "
+                f"{format_size(size)}, {rows / elapsed:.0f} строк/с")
     
+    @traced("io.import_csv", "io")
     def import_csv(self, file_path, connection):
         try:
             table_name = os.path.splitext(os.path.basename(file_path))[0]
             first_chunk = True
+            rows = 0
             
             for chunk in pd.read_csv(file_path, chunksize=self.chunk_size):
+                rows += len(chunk)
                 if first_chunk:
                     chunk.to_sql(table_name, connection, if_exists='replace', index=False)
                     first_chunk = False
                 else:
                     chunk.to_sql(table_name, connection, if_exists='append', index=False)
             
+            tracer.annotate(rows=rows, bytes=os.path.getsize(file_path))
             return True, f"Данные импортированы в таблицу {table_name}"
         except Exception as e:
             return False, f"Ошибка импорта: {str(e)}"
     
+    @traced("io.import_json", "io")
     def import_json(self, file_path, connection):
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -32,45 +194,300 @@ class ImportExportManager:
             
             df.to_sql(table_name, connection, if_exists='replace', index=False)
             
+            tracer.annotate(rows=len(df), bytes=os.path.getsize(file_path))
             return True, f"Данные импортированы в таблицу {table_name}"
         except Exception as e:
             return False, f"Ошибка импорта: {str(e)}"
     
-    def export_csv(self, table_name, file_path, connection):
+    def list_excel_sheets(self, file_path):
+        from openpyxl import load_workbook
+        workbook = load_workbook(file_path, read_only=True)
         try:
-            first_chunk = True
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    
+    def iter_excel_rows(self, sheet, header_row):
+        """(заголовки, строки листа) - строки читаются потоком, пустые пропускаются.
+        
+        header_row - номер строки заголовка (с 1), 0 - заголовка нет.
+        """
+        rows = sheet.iter_rows(min_row=max(header_row, 1), values_only=True)
+        first = next(rows, None)
+        if first is None:
+            return [], iter(())
+        width = len(first)
+        if header_row:
+            # Правые пустые ячейки заголовка не становятся колонками
+            while width and first[width - 1] is None:
+                width -= 1
+        else:
+            # Без заголовка ширина - по самой длинной из первых строк: в read_only строки не дополняются
+            head = [first] + list(islice(rows, EXCEL_SAMPLE_ROWS))
+            width = max(len(row) for row in head)
+            rows = chain(head, rows)
+        columns = excel_headers(first[:width] if header_row else (None,) * width, header_row)
+        
+        def values():
+            for row in rows:
+                if all(value is None for value in row):
+                    continue
+                row = tuple(excel_value(value) for value in row[:width])
+                yield row + (None,) * (width - len(row))
+        return columns, values()
+    
+    @traced("io.import_excel", "io")
+    def import_excel(self, file_path, connection, sheets, header_row=1, progress=None):
+        """Импорт листов .xlsx в таблицы с именами листов (существующие заменяются).
+        
+        Книга открывается в режиме read_only: строки листа читаются потоком
+        из XML, в памяти только текущая порция. Типы колонок определяются
+        по первым EXCEL_SAMPLE_ROWS строкам. Все листы загружаются одной
+        транзакцией; progress(лист, строк) может вернуть False для отмены -
+        тогда откатывается все.
+        """
+        from openpyxl import load_workbook
+        
+        try:
+            started = time.perf_counter()
+            workbook = load_workbook(file_path, read_only=True, data_only=True)
+            total = 0
+            imported = []
+            try:
+                with connection:
+                    if not connection.in_transaction:
+                        connection.execute("BEGIN")
+                    for sheet_name in sheets:
+                        columns, rows = self.iter_excel_rows(workbook[sheet_name], header_row)
+                        if not columns:
+                            continue
+                        sample = []
+                        for row in rows:
+                            sample.append(row)
+                            if len(sample) >= EXCEL_SAMPLE_ROWS:
+                                break
+                        types = [infer_column_type(row[i] for row in sample) for i in range(len(columns))]
+                        
+                        table = quote_identifier(sheet_name)
+                        definitions = ", ".join(f"{quote_identifier(column)} {column_type}"
+                                                for column, column_type in zip(columns, types))
+                        connection.execute(f"DROP TABLE IF EXISTS {table}")
+                        connection.execute(f"CREATE TABLE {table} ({definitions})")
+                        sql = self.build_insert(sheet_name, columns)
+                        
+                        count = 0
+                        batch = sample
+                        for row in rows:
+                            batch.append(row)
+                            if len(batch) >= self.chunk_size:
+                                connection.executemany(sql, batch)
+                                count += len(batch)
+                                batch = []
+                                if progress and progress(sheet_name, count) is False:
+                                    raise InterruptedError("Импорт отменен")
+                        connection.executemany(sql, batch)
+                        count += len(batch)
+                        total += count
+                        imported.append(f"{sheet_name} ({count})")
+            finally:
+                workbook.close()
             
-            for chunk in pd.read_sql_query(f"SELECT * FROM {table_name}", 
-                                          connection, chunksize=self.chunk_size):
-                if first_chunk:
-                    chunk.to_csv(file_path, index=False, encoding='utf-8')
-                    first_chunk = False
-                else:
-                    chunk.to_csv(file_path, mode='a', header=False, index=False, encoding='utf-8')
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            self.last_stats = {'rows': total, 'seconds': elapsed, 'rows_per_sec': total / elapsed}
+            tracer.annotate(rows=total, bytes=os.path.getsize(file_path))
+            return True, (f"Импортированы листы: {', '.join(imported)}; {total} строк, "
+                          f"{total / elapsed:.0f} строк/с")
+        except InterruptedError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"Ошибка импорта: {str(e)}"
+    
+    def read_source_columns(self, file_path):
+        """Имена колонок файла для сопоставления с таблицей"""
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension == '.csv':
+            with open(file_path, 'r', newline='', encoding='utf-8-sig') as f:
+                return next(csv.reader(f), [])
+        
+        for record in self.iter_source_records(file_path):
+            return list(record)
+        return []
+    
+    def iter_source_records(self, file_path):
+        """Записи JSON (массив объектов) или JSON Lines по одной, потоком"""
+        if file_path.lower().endswith('.jsonl'):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                yield from iter_json_array(f)
+    
+    def iter_source_rows(self, file_path, source_columns):
+        """Порции кортежей значений в порядке source_columns"""
+        batch = []
+        if file_path.lower().endswith('.csv'):
+            with open(file_path, 'r', newline='', encoding='utf-8-sig') as f:
+                reader = csv.reader(f)
+                header = next(reader, [])
+                positions = [header.index(column) for column in source_columns]
+                for record in reader:
+                    # Пустое поле CSV считается NULL, как при импорте через pandas
+                    batch.append(tuple(record[i] if i < len(record) and record[i] != "" else None
+                                       for i in positions))
+                    if len(batch) >= self.chunk_size:
+                        yield batch
+                        batch = []
+        else:
+            for record in self.iter_source_records(file_path):
+                batch.append(tuple(record.get(column) for column in source_columns))
+                if len(batch) >= self.chunk_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    
+    def build_insert(self, table_name, columns, mode='append', conflict_columns=()):
+        """INSERT для режима: append, ignore (INSERT OR IGNORE) или upsert (ON CONFLICT DO UPDATE)"""
+        table = quote_identifier(table_name)
+        names = ", ".join(quote_identifier(column) for column in columns)
+        marks = ", ".join("?" for _ in columns)
+        
+        if mode == 'ignore':
+            return f"INSERT OR IGNORE INTO {table} ({names}) VALUES ({marks})"
+        sql = f"INSERT INTO {table} ({names}) VALUES ({marks})"
+        if mode == 'upsert':
+            if not conflict_columns:
+                raise ValueError("Для обновления при конфликте нужен уникальный ключ")
+            target = ", ".join(quote_identifier(column) for column in conflict_columns)
+            updates = [column for column in columns if column not in conflict_columns]
+            if updates:
+                assignments = ", ".join(f"{quote_identifier(column)} = excluded.{quote_identifier(column)}"
+                                        for column in updates)
+                sql += f" ON CONFLICT ({target}) DO UPDATE SET {assignments}"
+            else:
+                sql += f" ON CONFLICT ({target}) DO NOTHING"
+        return sql
+    
+    @traced("io.import_into_table", "io")
+    def import_into_table(self, file_path, connection, schema, table_name, mapping,
+                          mode='append', conflict_columns=(), defer_indexes=False, progress=None):
+        """Загрузка файла в существующую таблицу.
+        
+        mapping - {колонка таблицы: колонка файла}. Вся загрузка идет одной
+        транзакцией; при defer_indexes неуникальные индексы удаляются до
+        вставки и строятся заново после нее (уникальные нужны для
+        конфликтов и остаются). При ошибке откатывается все, включая индексы.
+        """
+        try:
+            started = time.perf_counter()
+            columns = [column for column, source in mapping.items() if source]
+            if not columns:
+                return False, "Не выбрано ни одной колонки"
+            sql = self.build_insert(table_name, columns, mode, conflict_columns)
+            
+            deferred = []
+            if defer_indexes:
+                deferred = [index for index in schema.get_indexes(table_name)
+                            if index.origin == 'c' and not index.unique and index.sql]
+            
+            rows = 0
+            changes = connection.total_changes
+            with connection:
+                # DDL не открывает транзакцию неявно, без BEGIN удаление индексов не откатится
+                if not connection.in_transaction:
+                    connection.execute("BEGIN")
+                for index in deferred:
+                    connection.execute(f"DROP INDEX {quote_identifier(index.name)}")
+                for batch in self.iter_source_rows(file_path, [mapping[column] for column in columns]):
+                    connection.executemany(sql, batch)
+                    rows += len(batch)
+                    if progress:
+                        progress(rows)
+                with tracer.span("io.rebuild_indexes", "io", rows=len(deferred)):
+                    for index in deferred:
+                        connection.execute(index.sql)
             
-            return True, f"Таблица экспортирована в {os.path.basename(file_path)}"
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            # Для upsert total_changes учитывает и вставки, и обновления
+            written = connection.total_changes - changes
+            self.last_stats = {'rows': rows, 'written': written, 'seconds': elapsed,
+                               'rows_per_sec': rows / elapsed}
+            tracer.annotate(rows=rows, bytes=os.path.getsize(file_path))
+            note = f", индексов перестроено: {len(deferred)}" if deferred else ""
+            return True, (f"Загружено в {table_name}: {rows} строк, записано {written}{note}, "
+                          f"{rows / elapsed:.0f} строк/с")
+        except Exception as e:
+            return False, f"Ошибка импорта: {str(e)}"
+    
+    @traced("io.export_csv", "io")
+    def export_csv(self, table_name, file_path, connection, query=None, params=()):
+        try:
+            started = time.perf_counter()
+            cursor = self.open_source(table_name, connection, query, params)
+            rows = 0
+            
+            with open(file_path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow([description[0] for description in cursor.description])
+                for batch in self.iter_batches(cursor):
+                    writer.writerows([[export_value(value) for value in row] for row in batch])
+                    rows += len(batch)
+            
+            return True, self.finish_export(file_path, rows, started)
         except Exception as e:
             return False, f"Ошибка экспорта: {str(e)}"
     
-    def export_json(self, table_name, file_path, connection):
+    @traced("io.export_json", "io")
+    def export_json(self, table_name, file_path, connection, query=None, params=()):
         try:
-            df = pd.read_sql_query(f"SELECT * FROM {table_name}", connection)
-            df.to_json(file_path, orient='records', indent=2, force_ascii=False)
+            started = time.perf_counter()
+            cursor = self.open_source(table_name, connection, query, params)
+            columns = [description[0] for description in cursor.description]
+            rows = 0
+            
+            # Массив записей пишется по одной, без сборки всего документа в памяти
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write("[")
+                for batch in self.iter_batches(cursor):
+                    parts = []
+                    for row in batch:
+                        record = {column: export_value(value) for column, value in zip(columns, row)}
+                        parts.append(json.dumps(record, ensure_ascii=False, indent=2))
+                    f.write(("\n" if rows == 0 else ",\n") + ",\n".join(parts))
+                    rows += len(batch)
+                f.write("\n]" if rows else "]")
             
-            return True, f"Таблица экспортирована в {os.path.basename(file_path)}"
+            return True, self.finish_export(file_path, rows, started)
         except Exception as e:
             return False, f"Ошибка экспорта: {str(e)}"
     
-    def export_excel(self, table_name, file_path, connection):
+    @traced("io.export_excel", "io")
+    def export_excel(self, table_name, file_path, connection, query=None, params=()):
         try:
-            df = pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 1000000", connection)
+            from openpyxl import Workbook
             
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=table_name, index=False)
+            started = time.perf_counter()
+            cursor = self.open_source(table_name, connection, query, params)
             
-            if len(df) == 1000000:
-                return True, f"Таблица экспортирована (1,000,000 записей, макс. для Excel)"
-            else:
-                return True, f"Таблица экспортирована в {os.path.basename(file_path)}"
+            # write_only: строки сразу уходят в поток, а не в дерево ячеек
+            workbook = Workbook(write_only=True)
+            sheet_name = re.sub(r'[\[\]:*?/\\]', '_', table_name or "Запрос")[:31]
+            sheet = workbook.create_sheet(sheet_name)
+            sheet.append([description[0] for description in cursor.description])
+            
+            rows = 0
+            for batch in self.iter_batches(cursor):
+                batch = batch[:EXCEL_MAX_ROWS - rows]
+                for row in batch:
+                    sheet.append([export_value(value) for value in row])
+                rows += len(batch)
+                if rows >= EXCEL_MAX_ROWS:
+                    break
+            workbook.save(file_path)
+            
+            note = " (1,000,000 записей, макс. для Excel)" if rows >= EXCEL_MAX_ROWS else ""
+            return True, self.finish_export(file_path, rows, started, note)
         except Exception as e:
             return False, f"Ошибка экспорта: {str(e)}"
\ No newline at end of file
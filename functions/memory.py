@@ -0,0 +1,147 @@
+import sys
+from PyQt6.QtCore import *
+
+try:
+    from .utils import format_size
+except ImportError:
+    from utils import format_size
+
+# Бюджет памяти под загруженные строки по умолчанию, МБ
+DEFAULT_BUDGET_MB = 512
+# Строк в одной пачке чтения: после каждой пачки проверяется бюджет
+FETCH_BATCH = 5000
+# Строк в выборке для оценки размера строки
+SAMPLE_ROWS = 100
+# Столько строк загружается всегда, даже если бюджет уже занят
+MIN_ROWS = 100
+MB = 1024 * 1024
+
+def row_size(row):
+    """Размер строки в байтах: кортеж, значения и указатель в списке строк"""
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) + 8
+
+def estimate_row_size(rows, sample=SAMPLE_ROWS):
+    """Средний размер строки по равномерной выборке из rows"""
+    if not rows:
+        return 0
+    step = max(len(rows) // sample, 1)
+    chosen = rows[::step]
+    return sum(row_size(row) for row in chosen) / len(chosen)
+
+class RowCursor:
+    """Курсор, в который можно вернуть прочитанные, но не принятые строки.
+    
+    Результат дочитывается с того же места открытого оператора, без
+    повторного выполнения запроса.
+    """
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.pending = []
+    
+    def unread(self, rows):
+        self.pending[:0] = rows
+    
+    def fetchmany(self, size):
+        batch = self.pending[:size]
+        del self.pending[:size]
+        if len(batch) < size:
+            batch.extend(self.cursor.fetchmany(size - len(batch)))
+        return batch
+    
+    def close(self):
+        self.pending = []
+        self.cursor.close()
+
+class MemoryBudget(QObject):
+    """Учет памяти загруженных результатов.
+    
+    Каждый владелец (просмотр таблицы, результат оператора скрипта)
+    сообщает свои строки через track; размер оценивается по выборке
+    строк, а не по каждой. fetch читает курсор пачками и останавливается,
+    когда следующая пачка не помещается в свободную часть бюджета.
+    """
+    changed = pyqtSignal()
+    
+    def __init__(self, limit_mb=DEFAULT_BUDGET_MB, parent=None):
+        super().__init__(parent)
+        self.limit = limit_mb * MB
+        # владелец -> (строк, средний размер строки)
+        self.usage = {}
+    
+    def set_limit_mb(self, limit_mb):
+        self.limit = limit_mb * MB
+        self.changed.emit()
+    
+    def total(self):
+        return sum(count * size for count, size in self.usage.values())
+    
+    def available(self, owner=None):
+        """Свободная часть бюджета без учета строк самого owner"""
+        used = sum(count * size for key, (count, size) in self.usage.items() if key is not owner)
+        return max(self.limit - used, 0)
+    
+    def track(self, owner, rows):
+        if rows:
+            self.usage[owner] = (len(rows), estimate_row_size(rows))
+        else:
+            self.usage.pop(owner, None)
+        self.changed.emit()
+    
+    def charge(self, owner, count, size):
+        """Учесть count элементов по size байт - память не строк, а, например, индекса поиска"""
+        if count:
+            self.usage[owner] = (count, size)
+        else:
+            self.usage.pop(owner, None)
+        self.changed.emit()
+    
+    def release(self, owner):
+        if self.usage.pop(owner, None) is not None:
+            self.changed.emit()
+    
+    def overflow_rows(self, owner):
+        """Сколько первых строк owner нужно отбросить, чтобы уложиться в бюджет"""
+        count, size = self.usage.get(owner, (0, 0))
+        if not size:
+            return 0
+        excess = count * size - self.available(owner)
+        if excess <= 0:
+            return 0
+        return min(int(excess // size) + 1, max(count - MIN_ROWS, 0))
+    
+    def fetch(self, cursor, owner, max_rows=None):
+        """Прочитать строки курсора, пока они помещаются в бюджет.
+        
+        Возвращает (строки, остановлено ли чтение по бюджету). Размер
+        строки оценивается по каждой пачке, поэтому широкие строки в
+        конце результата тоже учитываются. Непринятые строки пачки
+        RowCursor получает обратно.
+        """
+        available = self.available(owner)
+        rows = []
+        used = 0
+        truncated = False
+        while max_rows is None or len(rows) < max_rows:
+            size = FETCH_BATCH if max_rows is None else min(FETCH_BATCH, max_rows - len(rows))
+            batch = cursor.fetchmany(size)
+            if not batch:
+                break
+            average = estimate_row_size(batch)
+            fits = max(int((available - used) // average), MIN_ROWS - len(rows), 0)
+            if fits < len(batch):
+                rows.extend(batch[:fits])
+                if isinstance(cursor, RowCursor):
+                    cursor.unread(batch[fits:])
+                truncated = True
+                break
+            rows.extend(batch)
+            used += average * len(batch)
+            if len(batch) < size:
+                break
+        self.track(owner, rows)
+        return rows, truncated
+    
+    def status_text(self):
+        return f"Данные: {format_size(self.total())} из {format_size(self.limit)}"
+
+budget = MemoryBudget()
\ No newline at end of file
@@ -0,0 +1,201 @@
+from PyQt6.QtWidgets import *
+from PyQt6.QtCore import *
+from PyQt6.QtGui import *
+
+try:
+    from .tracing import tracer
+    from .udf import registry
+except ImportError:
+    from tracing import tracer
+    from udf import registry
+
+class TimelineWidget(QWidget):
+    """Временная шкала последних отрезков трассировки"""
+    ROW_HEIGHT = 18
+    COLORS = {
+        'db': QColor(139, 0, 0),
+        'io': QColor(0, 51, 102),
+        'ui': QColor(80, 80, 80),
+        'app': QColor(110, 60, 60)
+    }
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.spans = []
+        self.window = 10.0
+        self.setMinimumHeight(120)
+    
+    def set_spans(self, spans):
+        self.spans = spans
+        self.update()
+    
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(26, 26, 26))
+        
+        if not self.spans:
+            painter.setPen(QColor(96, 96, 96))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter, "Нет данных трассировки")
+            return
+        
+        end = max(span.end for span in self.spans)
+        start = end - self.window
+        width = max(1, self.width())
+        scale = width / self.window
+        
+        for span in self.spans:
+            if span.end < start:
+                continue
+            x = int((span.start - start) * scale)
+            w = max(2, int(span.duration * scale))
+            y = 4 + span.depth * (self.ROW_HEIGHT + 2)
+            rect = QRect(x, y, w, self.ROW_HEIGHT)
+            painter.fillRect(rect, self.COLORS.get(span.category, self.COLORS['app']))
+            if w > 40:
+                painter.setPen(QColor(224, 224, 224))
+                painter.drawText(rect.adjusted(3, 0, -3, 0),
+                                 Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+                                 span.name)
+        
+        painter.setPen(QColor(96, 96, 96))
+        painter.drawText(4, self.height() - 4, f"последние {self.window:.0f} с")
+
+class MetricsDock(QDockWidget):
+    """Панель метрик: последние операции и их длительность"""
+    MAX_ROWS = 200
+    
+    def __init__(self, parent=None):
+        super().__init__("Метрики", parent)
+        self.setObjectName("metrics_dock")
+        self._version = -1
+        
+        widget = QWidget()
+        widget.setStyleSheet("""
+            QWidget {
+                background-color: #151515;
+                color: #e0e0e0;
+            }
+            QTableWidget {
+                background-color: #1a1a1a;
+                gridline-color: #303030;
+                border: 1px solid #303030;
+                font-size: 11px;
+            }
+            QHeaderView::section {
+                background-color: #202020;
+                color: #a0a0a0;
+                padding: 4px;
+                border: none;
+                border-right: 1px solid #303030;
+            }
+            QPushButton {
+                background-color: #1a1a1a;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 4px 10px;
+            }
+            QPushButton:hover {
+                background-color: #252525;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(5, 5, 5, 5)
+        
+        controls = QHBoxLayout()
+        self.enable_check = QCheckBox("Трассировка")
+        self.enable_check.setChecked(tracer.enabled)
+        self.enable_check.toggled.connect(tracer.set_enabled)
+        controls.addWidget(self.enable_check)
+        controls.addStretch()
+        
+        clear_btn = QPushButton("Очистить")
+        clear_btn.clicked.connect(tracer.clear)
+        clear_btn.clicked.connect(registry.reset_stats)
+        controls.addWidget(clear_btn)
+        
+        export_btn = QPushButton("Экспорт JSON")
+        export_btn.clicked.connect(self.export_trace)
+        controls.addWidget(export_btn)
+        layout.addLayout(controls)
+        
+        self.timeline = TimelineWidget()
+        layout.addWidget(self.timeline)
+        
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Операция", "мс", "Строк", "Байт", "Поток"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+        
+        # Функции SQL из реестра: вызовы и время за время включенной трассировки
+        self.functions_table = QTableWidget(0, 4)
+        self.functions_table.setHorizontalHeaderLabels(["Функция SQL", "Вызовов", "мс", "мкс/вызов"])
+        self.functions_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.functions_table.verticalHeader().setVisible(False)
+        self.functions_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.functions_table.setMaximumHeight(150)
+        layout.addWidget(self.functions_table)
+        
+        widget.setLayout(layout)
+        self.setWidget(widget)
+        
+        # Опрос трассировщика, а не сигналы: отрезки могут закрываться в других потоках
+        self.timer = QTimer(self)
+        self.timer.setInterval(500)
+        self.timer.timeout.connect(self.refresh)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+    
+    def on_visibility_changed(self, visible):
+        if visible:
+            self.enable_check.setChecked(tracer.enabled)
+            self.refresh()
+            self.timer.start()
+        else:
+            self.timer.stop()
+    
+    def refresh(self):
+        self.refresh_functions()
+        if tracer.version == self._version:
+            return
+        self._version = tracer.version
+        
+        spans = tracer.snapshot()
+        self.timeline.set_spans(spans)
+        
+        recent = spans[-self.MAX_ROWS:][::-1]
+        self.table.setRowCount(len(recent))
+        for row, span in enumerate(recent):
+            values = [
+                "  " * span.depth + span.name,
+                f"{span.duration * 1000:.1f}",
+                str(span.attrs.get('rows', "")),
+                str(span.attrs.get('bytes', "")),
+                span.thread_name
+            ]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if 'error' in span.attrs:
+                    item.setForeground(QColor(255, 68, 68))
+                    # У зависания интерфейса в подсказке - стек потока интерфейса
+                    item.setToolTip(span.attrs.get('stack') or span.attrs['error'])
+                self.table.setItem(row, col, item)
+    
+    def refresh_functions(self):
+        stats = registry.stats()
+        self.functions_table.setRowCount(len(stats))
+        for row, (name, calls, seconds) in enumerate(stats):
+            values = [name, str(calls), f"{seconds * 1000:.1f}", f"{seconds * 1e6 / calls:.2f}"]
+            for col, value in enumerate(values):
+                self.functions_table.setItem(row, col, QTableWidgetItem(value))
+    
+    def export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Экспорт трассировки",
+                                                   "trace.json", "JSON files (*.json)")
+        if file_path:
+            try:
+                count = tracer.export_chrome_trace(file_path)
+                QMessageBox.information(self, "Успех", f"Сохранено отрезков: {count}")
+            except Exception as e:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка экспорта трассировки: {str(e)}")
\ No newline at end of file
@@ -1,13 +1,65 @@
+import sqlite3
+import numpy as np
 from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 
+try:
+    from .tracing import tracer, traced
+    from .schema import quote_identifier
+    from .blobs import BlobRef, PreviewCache, blob_display, build_table_select, materialize_rows, load_preview
+    from .dialogs import BlobInspectorDialog
+    from .editing import ChangeSet, coerce_value
+    from .stats_panel import ColumnStatsPanel
+    from .sampling import key_filter, rowid_filter, sample_rowids, sample_rows
+    from .navigation import PositionIndex, key_columns, key_condition, key_list, seek
+    from .database import open_connection
+    from .selection import ColumnBuffers, format_number, summarize, summary_text
+    from .filtering import OPERATORS, ColumnPredicate, RowMapProxyModel, filter_mask, search_sql
+    from .sorting import sort_permutation, sort_sql
+    from .tail import TAIL_CAPACITY, TAIL_INTERVAL, IngestRate, TailReader
+    from .memory import FETCH_BATCH, RowCursor, budget
+except ImportError:
+    from tracing import tracer, traced
+    from schema import quote_identifier
+    from blobs import BlobRef, PreviewCache, blob_display, build_table_select, materialize_rows, load_preview
+    from dialogs import BlobInspectorDialog
+    from editing import ChangeSet, coerce_value
+    from stats_panel import ColumnStatsPanel
+    from sampling import key_filter, rowid_filter, sample_rowids, sample_rows
+    from navigation import PositionIndex, key_columns, key_condition, key_list, seek
+    from database import open_connection
+    from selection import ColumnBuffers, format_number, summarize, summary_text
+    from filtering import OPERATORS, ColumnPredicate, RowMapProxyModel, filter_mask, search_sql
+    from sorting import sort_permutation, sort_sql
+    from tail import TAIL_CAPACITY, TAIL_INTERVAL, IngestRate, TailReader
+    from memory import FETCH_BATCH, RowCursor, budget
+
 class LargeTableModel(QAbstractTableModel):
     """Модель для работы с большими данными"""
+    DIRTY_COLOR = QColor(74, 16, 16)
+    NEW_COLOR = QColor(16, 48, 32)
+    DELETED_COLOR = QColor(45, 45, 45)
+    
     def __init__(self, data=None, headers=None):
         super().__init__()
         self._data = data if data is not None else []
         self._headers = headers if headers is not None else []
+        self._rowids = []
+        self.connection = None
+        self.schema = None
+        # Превью BLOB переживают перезагрузку окна, пока данные не изменились
+        self.previews = PreviewCache()
+        # Номер первой загруженной строки в таблице (окно после перехода)
+        self.row_offset = 0
+        # Дочитывание следующего окна при прокрутке вниз (загрузка остановлена бюджетом памяти)
+        self.fetch_more = None
+        
+        # Редактирование: изменения хранятся поверх данных до сохранения
+        self.changes = None
+        self._edits = {}
+        self._new_rows = {}
+        self._deleted_rows = set()
     
     def rowCount(self, parent=QModelIndex()):
         return len(self._data)
@@ -19,30 +71,241 @@ class LargeTableModel(QAbstractTableModel):
         if not index.isValid():
             return QVariant()
         
-        if role == Qt.ItemDataRole.DisplayRole:
-            row = index.row()
-            col = index.column()
+        row = index.row()
+        col = index.column()
+        
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
             if 0 <= row < len(self._data) and 0 <= col < len(self._data[row]):
-                return str(self._data[row][col])
+                value = self._data[row][col]
+                if self._edits:
+                    value = self._edits.get((row, col), value)
+                if role == Qt.ItemDataRole.EditRole:
+                    return "NULL" if value is None else str(value)
+                if isinstance(value, BlobRef):
+                    # Превью BLOB читаем только для отрисовываемых ячеек
+                    if not value.is_text and value.preview is None and self.connection:
+                        value.preview = self.previews.get(value, self.schema.data_key() if self.schema else None)
+                        if value.preview is None:
+                            load_preview(self.connection, value)
+                            self.previews.put(value)
+                    return str(value)
+                if isinstance(value, bytes):
+                    return blob_display(value)
+                return str(value)
+        
+        elif role == Qt.ItemDataRole.BackgroundRole and self.changes is not None:
+            if row in self._deleted_rows:
+                return QBrush(self.DELETED_COLOR)
+            if row in self._new_rows:
+                return QBrush(self.NEW_COLOR)
+            if (row, col) in self._edits:
+                return QBrush(self.DIRTY_COLOR)
+        
+        elif role == Qt.ItemDataRole.FontRole and row in self._deleted_rows:
+            font = QFont()
+            font.setStrikeOut(True)
+            return font
         
         return QVariant()
     
+    def flags(self, index):
+        flags = super().flags(index)
+        if self.changes is not None and index.isValid() and index.row() not in self._deleted_rows:
+            if not isinstance(self._data[index.row()][index.column()], BlobRef):
+                flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+    
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        return self.set_values([(index.row(), index.column(), value)]) > 0
+    
     def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
                 if 0 <= section < len(self._headers):
                     return self._headers[section]
             else:
-                return str(section + 1)
+                return str(self.row_offset + section + 1)
         return QVariant()
     
-    def update_data(self, data, headers):
+    def update_data(self, data, headers, rowids=None):
         self.beginResetModel()
         self._data = data
         self._headers = headers
+        self._rowids = rowids if rowids is not None else []
+        self.fetch_more = None
+        self.changes = None
+        self._edits = {}
+        self._new_rows = {}
+        self._deleted_rows = set()
+        self.endResetModel()
+    
+    def value_at(self, row, col):
+        if self._edits and (row, col) in self._edits:
+            return self._edits[(row, col)]
+        return self._data[row][col]
+    
+    def rowid_at(self, row):
+        return self._rowids[row] if row < len(self._rowids) else None
+    
+    def set_editable(self, changes):
+        """Включить редактирование с записью изменений в ChangeSet"""
+        self.beginResetModel()
+        self.changes = changes
+        self._edits = {}
+        self._new_rows = {}
+        self._deleted_rows = set()
         self.endResetModel()
+    
+    def has_changes(self):
+        return self.changes is not None and not self.changes.is_empty()
+    
+    def set_values(self, items):
+        """Пакетная запись значений [(row, col, text)] с одним сигналом dataChanged"""
+        if self.changes is None:
+            return 0
+        
+        applied = 0
+        top, left, bottom, right = len(self._data), len(self._headers), -1, -1
+        for row, col, text in items:
+            if not (0 <= row < len(self._data) and 0 <= col < len(self._headers)):
+                continue
+            if row in self._deleted_rows or isinstance(self._data[row][col], BlobRef):
+                continue
+            
+            value = coerce_value(text, self._data[row][col])
+            self._edits[(row, col)] = value
+            if row in self._new_rows:
+                self.changes.inserts[self._new_rows[row]][self._headers[col]] = value
+            else:
+                self.changes.set_value(self._rowids[row], self._headers[col], value)
+            
+            applied += 1
+            top, left = min(top, row), min(left, col)
+            bottom, right = max(bottom, row), max(right, col)
+        
+        if applied:
+            self.dataChanged.emit(self.index(top, left), self.index(bottom, right))
+        return applied
+    
+    def insert_row(self):
+        if self.changes is None:
+            return -1
+        
+        row = len(self._data)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._data.append(tuple(None for _ in self._headers))
+        self._rowids.append(None)
+        self._new_rows[row] = self.changes.add_insert({})
+        self.endInsertRows()
+        return row
+    
+    def delete_rows(self, rows):
+        if self.changes is None:
+            return
+        
+        for row in rows:
+            if row in self._new_rows:
+                self.changes.cancel_insert(self._new_rows[row])
+            else:
+                self.changes.delete(self._rowids[row])
+            self._deleted_rows.add(row)
+        
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), 0),
+                                  self.index(max(rows), len(self._headers) - 1))
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return self.fetch_more is not None and not parent.isValid() and not self.has_changes()
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.fetch_more()
+    
+    def append_rows(self, data, rowids):
+        """Дописать строки в конец (хвост, следующее окно) без сброса модели"""
+        if not data:
+            return
+        first = len(self._data)
+        self.beginInsertRows(QModelIndex(), first, first + len(data) - 1)
+        self._data.extend(data)
+        self._rowids.extend(rowids)
+        self.endInsertRows()
+    
+    def trim_rows(self, count):
+        """Отбросить count первых строк; номера оставшихся строк не меняются"""
+        count = min(count, len(self._data))
+        if count <= 0:
+            return
+        self.beginRemoveRows(QModelIndex(), 0, count - 1)
+        del self._data[:count]
+        del self._rowids[:count]
+        self.row_offset += count
+        self.endRemoveRows()
+    
+    def discard_changes(self):
+        if self.changes is None:
+            return
+        
+        self.beginResetModel()
+        for row in sorted(self._new_rows, reverse=True):
+            del self._data[row]
+            del self._rowids[row]
+        self.changes.clear()
+        self._edits = {}
+        self._new_rows = {}
+        self._deleted_rows = set()
+        self.endResetModel()
+
+class PositionIndexWorker(QThread):
+    """Построение индекса позиций на отдельном соединении только для чтения"""
+    def __init__(self, db_path, index, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.index = index
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def run(self):
+        try:
+            connection = open_connection(self.db_path, 'readonly')
+            try:
+                with tracer.span("db.position_index", "db", table=self.index.table_name) as span:
+                    self.index.build(connection, lambda: self.cancelled)
+                    span.set(checkpoints=len(self.index.keys))
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            # Без индекса переходы работают через OFFSET, только медленнее
+            pass
+
+class SelectionSummaryWorker(QThread):
+    """Сводка по выделенным ячейкам вне потока интерфейса"""
+    done = pyqtSignal(object)
+    
+    def __init__(self, buffers, ranges, row_map=None, parent=None):
+        super().__init__(parent)
+        self.buffers = buffers
+        self.ranges = ranges
+        self.row_map = row_map
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def run(self):
+        with tracer.span("ui.selection_summary", "ui", ranges=len(self.ranges)):
+            summary = summarize(self.buffers, self.ranges, lambda: self.cancelled, self.row_map)
+        if summary is not None and not self.cancelled:
+            self.done.emit(summary)
 
 class TableViewer(QWidget):
+    # Текст сводки по выделению для статус бара (пустой - выделения нет)
+    summary_changed = pyqtSignal(str)
+    
     def __init__(self, icon_manager=None, parent=None):
         super().__init__(parent)
         self.icon_manager = icon_manager
@@ -51,6 +314,28 @@ class TableViewer(QWidget):
         self.current_limit = 1000
         self.current_table = None
         self.db_connection = None
+        self.schema = None
+        self.read_only = False
+        self.source_query = None
+        self.source_params = ()
+        self.position_index = None
+        self.index_worker = None
+        self.buffers = None
+        self.summary_worker = None
+        self.filters = []
+        self.filter_headers = []
+        # Ключи сортировки загруженных строк: [(колонка, по убыванию)]
+        self.sort_keys = []
+        # Данные в базе изменились после загрузки представления
+        self.stale = False
+        # Режим хвоста: чтение новых строк и скорость их поступления
+        self.tail_reader = None
+        self.tail_rate = None
+        # Окно строк, дочитываемое при прокрутке: открытый курсор результата без ключа
+        # (запрос, представление), сколько строк прочитано с начала окна и его предел
+        self.result_cursor = None
+        self.window_rows = 0
+        self.window_limit = None
         
         self.init_ui()
     
@@ -127,6 +412,51 @@ class TableViewer(QWidget):
         self.limit_combo.currentTextChanged.connect(self.change_limit)
         control_layout.addWidget(self.limit_combo)
         
+        # Случайная выборка вместо первых N строк
+        self.sample_btn = QPushButton("Выборка")
+        self.sample_btn.setCheckable(True)
+        self.sample_btn.setToolTip("Показать случайные строки таблицы (их число - значение лимита)")
+        self.sample_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 5px 10px;
+            }
+            QPushButton:hover, QPushButton:checked {
+                background-color: #252525;
+                border-color: #404040;
+            }
+        """)
+        self.sample_btn.toggled.connect(self.refresh_table)
+        control_layout.addWidget(self.sample_btn)
+        
+        self.seed_spin = QSpinBox()
+        self.seed_spin.setRange(0, 999999)
+        self.seed_spin.setValue(1)
+        self.seed_spin.setPrefix("зерно ")
+        self.seed_spin.setToolTip("Одно и то же зерно на тех же данных дает те же строки")
+        self.seed_spin.setStyleSheet("""
+            QSpinBox {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 4px;
+            }
+        """)
+        self.seed_spin.editingFinished.connect(self.refresh_sample)
+        control_layout.addWidget(self.seed_spin)
+        
+        # Последние строки таблицы с дописыванием новых
+        self.tail_btn = QPushButton("Хвост")
+        self.tail_btn.setCheckable(True)
+        self.tail_btn.setToolTip("Показывать последние строки и дописывать новые по мере поступления")
+        self.tail_btn.setStyleSheet(self.sample_btn.styleSheet())
+        self.tail_btn.toggled.connect(self.toggle_tail)
+        control_layout.addWidget(self.tail_btn)
+        
         # Кнопка обновления с иконкой
         self.refresh_btn = QPushButton()
         if self.icon_manager:
@@ -150,11 +480,132 @@ class TableViewer(QWidget):
         self.refresh_btn.clicked.connect(self.refresh_table)
         control_layout.addWidget(self.refresh_btn)
         
+        self.stats_btn = QPushButton("Статистика")
+        self.stats_btn.setCheckable(True)
+        self.stats_btn.setToolTip("Статистика колонок текущей таблицы")
+        self.stats_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 5px 10px;
+            }
+            QPushButton:hover, QPushButton:checked {
+                background-color: #252525;
+                border-color: #404040;
+            }
+        """)
+        self.stats_btn.toggled.connect(self.toggle_stats)
+        control_layout.addWidget(self.stats_btn)
+        
         # Информация о записях
         self.record_count_label = QLabel("0 записей")
         self.record_count_label.setStyleSheet("color: #808080; padding: 5px;")
         control_layout.addWidget(self.record_count_label)
         
+        # Панель редактирования (активна для таблиц с rowid или первичным ключом)
+        edit_layout = QHBoxLayout()
+        button_style = """
+            QPushButton {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 5px 10px;
+            }
+            QPushButton:hover {
+                background-color: #252525;
+                border-color: #404040;
+            }
+            QPushButton:disabled {
+                color: #505050;
+            }
+        """
+        
+        self.add_row_btn = QPushButton("Добавить строку")
+        self.add_row_btn.clicked.connect(self.add_row)
+        self.delete_rows_btn = QPushButton("Удалить строки")
+        self.delete_rows_btn.clicked.connect(self.delete_selected_rows)
+        self.save_btn = QPushButton("Сохранить")
+        self.save_btn.setShortcut("Ctrl+S")
+        self.save_btn.clicked.connect(self.save_changes)
+        self.discard_btn = QPushButton("Отменить изменения")
+        self.discard_btn.clicked.connect(self.discard_changes)
+        
+        for button in (self.add_row_btn, self.delete_rows_btn, self.save_btn, self.discard_btn):
+            button.setStyleSheet(button_style)
+            edit_layout.addWidget(button)
+        
+        self.changes_label = QLabel("")
+        self.changes_label.setStyleSheet("color: #ff4444; padding: 5px;")
+        edit_layout.addWidget(self.changes_label)
+        edit_layout.addStretch()
+        
+        # Переход к строке по номеру, rowid или первичному ключу
+        self.goto_mode = QComboBox()
+        self.goto_mode.addItem("Строка №", 'row')
+        self.goto_mode.addItem("rowid", 'rowid')
+        self.goto_mode.addItem("Ключ", 'key')
+        self.goto_mode.setStyleSheet(self.limit_combo.styleSheet())
+        edit_layout.addWidget(self.goto_mode)
+        
+        self.goto_input = QLineEdit()
+        self.goto_input.setPlaceholderText("Перейти... (Ctrl+G)")
+        self.goto_input.setToolTip("Составной ключ вводится через запятую")
+        self.goto_input.setStyleSheet("""
+            QLineEdit {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 5px 10px;
+                min-width: 150px;
+            }
+            QLineEdit:focus {
+                border-color: #505050;
+            }
+        """)
+        self.goto_input.returnPressed.connect(self.go_to)
+        edit_layout.addWidget(self.goto_input)
+        
+        goto_shortcut = QShortcut(QKeySequence("Ctrl+G"), self)
+        goto_shortcut.activated.connect(self.goto_input.setFocus)
+        
+        # Фильтры по колонкам загруженных данных
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Фильтр:"))
+        self.filter_column = QComboBox()
+        self.filter_column.setStyleSheet(self.limit_combo.styleSheet())
+        filter_layout.addWidget(self.filter_column)
+        
+        self.filter_operator = QComboBox()
+        for operator, label in OPERATORS:
+            self.filter_operator.addItem(label, operator)
+        self.filter_operator.setStyleSheet(self.limit_combo.styleSheet())
+        filter_layout.addWidget(self.filter_operator)
+        
+        self.filter_value = QLineEdit()
+        self.filter_value.setPlaceholderText("Значение (для «между» - два через запятую)")
+        self.filter_value.setStyleSheet(self.goto_input.styleSheet())
+        self.filter_value.returnPressed.connect(self.add_filter)
+        filter_layout.addWidget(self.filter_value)
+        
+        add_filter_btn = QPushButton("Добавить")
+        add_filter_btn.setStyleSheet(button_style)
+        add_filter_btn.clicked.connect(self.add_filter)
+        filter_layout.addWidget(add_filter_btn)
+        
+        clear_filters_btn = QPushButton("Сбросить")
+        clear_filters_btn.setStyleSheet(button_style)
+        clear_filters_btn.clicked.connect(self.clear_filters)
+        filter_layout.addWidget(clear_filters_btn)
+        
+        self.filters_label = QLabel("")
+        self.filters_label.setStyleSheet("color: #a0a0a0;")
+        filter_layout.addWidget(self.filters_label)
+        filter_layout.addStretch()
+        
         # Таблица
         self.table = QTableView()
         self.table.setStyleSheet("""
@@ -194,34 +645,370 @@ class TableViewer(QWidget):
         """)
         
         self.model = LargeTableModel()
-        self.table.setModel(self.model)
+        # Представление видит строки через отображение: фильтр не скрывает строки по одной
+        self.proxy = RowMapProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.table.setModel(self.proxy)
+        # Заголовок колонок подсвечивает выделенные колонки, проверяя каждую строку
+        # через flags(): на миллионе строк это секунды после каждого выделения.
+        # Своя пустая модель выделения отключает эту проверку.
+        self.table.horizontalHeader().setSelectionModel(QItemSelectionModel(self.proxy, self.table))
         self.table.setSortingEnabled(True)
+        # Без начальной сортировки: данные идут в порядке загрузки до щелчка по заголовку
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.proxy.sort_requested.connect(self.sort_rows)
         self.table.setAlternatingRowColors(True)
+        self.table.doubleClicked.connect(self.inspect_cell)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.EditKeyPressed |
+                                   QAbstractItemView.EditTrigger.AnyKeyPressed)
+        self.model.dataChanged.connect(self.update_edit_state)
+        self.model.rowsInserted.connect(self.update_edit_state)
+        self.model.modelReset.connect(self.update_edit_state)
+        
+        # Сводка по выделению: пересчет после паузы в изменении выделения
+        self.summary_timer = QTimer(self)
+        self.summary_timer.setSingleShot(True)
+        self.summary_timer.setInterval(150)
+        self.summary_timer.timeout.connect(self.start_summary)
+        
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.apply_filters)
+        
+        self.tail_timer = QTimer(self)
+        self.tail_timer.setInterval(TAIL_INTERVAL)
+        self.tail_timer.timeout.connect(self.poll_tail)
+        self.table.selectionModel().selectionChanged.connect(self.schedule_summary)
+        self.model.dataChanged.connect(self.invalidate_buffers)
+        self.model.rowsInserted.connect(self.invalidate_buffers)
+        self.model.rowsRemoved.connect(self.invalidate_buffers)
+        self.model.modelReset.connect(self.invalidate_buffers)
+        self.model.modelReset.connect(self.source_reset)
+        
+        paste_shortcut = QShortcut(QKeySequence.StandardKey.Paste, self.table)
+        paste_shortcut.setContext(Qt.ShortcutContext.WidgetShortcut)
+        paste_shortcut.activated.connect(self.paste_from_clipboard)
+        
+        self.stats_panel = ColumnStatsPanel()
+        self.stats_panel.hide()
+        
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.stats_panel)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
         
         layout.addLayout(control_layout)
-        layout.addWidget(self.table)
+        layout.addLayout(edit_layout)
+        layout.addLayout(filter_layout)
+        layout.addWidget(splitter)
         self.setLayout(layout)
+        self.update_edit_state()
     
     def set_connection(self, connection):
+        if connection is not self.db_connection:
+            # Данные, правки и запрос прежней базы к новому соединению не относятся
+            self.clear()
+        self.cancel_index_build()
+        self.position_index = None
         self.db_connection = connection
+        self.model.connection = connection
+        self.model.previews.clear()
+        self.stats_panel.set_connection(connection)
+    
+    def set_schema(self, schema):
+        self.schema = schema
+        self.model.schema = schema
+        self.stats_panel.set_schema(schema)
+    
+    def toggle_stats(self, visible):
+        self.stats_panel.setVisible(visible)
+        if visible and self.current_table:
+            self.stats_panel.set_table(self.current_table)
+            self.stats_panel.start()
+    
+    def show_query_result(self, query, data, columns, cursor=None):
+        """Показать результат запроса из вкладки SQL; cursor - открытый курсор с остатком строк"""
+        self.stop_tail()
+        self.release_cursor()
+        self.current_table = None
+        self.stats_panel.set_table(None)
+        self.source_query = query.rstrip().rstrip(';')
+        self.source_params = ()
+        self.current_data = data
+        self.current_headers = columns
+        self.model.row_offset = 0
+        self.model.update_data(data, columns)
+        budget.track(self.model, data)
+        self.window_rows = len(data)
+        self.window_limit = None
+        if cursor is not None:
+            self.result_cursor = cursor
+            self.model.fetch_more = self.fetch_next_window
+        self.table.resizeColumnsToContents()
+        self.stale = False
+    
+    def current_query(self):
+        """SQL текущего представления с условиями колонок, поиском и сортировкой: (sql, params, имя).
+        
+        Отбирает и упорядочивает строки так же, как прокси-модель, поэтому
+        экспорт совпадает с видимым в таблице.
+        """
+        if self.source_query is None:
+            return None
+        
+        name = self.current_table or "query"
+        text = self.search_input.text().strip()
+        columns = [quote_identifier(column) for column in self.filter_headers]
+        conditions = []
+        params = list(self.source_params)
+        for predicate in self.filters:
+            condition, values = predicate.sql(columns[predicate.column])
+            conditions.append(f"({condition})")
+            params.extend(values)
+        if text and columns:
+            condition, values = search_sql(columns, text)
+            conditions.append(f"({condition})")
+            params.extend(values)
+        if not conditions and not self.sort_keys:
+            return self.source_query, self.source_params, name
+        
+        sql = f"SELECT * FROM ({self.source_query})"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        if self.sort_keys:
+            sql += f" ORDER BY {sort_sql(columns, self.sort_keys)}"
+        return sql, tuple(params), name
+    
+    def invalidate_buffers(self, *args):
+        self.buffers = None
+        self.schedule_summary()
+    
+    def schedule_summary(self, *args):
+        if self.summary_worker:
+            self.summary_worker.cancel()
+        self.summary_timer.start()
+    
+    def start_summary(self):
+        """Посчитать сводку по выделению в фоне; прежний расчет отменяется"""
+        if self.summary_worker:
+            self.summary_worker.cancel()
+            self.summary_worker = None
+        # Диапазоны выделения, а не отдельные индексы: колонка из миллиона ячеек - один диапазон
+        ranges = [(block.top(), block.bottom(), block.left(), block.right())
+                  for block in self.table.selectionModel().selection()]
+        if not ranges or sum((b - t + 1) * (r - l + 1) for t, b, l, r in ranges) < 2:
+            self.summary_changed.emit("")
+            return
+        if self.buffers is None:
+            self.buffers = ColumnBuffers(self.model._data, self.model._edits)
+        
+        self.summary_worker = SelectionSummaryWorker(self.buffers, ranges, self.proxy.row_map, self)
+        worker = self.summary_worker
+        worker.done.connect(lambda summary: self.show_summary(worker, summary))
+        worker.finished.connect(worker.deleteLater)
+        worker.start()
+    
+    def show_summary(self, worker, summary):
+        if worker is not self.summary_worker:
+            return
+        self.summary_worker = None
+        self.summary_changed.emit(summary_text(summary))
+    
+    def set_read_only(self, read_only):
+        self.read_only = read_only
+    
+    def update_edit_state(self, *args):
+        editable = self.model.changes is not None
+        dirty = self.model.has_changes()
+        self.add_row_btn.setEnabled(editable)
+        self.delete_rows_btn.setEnabled(editable)
+        self.save_btn.setEnabled(dirty)
+        self.discard_btn.setEnabled(dirty)
+        self.changes_label.setText(f"Несохраненных изменений: {self.model.changes.count()}" if dirty else "")
+    
+    def setup_editing(self, table_name, columns, rowids):
+        """Включить редактирование, если строки таблицы можно адресовать по ключу"""
+        if self.read_only or not self.schema:
+            return
+        if rowids is not None:
+            self.model.set_editable(ChangeSet(table_name, columns, [self.schema.rowid_alias(table_name)]))
+        elif self.schema.primary_key(table_name) and table_name in self.schema.tables:
+            self.model.set_editable(ChangeSet(table_name, columns, self.schema.primary_key(table_name)))
+    
+    def confirm_discard(self):
+        """Спросить о несохраненных изменениях: сохранить, отбросить или отменить действие.
+        
+        False - действие отменено. При отказе от изменений модель возвращается
+        к прочитанным данным, даже если действие их не перезагружает.
+        """
+        if not self.model.has_changes():
+            return True
+        
+        answer = QMessageBox.question(
+            self, "Несохраненные изменения",
+            f"Сохранить изменения в таблице {self.current_table}?",
+            QMessageBox.StandardButton.Save | QMessageBox.StandardButton.Discard |
+            QMessageBox.StandardButton.Cancel)
+        if answer == QMessageBox.StandardButton.Save:
+            return self.save_changes()
+        if answer == QMessageBox.StandardButton.Discard:
+            self.discard_changes()
+            return True
+        return False
+    
+    def add_row(self):
+        row = self.model.insert_row()
+        if row >= 0:
+            self.table.scrollToBottom()
+            self.table.setCurrentIndex(self.proxy.mapFromSource(self.model.index(row, 0)))
+    
+    def delete_selected_rows(self):
+        rows = sorted({self.proxy.source_row(index.row())
+                       for index in self.table.selectionModel().selectedIndexes()})
+        self.model.delete_rows(rows)
+    
+    def paste_from_clipboard(self):
+        """Вставка блока ячеек из таблицы (значения через табуляцию)"""
+        current = self.table.currentIndex()
+        if self.model.changes is None or not current.isValid():
+            return
+        
+        text = QApplication.clipboard().text()
+        if not text:
+            return
+        
+        items = []
+        for row_offset, line in enumerate(text.rstrip("\r\n").split("\n")):
+            row = current.row() + row_offset
+            if row >= self.proxy.rowCount():
+                break
+            # Блок ложится на видимые строки, при фильтре - на их исходные номера
+            source_row = self.proxy.source_row(row)
+            for col_offset, value in enumerate(line.rstrip("\r").split("\t")):
+                items.append((source_row, current.column() + col_offset, value))
+        
+        with tracer.span("ui.paste_cells", "ui", rows=len(items)):
+            self.model.set_values(items)
+    
+    @traced("ui.save_changes", "ui")
+    def save_changes(self):
+        if not self.model.has_changes():
+            return True
+        
+        success, msg = self.model.changes.apply(self.db_connection)
+        if not success:
+            QMessageBox.critical(self, "Ошибка", msg)
+            return False
+        
+        self.load_table_data(self.current_table)
+        self.record_count_label.setText(msg)
+        return True
+    
+    def discard_changes(self):
+        self.model.discard_changes()
+    
+    def inspect_cell(self, index):
+        index = self.proxy.mapToSource(index)
+        value = self.model.value_at(index.row(), index.column())
+        if isinstance(value, (BlobRef, bytes)) or (isinstance(value, str) and len(value) > 200):
+            dialog = BlobInspectorDialog(value, self.db_connection, self)
+            dialog.exec()
     
     def filter_table(self, text):
-        if not self.current_data:
+        # Фильтр запускается после паузы в наборе, а не на каждую букву
+        self.search_timer.start()
+    
+    def add_filter(self):
+        column = self.filter_column.currentIndex()
+        if column < 0:
             return
+        try:
+            predicate = ColumnPredicate(column, self.filter_column.currentText(),
+                                        self.filter_operator.currentData(), self.filter_value.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Фильтр", str(e))
+            return
+        self.filters.append(predicate)
+        self.filter_value.clear()
+        self.apply_filters()
+    
+    def clear_filters(self):
+        self.filters = []
+        self.sort_keys = []
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.apply_filters()
+    
+    def sort_rows(self, column, order):
+        """Сортировка по щелчку на заголовке; с Shift колонка добавляется к ключам"""
+        descending = order == Qt.SortOrder.DescendingOrder
+        if column < 0:
+            self.sort_keys = []
+        elif QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier and self.sort_keys:
+            columns = [key[0] for key in self.sort_keys]
+            if column in columns:
+                self.sort_keys[columns.index(column)] = (column, descending)
+            else:
+                self.sort_keys.append((column, descending))
+        else:
+            self.sort_keys = [(column, descending)]
+        self.apply_filters()
+    
+    def source_reset(self):
+        """Новые данные: фильтры сохраняются, если набор колонок тот же"""
+        headers = list(self.model._headers)
+        if headers != self.filter_headers:
+            self.filter_headers = headers
+            self.filters = []
+            if self.sort_keys:
+                self.sort_keys = []
+                self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+            self.filter_column.clear()
+            self.filter_column.addItems([str(header) for header in headers])
+            self.filters_label.setText("")
+        if self.filters or self.sort_keys or self.search_input.text().strip():
+            self.apply_filters()
+    
+    @traced("ui.filter_table", "ui")
+    def apply_filters(self):
+        """Отобрать и упорядочить строки по условиям колонок, строке поиска и ключам сортировки.
         
-        for row in range(self.model.rowCount()):
-            show_row = False
-            for col in range(self.model.columnCount()):
-                index = self.model.index(row, col)
-                value = str(self.model.data(index))
-                if text.lower() in value.lower():
-                    show_row = True
-                    break
-            self.table.setRowHidden(row, not show_row)
+        Условия проверяются векторно по колонкам numpy, сортировка дает
+        перестановку номеров строк; прокси-модель показывает результат без
+        скрытия строк и без копирования данных.
+        """
+        search = self.search_input.text().strip()
+        names = self.filter_headers
+        description = [predicate.describe() for predicate in self.filters]
+        if self.sort_keys:
+            description.append("сортировка: " + ", ".join(
+                f"{names[column]} {'↓' if descending else '↑'}" for column, descending in self.sort_keys))
+        self.filters_label.setText("  ·  ".join(description))
+        total = self.model.rowCount()
+        if not self.filters and not search and not self.sort_keys:
+            if self.proxy.row_map is not None:
+                self.proxy.set_row_map(None)
+                self.record_count_label.setText(f"Показано: {total} из {total}")
+            return
         
-        visible_count = sum(1 for row in range(self.model.rowCount()) 
-                           if not self.table.isRowHidden(row))
-        self.record_count_label.setText(f"Показано: {visible_count} из {len(self.current_data)}")
+        if self.buffers is None:
+            self.buffers = ColumnBuffers(self.model._data, self.model._edits)
+        mask = None
+        if self.filters or search:
+            mask = filter_mask(self.buffers, total, self.filters, search, self.model.columnCount())
+        if self.sort_keys:
+            with tracer.span("ui.sort_rows", "ui", keys=len(self.sort_keys)):
+                rows = sort_permutation(self.buffers, self.sort_keys)
+            if mask is not None:
+                rows = rows[mask[rows]]
+        else:
+            rows = np.flatnonzero(mask)
+        filtered = self.proxy.row_map is not None and len(self.proxy.row_map) != total
+        self.proxy.set_row_map(rows)
+        tracer.annotate(rows=len(rows))
+        if mask is not None or filtered:
+            self.record_count_label.setText(f"Показано: {len(rows)} из {total}")
     
     def change_limit(self, limit_text):
         if limit_text == "Все":
@@ -230,41 +1017,493 @@ class TableViewer(QWidget):
             self.current_limit = int(limit_text)
     
     def refresh_table(self):
-        if self.current_table and self.db_connection:
-            self.load_table_data(self.current_table)
+        self.refresh_view()
+    
+    def refresh_view(self, total_count=None, automatic=False):
+        """Перечитать видимое окно строк, сохранив позицию прокрутки.
+        
+        При автоматическом обновлении несохраненные изменения и результаты
+        SQL запросов не трогаются - они только помечаются как устаревшие.
+        В режиме хвоста новые строки дочитываются без перезагрузки.
+        """
+        if self.tail_reader and not self.sample_btn.isChecked():
+            if not automatic:
+                self.poll_tail()
+            return
+        if not self.current_table or not self.db_connection:
+            if automatic and self.source_query:
+                self.mark_stale()
+            return
+        if automatic and self.model.has_changes():
+            self.mark_stale()
+            return
+        
+        start_key = None
+        offset = 0
+        if self.model.row_offset and self.current_data and not self.sample_btn.isChecked():
+            # Окно после перехода перечитывается с той же первой строки
+            key = self.model.rowid_at(0)
+            start_key = key if isinstance(key, tuple) else (key,)
+            offset = self.model.row_offset
+        scroll = self.table.verticalScrollBar().value()
+        self.load_table_data(self.current_table, start_key, offset, total_count)
+        self.table.verticalScrollBar().setValue(scroll)
     
-    def load_table_data(self, table_name):
+    def mark_stale(self):
+        if self.stale or self.source_query is None:
+            return
+        self.stale = True
+        self.record_count_label.setText(self.record_count_label.text() + " · данные изменились")
+    
+    def toggle_tail(self, enabled):
+        if enabled:
+            self.start_tail()
+        else:
+            self.stop_tail()
+    
+    def set_tail_checked(self, checked):
+        self.tail_btn.blockSignals(True)
+        self.tail_btn.setChecked(checked)
+        self.tail_btn.blockSignals(False)
+    
+    @traced("ui.start_tail", "ui")
+    def start_tail(self):
+        """Показать последние строки таблицы и дописывать новые по таймеру.
+        
+        Модель не перезагружается: новые строки добавляются в конец через
+        beginInsertRows, самые старые отбрасываются сверх TAIL_CAPACITY.
+        """
+        table_name = self.current_table
+        if not table_name or not self.schema or not self.schema.has_rowid(table_name) \
+                or table_name not in self.schema.tables:
+            QMessageBox.warning(self, "Хвост", "Режим хвоста доступен только для таблиц с rowid")
+            self.set_tail_checked(False)
+            return
+        if not self.confirm_discard():
+            self.set_tail_checked(False)
+            return
+        if self.sample_btn.isChecked():
+            self.sample_btn.blockSignals(True)
+            self.sample_btn.setChecked(False)
+            self.sample_btn.blockSignals(False)
+        
+        reader = TailReader(self.schema, table_name)
+        try:
+            rowids, data = reader.start(self.db_connection, self.current_limit or 1000)
+            total_count = self.schema.row_count(table_name)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Ошибка", f"Ошибка чтения таблицы: {e}")
+            self.set_tail_checked(False)
+            return
+        
+        # Фильтры и сортировка не применяются к дописываемым строкам
+        self.filters = []
+        self.sort_keys = []
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.filters_label.setText("")
+        self.search_input.clear()
+        
+        self.source_query = f"SELECT * FROM {quote_identifier(table_name)}"
+        self.source_params = ()
+        self.current_data = data
+        self.current_headers = reader.columns
+        self.model.row_offset = max(total_count - len(data), 0)
+        self.model.update_data(data, reader.columns, rowids)
+        budget.track(self.model, data)
+        self.table.resizeColumnsToContents()
+        self.table.scrollToBottom()
+        self.stale = False
+        
+        self.tail_reader = reader
+        self.tail_rate = IngestRate()
+        self.set_tail_checked(True)
+        self.tail_timer.start()
+        self.show_tail_status()
+    
+    def stop_tail(self):
+        if self.tail_reader is None:
+            return
+        self.tail_timer.stop()
+        self.tail_reader = None
+        self.tail_rate = None
+        self.set_tail_checked(False)
+    
+    def poll_tail(self):
+        """Дочитать строки с rowid больше последнего и дописать их в модель"""
+        if not self.tail_reader or not self.db_connection:
+            return
+        try:
+            with tracer.span("db.tail_fetch", "db", table=self.tail_reader.table_name) as span:
+                rowids, data = self.tail_reader.fetch(self.db_connection)
+                span.set(rows=len(data))
+        except sqlite3.Error as e:
+            self.stop_tail()
+            self.record_count_label.setText(f"Хвост остановлен: {e}")
+            return
+        
+        self.tail_rate.add(len(data))
+        if data:
+            # Прокручиваем за новыми строками, только если внизу видна последняя строка
+            last_visible = self.table.rowAt(self.table.viewport().height() - 1)
+            anchored = last_visible < 0 or last_visible >= self.proxy.rowCount() - 3
+            with tracer.span("ui.tail_append", "ui", rows=len(data)):
+                self.model.append_rows(data, rowids)
+                budget.track(self.model, self.current_data)
+                excess = max(self.model.rowCount() - TAIL_CAPACITY, budget.overflow_rows(self.model))
+                if excess > 0:
+                    self.model.trim_rows(excess)
+                    budget.track(self.model, self.current_data)
+            if anchored:
+                self.table.scrollToBottom()
+        self.show_tail_status()
+    
+    def show_tail_status(self):
+        first = self.model.row_offset
+        rate = format_number(round(self.tail_rate.rate()))
+        self.record_count_label.setText(
+            f"Хвост: строки {first + 1}–{first + self.model.rowCount()} · {rate} строк/с")
+    
+    def refresh_sample(self):
+        if self.sample_btn.isChecked():
+            self.refresh_table()
+    
+    @traced("ui.load_table_data", "ui")
+    def load_table_data(self, table_name, start_key=None, offset=0, total_count=None, confirmed=False):
+        """Загрузить таблицу; start_key - ключ первой строки окна после перехода, offset - ее номер.
+        
+        total_count - уже известное количество строк (без COUNT(*)); confirmed -
+        о несохраненных изменениях уже спросили в вызывающем действии.
+        """
+        if not confirmed and not self.confirm_discard():
+            return
+        self.stop_tail()
+        self.release_cursor()
         self.current_table = table_name
+        table = quote_identifier(table_name)
+        self.source_query = f"SELECT * FROM {table}"
+        self.source_params = ()
+        sample = self.sample_btn.isChecked() and start_key is None
+        # Строки таблицы идут в порядке ключа - по нему же дочитываются следующие окна
+        key = key_columns(self.schema, table_name) if self.schema else []
+        where = key_condition(key, ">=") if start_key is not None else None
+        limit = self.current_limit or (1000 if start_key is not None else None)
         
         cursor = self.db_connection.cursor()
         
         # Получаем общее количество записей
-        cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
-        total_count = cursor.fetchone()[0]
-        
-        # Загружаем данные с лимитом
-        if self.current_limit:
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT {self.current_limit};")
+        if total_count is not None:
+            pass
+        elif self.schema:
+            total_count = self.schema.row_count(table_name)
         else:
-            cursor.execute(f"SELECT * FROM {table_name};")
+            cursor.execute(f"SELECT COUNT(*) FROM {quote_identifier(table_name)};")
+            total_count = cursor.fetchone()[0]
         
-        data = cursor.fetchall()
-        columns = [description[0] for description in cursor.description]
+        rowids = None
+        # Строки читаются, пока помещаются в бюджет памяти; остальные - окнами при прокрутке
+        truncated = False
+        with tracer.span("db.fetch_rows", "db", table=table_name) as span:
+            if sample:
+                rowids, data, columns = self.load_sample(table_name, total_count)
+            elif self.schema and self.schema.has_rowid(table_name):
+                # BLOB и длинные строки приходят как размер, без самих данных
+                sql, columns, wrapped = build_table_select(self.schema, table_name, limit, where=where,
+                                                           order_by=key_list(key))
+                cursor.execute(sql, start_key or ())
+                raw_rows, truncated = budget.fetch(cursor, self.model)
+                rowids, data = materialize_rows(table_name, columns, wrapped, raw_rows)
+            elif key:
+                # Таблица WITHOUT ROWID в порядке первичного ключа, после перехода - начиная с ключа
+                sql = f"SELECT * FROM {table}"
+                if where:
+                    sql += f" WHERE {where}"
+                sql += f" ORDER BY {key_list(key)}"
+                if limit:
+                    sql += f" LIMIT {limit}"
+                cursor.execute(sql, start_key or ())
+                data, truncated = budget.fetch(cursor, self.model)
+                columns = [description[0] for description in cursor.description]
+            else:
+                # Представление: ключа нет, остаток дочитывается из того же курсора
+                source = RowCursor(cursor.execute(f"SELECT * FROM {table}" + (f" LIMIT {limit}" if limit else "")))
+                data, truncated = budget.fetch(source, self.model)
+                columns = [description[0] for description in cursor.description]
+                if truncated:
+                    self.result_cursor = source
+            span.set(rows=len(data))
         
         self.current_data = data
         self.current_headers = columns
-        self.model.update_data(data, columns)
+        self.model.row_offset = offset
+        if rowids is None and self.schema and self.schema.primary_key(table_name):
+            # Для WITHOUT ROWID ключом строки служат значения первичного ключа
+            key_indexes = [columns.index(name) for name in self.schema.primary_key(table_name)]
+            keys = [tuple(row[i] for i in key_indexes) for row in data]
+            self.model.update_data(data, columns, keys)
+            self.setup_editing(table_name, columns, None)
+        else:
+            self.model.update_data(data, columns, rowids)
+            self.setup_editing(table_name, columns, rowids)
+        budget.track(self.model, data)
+        self.window_rows = len(data)
+        self.window_limit = limit
+        if truncated:
+            self.model.fetch_more = self.fetch_next_window
         
-        self.table.resizeColumnsToContents()
+        with tracer.span("ui.resize_columns", "ui"):
+            self.table.resizeColumnsToContents()
+        tracer.annotate(rows=len(data), table=table_name)
         
-        if self.current_limit and total_count > self.current_limit:
+        if sample:
+            self.record_count_label.setText(f"Случайные {len(data)} из {total_count}")
+        elif truncated:
+            self.show_window_status(total_count)
+        elif offset or start_key is not None:
+            self.record_count_label.setText(f"Строки {offset + 1}–{offset + len(data)} из {total_count}")
+        elif self.current_limit and total_count > self.current_limit:
             self.record_count_label.setText(f"Показано {len(data)} из {total_count}")
         else:
             self.record_count_label.setText(f"Всего записей: {len(data)}")
+        self.stale = False
+        
+        if not sample and total_count > len(data):
+            self.build_position_index(table_name)
+        
+        if self.stats_panel.table_name != table_name:
+            self.stats_panel.set_table(table_name)
+        if self.stats_panel.isVisible():
+            self.stats_panel.start()
+    
+    @traced("ui.fetch_next_window", "ui")
+    def fetch_next_window(self):
+        """Дочитать строки после последней загруженной, отбросив первые сверх бюджета памяти.
+        
+        Таблицы читаются по ключу (rowid или первичный ключ больше последнего),
+        результаты запросов и представления - из их открытого курсора.
+        Чтение останавливается на лимите строк окна.
+        """
+        if self.tail_reader or self.proxy.row_map is not None or not self.db_connection:
+            return
+        table_name = self.current_table
+        count = self.model.rowCount()
+        columns = key_columns(self.schema, table_name) if table_name and self.schema else []
+        size = FETCH_BATCH
+        if self.window_limit is not None:
+            size = min(size, self.window_limit - self.window_rows)
+        try:
+            with tracer.span("db.fetch_window", "db", table=table_name or "query") as span:
+                if size <= 0:
+                    data = []
+                elif columns and count:
+                    key = self.model.rowid_at(count - 1)
+                    params = key if isinstance(key, tuple) else (key,)
+                    where = key_condition(columns, ">")
+                    if self.schema.has_rowid(table_name):
+                        sql, names, wrapped = build_table_select(self.schema, table_name, size,
+                                                                 where=where, order_by=key_list(columns))
+                        rowids, data = materialize_rows(table_name, names, wrapped,
+                                                        self.db_connection.execute(sql, params).fetchall())
+                    else:
+                        data = self.db_connection.execute(
+                            f"SELECT * FROM {quote_identifier(table_name)} WHERE {where} "
+                            f"ORDER BY {key_list(columns)} LIMIT {size}", params).fetchall()
+                        key_indexes = [self.current_headers.index(name) for name in columns]
+                        rowids = [tuple(row[i] for i in key_indexes) for row in data]
+                elif self.result_cursor is not None:
+                    data = self.result_cursor.fetchmany(size)
+                    rowids = []
+                else:
+                    data = []
+                span.set(rows=len(data))
+        except sqlite3.Error as e:
+            self.model.fetch_more = None
+            self.release_cursor()
+            self.record_count_label.setText(f"Ошибка чтения следующих строк: {e}")
+            return
+        
+        self.window_rows += len(data)
+        if size <= 0 or len(data) < size:
+            self.model.fetch_more = None
+            self.release_cursor()
+        if not data:
+            self.show_window_status(self.schema.row_count(table_name) if table_name and self.schema else None)
+            return
+        self.model.append_rows(data, rowids)
+        budget.track(self.model, self.current_data)
+        excess = budget.overflow_rows(self.model)
+        if excess:
+            # Строки выше окна уходят - прокрутка сдвигается, чтобы видимые строки остались на месте
+            bar = self.table.verticalScrollBar()
+            position = bar.value()
+            self.model.trim_rows(excess)
+            budget.track(self.model, self.current_data)
+            bar.setValue(max(position - excess, 0))
+        self.show_window_status(self.schema.row_count(table_name) if table_name and self.schema else None)
+    
+    def release_cursor(self):
+        """Закрыть открытый курсор результата: незавершенный оператор чтения мешает DDL и VACUUM"""
+        if self.result_cursor is None:
+            return
+        self.result_cursor.close()
+        self.result_cursor = None
+        if self.model.fetch_more:
+            self.model.fetch_more = None
+            self.show_window_status()
+    
+    def show_window_status(self, total_count=None):
+        first = self.model.row_offset
+        text = f"Строки {first + 1}–{first + self.model.rowCount()}"
+        if total_count is not None:
+            text += f" из {total_count}"
+        if self.model.fetch_more:
+            text += " · лимит памяти, следующие строки читаются при прокрутке"
+        self.record_count_label.setText(text)
+    
+    def position_index_for(self, table_name):
+        """Индекс позиций таблицы: готовый из кэша или пустой (переходы через OFFSET)"""
+        index = self.position_index
+        if index and index.table_name == table_name and index.data_key == self.schema.data_key():
+            return index
+        index = PositionIndex(table_name, key_columns(self.schema, table_name))
+        index.data_key = self.schema.data_key()
+        return index
+    
+    def build_position_index(self, table_name):
+        """Построить индекс позиций в фоне, если его еще нет"""
+        if not self.schema or not key_columns(self.schema, table_name):
+            return
+        index = self.position_index_for(table_name)
+        if index.complete or self.index_worker:
+            return
+        db_path = self.db_connection.execute("PRAGMA database_list").fetchone()[2]
+        if not db_path:
+            # Базу в памяти другое соединение не видит - обходимся переходами через OFFSET
+            return
+        self.index_worker = PositionIndexWorker(db_path, index, self)
+        worker = self.index_worker
+        worker.finished.connect(lambda: self.index_built(worker))
+        worker.start()
+    
+    def index_built(self, worker):
+        if worker is not self.index_worker:
+            return
+        self.index_worker = None
+        # Пока строился индекс, данные могли измениться - тогда он не нужен
+        if worker.index.complete and self.schema and worker.index.data_key == self.schema.data_key():
+            self.position_index = worker.index
+    
+    def cancel_index_build(self):
+        if self.index_worker:
+            self.index_worker.cancel()
+            self.index_worker.wait()
+            self.index_built(self.index_worker)
+    
+    def go_to(self):
+        """Перейти к строке по номеру, rowid или первичному ключу"""
+        text = self.goto_input.text().strip()
+        if not text or not self.current_table or not self.schema:
+            return
+        if not self.confirm_discard():
+            return
+        table_name = self.current_table
+        mode = self.goto_mode.currentData()
+        columns = key_columns(self.schema, table_name)
+        if not columns:
+            QMessageBox.warning(self, "Переход", "У представления нет ключа строк, переход недоступен")
+            return
+        if self.sample_btn.isChecked():
+            self.sample_btn.blockSignals(True)
+            self.sample_btn.setChecked(False)
+            self.sample_btn.blockSignals(False)
+        
+        index = self.position_index_for(table_name)
+        total_count = self.schema.row_count(table_name)
+        exact = True
+        try:
+            with tracer.span("db.goto", "db", table=table_name, mode=mode):
+                if mode == 'row':
+                    if not text.isdigit():
+                        raise ValueError("Номер строки должен быть целым числом")
+                    position = int(text) - 1
+                    if not 0 <= position < total_count:
+                        raise ValueError(f"Номер строки должен быть от 1 до {total_count}")
+                    key = index.locate(self.db_connection, position)
+                else:
+                    key, exact = seek(self.db_connection, self.schema, table_name, mode, text)
+                    if key is None:
+                        raise ValueError("Строка не найдена")
+                    position = index.position_of(self.db_connection, key)
+        except (ValueError, sqlite3.Error) as e:
+            QMessageBox.warning(self, "Переход", str(e))
+            return
+        if key is None:
+            return
+        
+        if self.model.row_offset == 0 and len(self.current_data) >= total_count:
+            # Таблица загружена целиком - достаточно выделить строку
+            start = 0
+        else:
+            size = self.current_limit or 1000
+            start = max(0, position - min(size // 2, 50))
+            start_key = key if start == position else index.locate(self.db_connection, start)
+            self.load_table_data(table_name, start_key, start, confirmed=True)
+        
+        index = self.proxy.mapFromSource(self.model.index(position - start, 0))
+        if not index.isValid():
+            # Строка скрыта фильтром - показываем все строки
+            self.filters = []
+            self.search_input.clear()
+            self.apply_filters()
+            index = self.proxy.mapFromSource(self.model.index(position - start, 0))
+        self.table.selectRow(index.row())
+        self.table.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        if not exact:
+            self.record_count_label.setText(self.record_count_label.text() + " · точного совпадения нет, показана следующая строка")
+    
+    def load_sample(self, table_name, total_count):
+        """Случайные строки таблицы: (rowids, data, columns).
+        
+        source_query указывает ровно на выбранные строки, поэтому поиск и
+        экспорт текущего представления работают с выборкой.
+        """
+        size = self.current_limit or 1000
+        seed = self.seed_spin.value()
+        table = quote_identifier(table_name)
+        cursor = self.db_connection.cursor()
+        
+        if self.schema and self.schema.has_rowid(table_name):
+            rowid = self.schema.rowid_alias(table_name)
+            chosen = sample_rowids(self.db_connection, table_name, size, seed, total_count, rowid)
+            where, params = rowid_filter(chosen, rowid)
+            sql, columns, wrapped = build_table_select(self.schema, table_name, where=where)
+            cursor.execute(sql, params)
+            rowids, data = materialize_rows(table_name, columns, wrapped, cursor.fetchall())
+            self.source_query = f"SELECT * FROM {table} WHERE {where}"
+            self.source_params = params
+            return rowids, data, columns
+        
+        columns, data = sample_rows(self.db_connection, f"SELECT * FROM {table}", size, seed)
+        primary_key = self.schema.primary_key(table_name) if self.schema else []
+        if primary_key:
+            key_indexes = [columns.index(name) for name in primary_key]
+            where, params = key_filter(primary_key, [tuple(row[i] for i in key_indexes) for row in data])
+            self.source_query = f"SELECT * FROM {table} WHERE {where}"
+            self.source_params = params
+        else:
+            # Выборку из представления нечем адресовать повторно
+            self.source_query = None
+        return None, data, columns
     
     def clear(self):
+        self.stop_tail()
+        self.release_cursor()
         self.current_data = []
         self.current_headers = []
         self.current_table = None
+        self.model.row_offset = 0
+        self.source_query = None
+        self.source_params = ()
+        self.stats_panel.set_table(None)
         self.model.update_data([], [])
+        budget.release(self.model)
         self.record_count_label.setText("0 записей")
\ No newline at end of file
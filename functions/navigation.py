@@ -0,0 +1,128 @@
+from bisect import bisect_right
+
+try:
+    from .schema import quote_identifier
+    from .editing import coerce_value
+except ImportError:
+    from schema import quote_identifier
+    from editing import coerce_value
+
+CHECKPOINT_STEP = 10000
+
+def key_columns(schema, table_name):
+    """Ключ порядка строк: rowid или первичный ключ таблицы WITHOUT ROWID"""
+    if schema.has_rowid(table_name):
+        return [schema.rowid_alias(table_name)]
+    return schema.primary_key(table_name)
+
+def key_names(columns):
+    # Псевдоним rowid в кавычках по-прежнему означает rowid, если колонки с таким именем нет
+    return [quote_identifier(column) for column in columns]
+
+def key_list(columns):
+    return ", ".join(key_names(columns))
+
+def key_condition(columns, operator):
+    """Сравнение ключа строки с параметрами: rowid >= ? или (a, b) >= (?, ?)"""
+    marks = ", ".join("?" for _ in columns)
+    if len(columns) == 1:
+        return f"{key_list(columns)} {operator} ?"
+    return f"({key_list(columns)}) {operator} ({marks})"
+
+class PositionIndex:
+    """Разреженный индекс позиция -> ключ: ключ каждой CHECKPOINT_STEP-й строки.
+    
+    Строится проходом LIMIT 1 OFFSET step от предыдущей контрольной точки:
+    пропуск строк выполняется внутри SQLite, в Python приходит только
+    одна строка на шаг. С готовым индексом переход к позиции - поиск по
+    B-дереву и пропуск не более step строк.
+    """
+    def __init__(self, table_name, columns, step=CHECKPOINT_STEP):
+        self.table_name = table_name
+        self.columns = columns
+        self.step = step
+        self.keys = []
+        self.complete = False
+        self.data_key = None
+    
+    def _select(self, where="", offset=0):
+        keys = key_list(self.columns)
+        sql = f"SELECT {keys} FROM {quote_identifier(self.table_name)}"
+        if where:
+            sql += f" WHERE {where}"
+        return sql + f" ORDER BY {keys} LIMIT 1 OFFSET {int(offset)}"
+    
+    def build(self, connection, cancelled=None):
+        keys = []
+        row = connection.execute(self._select()).fetchone()
+        next_sql = self._select(key_condition(self.columns, ">="), offset=self.step)
+        while row is not None:
+            keys.append(tuple(row))
+            if cancelled and cancelled():
+                return False
+            row = connection.execute(next_sql, row).fetchone()
+        self.keys = keys
+        self.complete = True
+        return True
+    
+    def locate(self, connection, position):
+        """Ключ строки с номером position (с нуля) или None"""
+        if self.complete:
+            checkpoint = position // self.step
+            if checkpoint >= len(self.keys):
+                return None
+            sql = self._select(key_condition(self.columns, ">="), offset=position - checkpoint * self.step)
+            row = connection.execute(sql, self.keys[checkpoint]).fetchone()
+        else:
+            row = connection.execute(self._select(offset=position)).fetchone()
+        return tuple(row) if row else None
+    
+    def position_of(self, connection, key):
+        """Номер строки с ключом key"""
+        table = quote_identifier(self.table_name)
+        start = 0
+        if self.complete and self.keys:
+            try:
+                start = max(bisect_right(self.keys, tuple(key)) - 1, 0)
+            except TypeError:
+                # Ключи разных типов Python не сравнивает - считаем от начала
+                start = 0
+        if start:
+            sql = (f"SELECT COUNT(*) FROM {table} WHERE {key_condition(self.columns, '>=')} "
+                   f"AND {key_condition(self.columns, '<')}")
+            count = connection.execute(sql, tuple(self.keys[start]) + tuple(key)).fetchone()[0]
+            return start * self.step + count
+        sql = f"SELECT COUNT(*) FROM {table} WHERE {key_condition(self.columns, '<')}"
+        return connection.execute(sql, tuple(key)).fetchone()[0]
+
+def seek(connection, schema, table_name, mode, text):
+    """Найти строку по rowid или значению первичного ключа.
+    
+    Возвращает (ключ строки, точное совпадение) или (None, False).
+    Если точного совпадения нет, берется следующая по порядку строка.
+    """
+    table = quote_identifier(table_name)
+    columns = key_columns(schema, table_name)
+    if mode == 'rowid':
+        if not schema.has_rowid(table_name):
+            raise ValueError("У таблицы нет доступного rowid")
+        lookup = [schema.rowid_alias(table_name)]
+        if not text.lstrip("-").isdigit():
+            raise ValueError("rowid должен быть целым числом")
+        values = [int(text)]
+    else:
+        lookup = schema.primary_key(table_name) or columns
+        parts = [part.strip() for part in text.split(",")]
+        if len(parts) != len(lookup):
+            raise ValueError(f"Ожидается значений ключа: {len(lookup)} ({', '.join(lookup)})")
+        values = [coerce_value(part) for part in parts]
+    
+    select = key_list(columns)
+    row = connection.execute(f"SELECT {select} FROM {table} WHERE {key_condition(lookup, '=')}",
+                             values).fetchone()
+    if row:
+        return tuple(row), True
+    order_by = key_list(lookup)
+    row = connection.execute(f"SELECT {select} FROM {table} WHERE {key_condition(lookup, '>=')} "
+                             f"ORDER BY {order_by} LIMIT 1", values).fetchone()
+    return (tuple(row), False) if row else (None, False)
\ No newline at end of file
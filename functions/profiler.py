@@ -0,0 +1,286 @@
+import math
+import random
+import time
+from collections import Counter
+
+try:
+    from .blobs import column_affinity
+    from .schema import quote_identifier
+    from .sketches import HyperLogLog, KLLSketch
+    from .sampling import rowid_filter, sample_rowids, sample_rows
+except ImportError:
+    from blobs import column_affinity
+    from schema import quote_identifier
+    from sketches import HyperLogLog, KLLSketch
+    from sampling import rowid_filter, sample_rowids, sample_rows
+
+BATCH_SIZE = 10000
+TOP_K = 10
+TOP_CAPACITY = 1000
+DISTINCT_LIMIT = 100000
+RESERVOIR_SIZE = 10000
+HISTOGRAM_BINS = 20
+
+class ColumnProfile:
+    """Статистика одной колонки, накапливаемая порциями за один проход.
+    
+    Количество NULL, min/max, среднее и дисперсия (слияние порций по Чану)
+    точные. Частые значения считаются в ограниченном счетчике: при
+    переполнении редкие отбрасываются и результат становится приближенным.
+    Различные значения считаются точно до DISTINCT_LIMIT, дальше - HyperLogLog.
+    Квантили дает KLL, гистограмма строится по равномерной выборке.
+    """
+    def __init__(self, name, declared_type=""):
+        self.name = name
+        self.type = declared_type
+        self.rows = 0
+        self.nulls = 0
+        self.numeric = 0
+        self.texts = 0
+        self.blobs = 0
+        self.min = None
+        self.max = None
+        self.text_min = None
+        self.text_max = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.lengths = Counter()
+        self.length_min = None
+        self.length_max = None
+        self.top = Counter()
+        self.top_exact = True
+        self.distinct_values = set()
+        self.distinct_sketch = None
+        self.quantile_sketch = KLLSketch()
+        self.reservoir = []
+        self._seen_numeric = 0
+    
+    def update(self, values, blob_sizes=None):
+        """Учесть порцию значений; blob_sizes - длины BLOB, если сами значения не читались"""
+        self.rows += len(values)
+        present = [value for value in values if value is not None]
+        if blob_sizes is not None:
+            sizes = [size for size in blob_sizes if size is not None]
+            self.blobs += len(sizes)
+            self.nulls += len(values) - len(present) - len(sizes)
+            self._update_lengths(sizes)
+            if sizes:
+                # Содержимое BLOB не читалось, различные значения не посчитать
+                self.distinct_values = None
+                self.distinct_sketch = None
+        else:
+            self.nulls += len(values) - len(present)
+        
+        numbers = [value for value in present if type(value) is int or type(value) is float]
+        texts = [value for value in present if type(value) is str]
+        if blob_sizes is None:
+            blobs = [value for value in present if type(value) is bytes]
+            self.blobs += len(blobs)
+            self._update_lengths([len(value) for value in blobs])
+        
+        if numbers:
+            self._update_numbers(numbers)
+        if texts:
+            self.texts += len(texts)
+            low, high = min(texts), max(texts)
+            self.text_min = low if self.text_min is None else min(self.text_min, low)
+            self.text_max = high if self.text_max is None else max(self.text_max, high)
+            self._update_lengths([len(value) for value in texts])
+        
+        self.top.update(present)
+        if len(self.top) > 2 * TOP_CAPACITY:
+            self.top = Counter(dict(self.top.most_common(TOP_CAPACITY)))
+            self.top_exact = False
+        
+        if self.distinct_sketch is not None:
+            self.distinct_sketch.add_many(present)
+        elif self.distinct_values is not None:
+            self.distinct_values.update(present)
+            if len(self.distinct_values) > DISTINCT_LIMIT:
+                # Точное множество слишком велико - переходим на HyperLogLog
+                self.distinct_sketch = HyperLogLog()
+                self.distinct_sketch.add_many(self.distinct_values)
+                self.distinct_values = None
+    
+    def _update_numbers(self, numbers):
+        count = len(numbers)
+        batch_mean = math.fsum(numbers) / count
+        batch_m2 = math.fsum((value - batch_mean) ** 2 for value in numbers)
+        total = self.numeric + count
+        delta = batch_mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += batch_m2 + delta * delta * self.numeric * count / total
+        self.numeric = total
+        
+        self.quantile_sketch.update_many(numbers)
+        low, high = min(numbers), max(numbers)
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        
+        for value in numbers:
+            self._seen_numeric += 1
+            if len(self.reservoir) < RESERVOIR_SIZE:
+                self.reservoir.append(value)
+            else:
+                slot = random.randrange(self._seen_numeric)
+                if slot < RESERVOIR_SIZE:
+                    self.reservoir[slot] = value
+    
+    def _update_lengths(self, lengths):
+        if not lengths:
+            return
+        # Корзины по степеням двойки: 0, 1, 2-3, 4-7, ...
+        self.lengths.update(length.bit_length() for length in lengths)
+        low, high = min(lengths), max(lengths)
+        self.length_min = low if self.length_min is None else min(self.length_min, low)
+        self.length_max = high if self.length_max is None else max(self.length_max, high)
+    
+    @property
+    def stddev(self):
+        return math.sqrt(self.m2 / (self.numeric - 1)) if self.numeric > 1 else None
+    
+    @property
+    def distinct(self):
+        """Число различных значений или None для BLOB-колонок"""
+        if self.distinct_sketch is not None:
+            return self.distinct_sketch.count()
+        return len(self.distinct_values) if self.distinct_values is not None else None
+    
+    @property
+    def distinct_exact(self):
+        return self.distinct_sketch is None
+    
+    def quantiles(self, fractions=(0.25, 0.5, 0.75, 0.95, 0.99)):
+        """[(доля, значение)] числовых значений"""
+        return list(zip(fractions, self.quantile_sketch.quantiles(fractions)))
+    
+    def top_values(self, k=TOP_K):
+        return self.top.most_common(k)
+    
+    def length_distribution(self):
+        """[(от, до, количество)] по корзинам длин"""
+        result = []
+        for bucket in sorted(self.lengths):
+            low = 0 if bucket == 0 else 1 << (bucket - 1)
+            high = 0 if bucket == 0 else (1 << bucket) - 1
+            result.append((low, high, self.lengths[bucket]))
+        return result
+    
+    def histogram(self, bins=HISTOGRAM_BINS):
+        """[(от, до, доля)] числовых значений по выборке"""
+        values = self.reservoir
+        if not values:
+            return []
+        low, high = min(values), max(values)
+        if low == high:
+            return [(low, high, 1.0)]
+        
+        integers = all(type(value) is int for value in values)
+        if integers and high - low + 1 <= bins:
+            bins = high - low + 1
+            width = 1
+        else:
+            width = (high - low) / bins
+        counts = [0] * bins
+        for value in values:
+            counts[min(int((value - low) / width), bins - 1)] += 1
+        total = len(values)
+        if width == 1 and integers:
+            return [(low + i, low + i, count / total) for i, count in enumerate(counts)]
+        return [(low + i * width, low + (i + 1) * width, count / total) for i, count in enumerate(counts)]
+
+def profile_query(table_name, columns, where=None):
+    """SELECT для профилирования: BLOB-колонки читаются как длина, без содержимого"""
+    select = []
+    blob_columns = []
+    for index, column in enumerate(columns):
+        name = quote_identifier(column.name)
+        if column_affinity(column.type) == "BLOB":
+            select.append(f"CASE WHEN typeof({name}) = 'blob' THEN NULL ELSE {name} END")
+            blob_columns.append(index)
+        else:
+            select.append(name)
+    for index in blob_columns:
+        name = quote_identifier(columns[index].name)
+        select.append(f"CASE WHEN typeof({name}) = 'blob' THEN length({name}) END")
+    
+    sql = f"SELECT {', '.join(select)} FROM {quote_identifier(table_name)}"
+    if where:
+        sql += f" WHERE {where}"
+    return sql, blob_columns
+
+def cursor_batches(cursor, size=BATCH_SIZE):
+    while True:
+        batch = cursor.fetchmany(size)
+        if not batch:
+            break
+        yield batch
+
+def sample_batches(connection, table_name, columns, sample, rowid):
+    """Порции строк случайной выборки без сортировки таблицы по random().
+    
+    В таблице с rowid строки выбираются точечными поисками случайных rowid,
+    без rowid - резервуаром за один проход. rowid - имя rowid таблицы или None.
+    Возвращает (порции, blob_columns).
+    """
+    if rowid:
+        where, params = rowid_filter(sample_rowids(connection, table_name, sample, rowid=rowid), rowid)
+        sql, blob_columns = profile_query(table_name, columns, where)
+        return cursor_batches(connection.execute(sql, params)), blob_columns
+    sql, blob_columns = profile_query(table_name, columns)
+    _, data = sample_rows(connection, sql, sample)
+    return (data[start:start + BATCH_SIZE] for start in range(0, len(data), BATCH_SIZE)), blob_columns
+
+def profile_table(connection, table_name, columns, sample=None, rowid='rowid',
+                  progress=None, cancelled=None):
+    """Профиль всех колонок таблицы за один проход.
+    
+    columns - список ColumnInfo, sample - размер случайной выборки или None.
+    progress(rows) вызывается после каждой порции, cancelled() - проверка отмены.
+    """
+    started = time.perf_counter()
+    if sample:
+        batches, blob_columns = sample_batches(connection, table_name, columns, sample, rowid)
+    else:
+        sql, blob_columns = profile_query(table_name, columns)
+        batches = cursor_batches(connection.execute(sql))
+    profiles = [ColumnProfile(column.name, column.type) for column in columns]
+    width = len(columns)
+    
+    rows = 0
+    for batch in batches:
+        if cancelled and cancelled():
+            return None
+        
+        by_column = list(zip(*batch))
+        sizes = dict(zip(blob_columns, by_column[width:]))
+        for index, profile in enumerate(profiles):
+            profile.update(by_column[index], sizes.get(index))
+        rows += len(batch)
+        if progress:
+            progress(rows)
+    
+    return {
+        'table': table_name,
+        'rows': rows,
+        'sample': sample,
+        'columns': profiles,
+        'seconds': time.perf_counter() - started
+    }
+
+class ProfileCache:
+    """Профили таблиц до следующего изменения данных или схемы"""
+    def __init__(self):
+        self.entries = {}
+    
+    def get(self, table_name, sample, key):
+        entry = self.entries.get((table_name, sample))
+        if entry and entry[0] == key:
+            return entry[1]
+        return None
+    
+    def put(self, table_name, sample, key, result):
+        self.entries[(table_name, sample)] = (key, result)
+    
+    def clear(self):
+        self.entries = {}
\ No newline at end of file
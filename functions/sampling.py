@@ -0,0 +1,107 @@
+import json
+import random
+
+try:
+    from .schema import quote_identifier
+except ImportError:
+    from schema import quote_identifier
+
+# Ниже этой доли занятых rowid пробы промахиваются слишком часто
+MIN_DENSITY = 0.05
+MAX_ROUNDS = 20
+PROBE_CHUNK = 10000
+
+def rowid_filter(rowids, rowid='rowid'):
+    """Условие WHERE и параметр для набора rowid (один параметр вместо тысяч).
+    
+    rowid - имя, под которым rowid доступен в таблице (SchemaCache.rowid_alias).
+    """
+    return f"{quote_identifier(rowid)} IN (SELECT value FROM json_each(?))", (json.dumps(list(rowids)),)
+
+def key_filter(columns, keys):
+    """Условие по значениям первичного ключа (кортежи keys) для таблиц без rowid"""
+    names = ", ".join(quote_identifier(column) for column in columns)
+    if len(columns) == 1:
+        return f"{names} IN (SELECT value FROM json_each(?))", (json.dumps([key[0] for key in keys]),)
+    parts = ", ".join(f"json_extract(value, '$[{i}]')" for i in range(len(columns)))
+    return f"({names}) IN (SELECT {parts} FROM json_each(?))", (json.dumps([list(key) for key in keys]),)
+
+def probe_rowids(connection, table_name, candidates, rowid='rowid'):
+    """Какие из rowid существуют - точечные поиски по B-дереву"""
+    table = quote_identifier(table_name)
+    name = quote_identifier(rowid)
+    found = set()
+    for start in range(0, len(candidates), PROBE_CHUNK):
+        where, params = rowid_filter(candidates[start:start + PROBE_CHUNK], rowid)
+        found.update(row[0] for row in connection.execute(f"SELECT {name} FROM {table} WHERE {where}", params))
+    return found
+
+def reservoir(rows, size, rng):
+    """Равномерная выборка size элементов из потока за один проход (алгоритм R)"""
+    sample = []
+    for seen, row in enumerate(rows):
+        if seen < size:
+            sample.append(row)
+        else:
+            slot = rng.randrange(seen + 1)
+            if slot < size:
+                sample[slot] = row
+    return sample
+
+def iter_cursor(cursor, batch_size=PROBE_CHUNK):
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        yield from batch
+
+def sample_rowids(connection, table_name, size, seed=None, total=None, rowid='rowid'):
+    """Отсортированный список size случайных rowid без сортировки таблицы.
+    
+    Случайные значения из [min(rowid), max(rowid)] проверяются точечными
+    поисками, принимаются первые size найденных - каждая строка выбирается
+    с равной вероятностью. Если rowid разрежены, выборка делается
+    резервуаром по одному проходу rowid. Одно и то же зерно на тех же данных
+    дает те же строки.
+    """
+    rng = random.Random(seed)
+    table = quote_identifier(table_name)
+    name = quote_identifier(rowid)
+    # Каждый min/max отдельным подзапросом - так SQLite берет его из края B-дерева, без сканирования
+    low, high = connection.execute(
+        f"SELECT (SELECT min({name}) FROM {table}), (SELECT max({name}) FROM {table})").fetchone()
+    if low is None:
+        return []
+    if total is None:
+        total = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if total <= size:
+        return [row[0] for row in connection.execute(f"SELECT {name} FROM {table} ORDER BY {name}")]
+    
+    density = total / (high - low + 1)
+    if density >= MIN_DENSITY:
+        chosen = []
+        tried = set()
+        for _ in range(MAX_ROUNDS):
+            need = size - len(chosen)
+            candidates = []
+            for _ in range(int(need / density * 1.2) + 16):
+                candidate = rng.randint(low, high)
+                if candidate not in tried:
+                    tried.add(candidate)
+                    candidates.append(candidate)
+            hits = probe_rowids(connection, table_name, candidates, rowid)
+            # Порядок генерации, а не порядок ответа, - чтобы зерно давало тот же результат
+            for candidate in candidates:
+                if candidate in hits and len(chosen) < size:
+                    chosen.append(candidate)
+            if len(chosen) >= size:
+                return sorted(chosen)
+    
+    cursor = connection.execute(f"SELECT {name} FROM {table}")
+    return sorted(row[0] for row in reservoir(iter_cursor(cursor), size, rng))
+
+def sample_rows(connection, query, size, seed=None):
+    """Резервуарная выборка строк произвольного запроса (таблицы без rowid, представления)"""
+    cursor = connection.execute(query)
+    columns = [description[0] for description in cursor.description]
+    return columns, reservoir(iter_cursor(cursor), size, random.Random(seed))
\ No newline at end of file
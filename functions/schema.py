@@ -0,0 +1,313 @@
+import sqlite3
+import time
+from collections import namedtuple
+
+try:
+    from .tracing import tracer
+except ImportError:
+    from tracing import tracer
+
+ColumnInfo = namedtuple('ColumnInfo', ['name', 'type', 'notnull', 'default', 'pk'])
+IndexInfo = namedtuple('IndexInfo', ['name', 'table', 'unique', 'origin', 'partial', 'columns', 'sql'])
+ForeignKeyInfo = namedtuple('ForeignKeyInfo', ['id', 'table', 'ref_table', 'columns', 'ref_columns',
+                                               'on_update', 'on_delete'])
+TriggerInfo = namedtuple('TriggerInfo', ['name', 'table', 'sql'])
+
+# Сколько секунд проверенные версии схемы и данных используются без нового запроса к базе
+CHECK_INTERVAL = 0.5
+# Имена, под которыми доступен rowid, если их не заняли колонки таблицы
+ROWID_ALIASES = ('rowid', '_rowid_', 'oid')
+
+def quote_identifier(name):
+    """Экранирование имени таблицы или колонки для подстановки в SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+class SchemaCache:
+    """Кэш метаданных схемы.
+    
+    Таблицы, представления, колонки, индексы и внешние ключи загружаются
+    несколькими запросами к sqlite_master с табличными pragma-функциями и
+    перечитываются только при изменении PRAGMA schema_version.
+    
+    Версии схемы и данных проверяются одним запросом не чаще раза в
+    CHECK_INTERVAL, пока наше соединение ничего не записало; запись других
+    процессов сообщает ChangeWatcher через invalidate().
+    """
+    def __init__(self):
+        self.connection = None
+        self.schema_version = None
+        self.tables = {}
+        self.views = {}
+        self.columns = {}
+        self.indexes = {}
+        self.foreign_keys = {}
+        self.triggers = {}
+        self.without_rowid = set()
+        self.rowid_aliases = {}
+        self._data_key = None
+        self._checked = None
+        self._counts = {}
+        self._counts_key = None
+    
+    def attach(self, connection):
+        self.connection = connection
+        self.schema_version = None
+        self._data_key = None
+        self._checked = None
+        self._counts = {}
+        self._counts_key = None
+    
+    def detach(self):
+        self.attach(None)
+        self.tables = {}
+        self.views = {}
+        self.columns = {}
+        self.indexes = {}
+        self.foreign_keys = {}
+        self.triggers = {}
+        self.without_rowid = set()
+        self.rowid_aliases = {}
+    
+    def invalidate(self):
+        """Сбросить проверку версий: следующее обращение снова спросит базу"""
+        self._checked = None
+    
+    def refresh(self, force=True):
+        """Перечитать схему, если она изменилась. Возвращает True при перезагрузке.
+        
+        force=False позволяет взять версии из недавней проверки.
+        """
+        if not self.connection:
+            return False
+        
+        changes = self.connection.total_changes
+        if not force and self._checked and self._checked[0] == changes \
+                and time.monotonic() - self._checked[1] < CHECK_INTERVAL:
+            return False
+        
+        version, data_version = self.connection.execute(
+            "SELECT s.schema_version, d.data_version FROM pragma_schema_version s, pragma_data_version d"
+        ).fetchone()
+        # data_version меняется при записи из других соединений, total_changes - из нашего
+        self._data_key = (version, data_version, changes)
+        self._checked = (changes, time.monotonic())
+        if version == self.schema_version:
+            return False
+        
+        with tracer.span("schema.load", "db") as span:
+            self._load()
+            span.set(rows=len(self.tables) + len(self.views))
+        self.schema_version = version
+        self._counts = {}
+        return True
+    
+    def _load(self):
+        cursor = self.connection.cursor()
+        
+        tables = {}
+        views = {}
+        triggers = {}
+        cursor.execute("SELECT type, name, tbl_name, sql FROM sqlite_master ORDER BY name")
+        for obj_type, name, tbl_name, sql in cursor.fetchall():
+            if obj_type == 'table':
+                tables[name] = sql
+            elif obj_type == 'view':
+                views[name] = sql
+            elif obj_type == 'trigger':
+                triggers.setdefault(tbl_name, []).append(TriggerInfo(name, tbl_name, sql))
+        
+        self.tables = tables
+        self.views = views
+        self.triggers = triggers
+        self.without_rowid = self._load_without_rowid(cursor, tables)
+        self.columns = self._load_columns(cursor)
+        self.indexes = self._load_indexes(cursor)
+        self.foreign_keys = self._load_foreign_keys(cursor)
+        self.rowid_aliases = self._rowid_aliases()
+    
+    def _load_without_rowid(self, cursor, tables):
+        try:
+            cursor.execute("SELECT name FROM pragma_table_list WHERE schema = 'main' AND wr")
+            return {name for (name,) in cursor.fetchall()}
+        except sqlite3.Error:
+            pass
+        # pragma_table_list появился в SQLite 3.37 - проверяем, компилируется ли выборка rowid.
+        # Колонка пользователя может называться rowid, но не всеми тремя псевдонимами сразу
+        without_rowid = set()
+        for name in tables:
+            for alias in ROWID_ALIASES:
+                try:
+                    cursor.execute(f"SELECT {alias} FROM {quote_identifier(name)} LIMIT 0")
+                except sqlite3.Error:
+                    without_rowid.add(name)
+                    break
+        return without_rowid
+    
+    def _rowid_aliases(self):
+        """Первый псевдоним rowid, не занятый колонкой, для каждой таблицы с rowid"""
+        aliases = {}
+        for name in self.tables:
+            if name in self.without_rowid:
+                continue
+            taken = {column.name.lower() for column in self.columns.get(name, [])}
+            alias = next((alias for alias in ROWID_ALIASES if alias not in taken), None)
+            if alias:
+                aliases[name] = alias
+        return aliases
+    
+    def _load_columns(self, cursor):
+        columns = {}
+        try:
+            cursor.execute("""
+                SELECT m.name, p.name, p.type, p."notnull", p.dflt_value, p.pk
+                FROM sqlite_master m JOIN pragma_table_info(m.name) p
+                WHERE m.type IN ('table', 'view')
+                ORDER BY m.name, p.cid
+            """)
+            for obj_name, *info in cursor.fetchall():
+                columns.setdefault(obj_name, []).append(ColumnInfo(*info))
+        except sqlite3.Error:
+            # Сломанное представление роняет общий запрос - читаем объекты по одному
+            for obj_name in list(self.tables) + list(self.views):
+                try:
+                    cursor.execute("SELECT name, type, \"notnull\", dflt_value, pk "
+                                   "FROM pragma_table_info(?) ORDER BY cid", (obj_name,))
+                    columns[obj_name] = [ColumnInfo(*info) for info in cursor.fetchall()]
+                except sqlite3.Error:
+                    columns[obj_name] = []
+        return columns
+    
+    def _load_indexes(self, cursor):
+        index_columns = {}
+        cursor.execute("""
+            SELECT il.name, ii.name
+            FROM sqlite_master m
+            JOIN pragma_index_list(m.name) il
+            JOIN pragma_index_info(il.name) ii
+            WHERE m.type = 'table'
+            ORDER BY il.name, ii.seqno
+        """)
+        for index_name, column in cursor.fetchall():
+            index_columns.setdefault(index_name, []).append(column)
+        
+        sql_by_name = dict(cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index'").fetchall())
+        
+        indexes = {}
+        cursor.execute("""
+            SELECT m.name, il.name, il."unique", il.origin, il.partial
+            FROM sqlite_master m JOIN pragma_index_list(m.name) il
+            WHERE m.type = 'table'
+            ORDER BY m.name, il.name
+        """)
+        for table, name, unique, origin, partial in cursor.fetchall():
+            indexes.setdefault(table, []).append(IndexInfo(
+                name, table, bool(unique), origin, bool(partial),
+                index_columns.get(name, []), sql_by_name.get(name)))
+        return indexes
+    
+    def _load_foreign_keys(self, cursor):
+        grouped = {}
+        cursor.execute("""
+            SELECT m.name, fk.id, fk."table", fk."from", fk."to", fk.on_update, fk.on_delete
+            FROM sqlite_master m JOIN pragma_foreign_key_list(m.name) fk
+            WHERE m.type = 'table'
+            ORDER BY m.name, fk.id, fk.seq
+        """)
+        for table, fk_id, ref_table, column, ref_column, on_update, on_delete in cursor.fetchall():
+            key = (table, fk_id)
+            if key not in grouped:
+                grouped[key] = ForeignKeyInfo(fk_id, table, ref_table, [], [], on_update, on_delete)
+            grouped[key].columns.append(column)
+            grouped[key].ref_columns.append(ref_column)
+        
+        foreign_keys = {}
+        for (table, _), fk in grouped.items():
+            foreign_keys.setdefault(table, []).append(fk)
+        return foreign_keys
+    
+    def table_names(self):
+        self.refresh(force=False)
+        return list(self.tables)
+    
+    def view_names(self):
+        self.refresh(force=False)
+        return list(self.views)
+    
+    def get_columns(self, name):
+        self.refresh(force=False)
+        return self.columns.get(name, [])
+    
+    def get_indexes(self, table):
+        self.refresh(force=False)
+        return self.indexes.get(table, [])
+    
+    def get_foreign_keys(self, table):
+        self.refresh(force=False)
+        return self.foreign_keys.get(table, [])
+    
+    def get_triggers(self, table):
+        self.refresh(force=False)
+        return self.triggers.get(table, [])
+    
+    def has_rowid(self, name):
+        """Строки таблицы адресуются по rowid (не представление, не WITHOUT ROWID
+        и не все псевдонимы rowid заняты колонками)"""
+        self.refresh(force=False)
+        return name in self.rowid_aliases
+    
+    def rowid_alias(self, name):
+        """Имя для обращения к rowid таблицы: rowid, _rowid_ или oid; None, если rowid недоступен"""
+        self.refresh(force=False)
+        return self.rowid_aliases.get(name)
+    
+    def primary_key(self, name):
+        """Колонки первичного ключа в порядке объявления"""
+        columns = [column for column in self.get_columns(name) if column.pk]
+        return [column.name for column in sorted(columns, key=lambda column: column.pk)]
+    
+    def data_key(self):
+        """Ключ состояния данных для кэшей: меняется при любой записи в базу"""
+        if not self.connection:
+            return None
+        self.refresh(force=False)
+        return self._data_key
+    
+    def row_count(self, name):
+        """Количество строк с кэшем до следующего изменения данных"""
+        if not self.connection:
+            return 0
+        
+        key = self.data_key()
+        if key != self._counts_key:
+            self._counts = {}
+            self._counts_key = key
+        
+        if name not in self._counts:
+            self._counts[name] = self.connection.execute(
+                f"SELECT COUNT(*) FROM {quote_identifier(name)}").fetchone()[0]
+        return self._counts[name]
+    
+    def cached_counts(self):
+        """Уже посчитанные количества строк, если данные с тех пор не менялись"""
+        if not self.connection or self._counts_key != self.data_key():
+            return {}
+        return dict(self._counts)
+    
+    def store_counts(self, counts, key):
+        """Принять количества строк, посчитанные в фоне при состоянии данных key"""
+        if key != self.data_key():
+            return False
+        if key != self._counts_key:
+            self._counts = {}
+            self._counts_key = key
+        self._counts.update(counts)
+        return True
+    
+    def completion_words(self):
+        """Имена таблиц, представлений и колонок для автодополнения"""
+        self.refresh(force=False)
+        words = set(self.tables) | set(self.views)
+        for columns in self.columns.values():
+            words.update(column.name for column in columns)
+        return sorted(words, key=str.lower)
\ No newline at end of file
@@ -0,0 +1,236 @@
+from PyQt6.QtWidgets import *
+from PyQt6.QtCore import *
+from PyQt6.QtGui import *
+
+try:
+    from .styles import Styles
+except ImportError:
+    from styles import Styles
+
+# Имя таблицы (или представления), к которой относится узел
+TABLE_ROLE = Qt.ItemDataRole.UserRole
+# Текст справа от имени: количество строк, тип колонки, колонки индекса
+DETAIL_ROLE = Qt.ItemDataRole.UserRole + 1
+STALE_ROLE = Qt.ItemDataRole.UserRole + 2
+
+class SchemaNode:
+    """Узел дерева схемы; children = None - дочерние узлы еще не построены"""
+    __slots__ = ('kind', 'name', 'table', 'parent', 'row', 'children', 'detail', 'tooltip')
+    
+    def __init__(self, kind, name, table, parent=None, row=0, detail="", tooltip=None):
+        self.kind = kind
+        self.name = name
+        self.table = table
+        self.parent = parent
+        self.row = row
+        self.children = [] if kind in ('column', 'index', 'trigger') else None
+        self.detail = detail
+        self.tooltip = tooltip
+
+class SchemaTreeModel(QAbstractItemModel):
+    """Дерево таблиц и представлений без виджета на каждый элемент.
+    
+    Верхний уровень - легкие узлы с именами; колонки, индексы и триггеры
+    строятся из SchemaCache только при раскрытии таблицы (fetchMore).
+    Количества строк хранятся словарем и приходят пачками из фонового
+    пересчета - обновляются только их строки. Фильтр по имени сужает
+    уже отобранный список, если новый текст продолжает предыдущий.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.schema = None
+        self.schema_version = None
+        self.nodes = []
+        self.visible = []
+        self.filter_text = ""
+        self.counts = {}
+        self.stale = False
+        self._rows = {}
+        self._lower = {}
+    
+    def set_schema(self, schema, counts=None):
+        """Построить верхний уровень из кэша схемы; counts - уже известные количества"""
+        self.beginResetModel()
+        self.schema = schema
+        self.schema_version = schema.schema_version if schema is not None else None
+        self.nodes = []
+        if schema is not None:
+            self.nodes = [SchemaNode('table', name, name, tooltip=sql) for name, sql in schema.tables.items()]
+            self.nodes += [SchemaNode('view', name, name, detail="представление", tooltip=sql)
+                           for name, sql in schema.views.items()]
+        self._lower = {id(node): node.name.lower() for node in self.nodes}
+        self.counts = dict(counts or {})
+        self.stale = False
+        self._apply_filter(self.filter_text, self.nodes)
+        self.endResetModel()
+    
+    def clear(self):
+        self.set_schema(None)
+    
+    def table_names(self):
+        return {node.name for node in self.nodes if node.kind == 'table'}
+    
+    def set_filter(self, text):
+        """Оставить объекты, в имени которых есть text (без учета регистра)"""
+        text = text.strip().lower()
+        if text == self.filter_text:
+            return
+        # Продолжение прежнего текста сужает уже отобранные строки
+        source = self.visible if self.filter_text and self.filter_text in text else self.nodes
+        self.beginResetModel()
+        self._apply_filter(text, source)
+        self.endResetModel()
+    
+    def _apply_filter(self, text, source):
+        self.filter_text = text
+        if text:
+            lower = self._lower
+            self.visible = [node for node in source if text in lower[id(node)]]
+        else:
+            self.visible = list(self.nodes)
+        for row, node in enumerate(self.visible):
+            node.row = row
+        self._rows = {node.name: row for row, node in enumerate(self.visible)}
+    
+    def set_counts(self, counts, stale=False):
+        """Принять количества строк; сигнал один на диапазон изменившихся строк"""
+        self.counts.update(counts)
+        self.stale = stale
+        rows = [self._rows[name] for name in counts if name in self._rows]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows), 0), self.index(max(rows), 0),
+                                  [DETAIL_ROLE, STALE_ROLE])
+    
+    def mark_stale(self):
+        """Количества устарели до следующего пересчета"""
+        self.stale = True
+        if self.visible:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.visible) - 1, 0), [STALE_ROLE])
+    
+    def node(self, index):
+        return index.internalPointer() if index.isValid() else None
+    
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0:
+            return QModelIndex()
+        children = self.visible if not parent.isValid() else self.node(parent).children
+        if children is None or not 0 <= row < len(children):
+            return QModelIndex()
+        return self.createIndex(row, 0, children[row])
+    
+    def parent(self, index=QModelIndex()):
+        node = self.node(index)
+        if node is None or node.parent is None:
+            return QModelIndex()
+        return self.createIndex(node.parent.row, 0, node.parent)
+    
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.visible)
+        children = self.node(parent).children
+        return len(children) if children else 0
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+    
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.visible)
+        node = self.node(parent)
+        return node.children is None or bool(node.children)
+    
+    def canFetchMore(self, parent):
+        node = self.node(parent)
+        return node is not None and node.children is None
+    
+    def fetchMore(self, parent):
+        """Построить дочерние узлы таблицы (группы) или группы (колонки, индексы, триггеры)"""
+        node = self.node(parent)
+        if node is None or node.children is not None:
+            return
+        children = self._build_children(node)
+        if not children:
+            node.children = []
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        node.children = children
+        self.endInsertRows()
+    
+    def _build_children(self, node):
+        if self.schema is None:
+            return []
+        if node.kind in ('table', 'view'):
+            groups = []
+            for kind, title, count in (
+                    ('columns', "Колонки", len(self.schema.get_columns(node.name))),
+                    ('indexes', "Индексы", len(self.schema.get_indexes(node.name))),
+                    ('triggers', "Триггеры", len(self.schema.get_triggers(node.name)))):
+                if count:
+                    groups.append(SchemaNode(kind, title, node.name, node, len(groups), str(count)))
+            return groups
+        
+        items = []
+        if node.kind == 'columns':
+            for column in self.schema.get_columns(node.table):
+                detail = (column.type or "") + (" PK" if column.pk else "")
+                items.append(('column', column.name, detail.strip(), None))
+        elif node.kind == 'indexes':
+            for index in self.schema.get_indexes(node.table):
+                detail = ("UNIQUE " if index.unique else "") + "(" + ", ".join(map(str, index.columns)) + ")"
+                items.append(('index', index.name, detail, index.sql))
+        elif node.kind == 'triggers':
+            for trigger in self.schema.get_triggers(node.table):
+                items.append(('trigger', trigger.name, "", trigger.sql))
+        return [SchemaNode(kind, name, node.table, node, row, detail, tooltip)
+                for row, (kind, name, detail, tooltip) in enumerate(items)]
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        node = self.node(index)
+        if node is None:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return node.name
+        if role == TABLE_ROLE:
+            return node.table
+        if role == DETAIL_ROLE:
+            if node.kind == 'table':
+                count = self.counts.get(node.name)
+                return "…" if count is None else f"{count} зап."
+            return node.detail
+        if role == STALE_ROLE:
+            return self.stale and node.kind == 'table'
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return node.tooltip
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return "Имя таблицы"
+        return None
+
+class SchemaTreeDelegate(QStyledItemDelegate):
+    """Рисует имя объекта и справа - количество строк или описание"""
+    COUNT_COLOR = QColor(Styles.TREE_COUNT_COLOR)
+    STALE_COLOR = QColor(Styles.TREE_COUNT_STALE_COLOR)
+    
+    def paint(self, painter, option, index):
+        detail = index.data(DETAIL_ROLE)
+        if not detail:
+            super().paint(painter, option, index)
+            return
+        
+        option = QStyleOptionViewItem(option)
+        self.initStyleOption(option, index)
+        metrics = option.fontMetrics
+        detail_width = metrics.horizontalAdvance(detail) + 10
+        # Имя обрезается так, чтобы не заходить на количество
+        option.text = metrics.elidedText(option.text, Qt.TextElideMode.ElideRight,
+                                         max(option.rect.width() - detail_width - 10, 20))
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, option, painter, option.widget)
+        
+        painter.save()
+        painter.setPen(self.STALE_COLOR if index.data(STALE_ROLE) else self.COUNT_COLOR)
+        painter.drawText(option.rect.adjusted(0, 0, -10, 0),
+                         Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, detail)
+        painter.restore()
\ No newline at end of file
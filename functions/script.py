@@ -0,0 +1,158 @@
+import re
+import sqlite3
+import time
+
+try:
+    from .memory import RowCursor
+except ImportError:
+    from memory import RowCursor
+
+# Строк результата одного оператора, которые попадают в вкладку
+MAX_RESULT_ROWS = 10000
+# Вкладок результатов за один запуск; остальные результаты видны только в журнале
+MAX_RESULT_TABS = 20
+# Операторы управления транзакцией: со своими BEGIN/COMMIT скрипт фиксирует данные сам
+TRANSACTION_KEYWORDS = ("BEGIN", "COMMIT", "END", "ROLLBACK")
+# Операторы, которые SQLite не выполняет внутри транзакции
+OUTSIDE_TRANSACTION = ("VACUUM", "ATTACH", "DETACH")
+# Операторы изменения данных: с RETURNING строки результата - это и есть изменения
+DML_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+RETURNING_RE = re.compile(r"\bRETURNING\b", re.IGNORECASE)
+# Строки, имена в кавычках и комментарии: слова внутри них не ключевые
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'?|\"(?:[^\"]|\"\")*\"?|`[^`]*`?|\[[^\]]*\]?|--[^\n]*|/\*.*?(?:\*/|$)",
+                        re.DOTALL)
+
+class StatementResult:
+    """Итог одного оператора скрипта"""
+    def __init__(self, number, sql, line):
+        self.number = number
+        self.sql = sql
+        self.line = line
+        self.seconds = 0.0
+        self.rowcount = None
+        self.columns = None
+        self.rows = None
+        self.truncated = False
+        # Открытый курсор обрезанного результата, из которого дочитывается остаток
+        self.cursor = None
+        self.error = None
+    
+    def has_result(self):
+        return self.columns is not None
+
+def split_statements(text):
+    """Разбить текст на операторы: [(номер строки, sql)].
+    
+    Граница оператора определяется sqlite3.complete_statement, поэтому
+    точка с запятой в строках, комментариях и телах триггеров не режет
+    оператор. Проверяются только позиции точек с запятой.
+    """
+    statements = []
+    start = 0
+    line = 1
+    position = text.find(";")
+    while position >= 0:
+        chunk = text[start:position + 1]
+        if sqlite3.complete_statement(chunk):
+            if chunk.rstrip(";").strip():
+                offset = len(chunk) - len(chunk.lstrip())
+                statements.append((line + text.count("\n", start, start + offset), chunk.strip()))
+            line += chunk.count("\n")
+            start = position + 1
+        position = text.find(";", position + 1)
+    rest = text[start:].strip()
+    if rest and not is_comment(rest):
+        offset = len(text[start:]) - len(text[start:].lstrip())
+        statements.append((line + text.count("\n", start, start + offset), rest))
+    return statements
+
+def is_comment(text):
+    """Остаток скрипта без оператора - только комментарии"""
+    lines = [part.strip() for part in text.splitlines()]
+    return all(not part or part.startswith("--") for part in lines) or \
+        (text.startswith("/*") and text.endswith("*/"))
+
+def strip_literals(sql):
+    """Текст оператора без строк, имен в кавычках и комментариев"""
+    return LITERAL_RE.sub(" ", sql).strip()
+
+def has_returning(sql):
+    """DML с RETURNING: изменения применяются по мере чтения строк результата"""
+    code = strip_literals(sql)
+    return code.upper().startswith(DML_KEYWORDS) and RETURNING_RE.search(code) is not None
+
+def starts_with(statements, keywords):
+    return any(sql.upper().startswith(keywords) for _, sql in statements)
+
+def run_statements(connection, statements, transaction=True, progress=None, max_rows=MAX_RESULT_ROWS,
+                   budget=None):
+    """Выполнить операторы по порядку до первой ошибки.
+    
+    transaction=True - все операторы в одной транзакции: при ошибке она
+    откатывается целиком, при успехе фиксируется один раз (тысячи INSERT
+    не платят за fsync каждого). Иначе фиксируется каждый оператор.
+    Скрипт со своими BEGIN/COMMIT управляет транзакциями сам.
+    Результат определяется по cursor.description, а не по первому слову,
+    поэтому WITH, PRAGMA, EXPLAIN и RETURNING тоже возвращают строки.
+    progress(done, total) может вернуть False для остановки. С budget
+    (MemoryBudget) строки результата читаются, пока помещаются в бюджет.
+    Возвращает (результаты, откачена ли общая транзакция запуска).
+    """
+    manual = starts_with(statements, TRANSACTION_KEYWORDS)
+    wrapped = transaction and not manual and not starts_with(statements, OUTSIDE_TRANSACTION)
+    if connection.in_transaction:
+        connection.commit()
+    if wrapped:
+        connection.execute("BEGIN")
+    
+    results = []
+    failed = False
+    for number, (line, sql) in enumerate(statements, 1):
+        if progress and progress(number - 1, len(statements)) is False:
+            failed = True
+            break
+        result = StatementResult(number, sql, line)
+        results.append(result)
+        started = time.perf_counter()
+        try:
+            cursor = connection.execute(sql)
+            if cursor.description:
+                result.columns = [description[0] for description in cursor.description]
+                source = RowCursor(cursor)
+                if budget is not None:
+                    result.rows, over_budget = budget.fetch(source, result, max_rows + 1)
+                else:
+                    result.rows, over_budget = source.fetchmany(max_rows + 1), False
+                if len(result.rows) > max_rows or over_budget:
+                    source.unread(result.rows[max_rows:])
+                    result.rows = result.rows[:max_rows]
+                    result.truncated = True
+                    if has_returning(sql):
+                        # Остаток дочитываем, чтобы RETURNING применился ко всем строкам
+                        for _ in cursor:
+                            pass
+                    elif number == len(statements):
+                        # Последний оператор: остаток можно дочитать при прокрутке. Курсор
+                        # предыдущих закрывается - открытый оператор мешает DDL следующих
+                        result.cursor = source
+                    else:
+                        # Чтение только останавливаем - остаток SELECT не вычисляется
+                        cursor.close()
+            if cursor.rowcount >= 0:
+                result.rowcount = cursor.rowcount
+            if not wrapped and not manual and connection.in_transaction:
+                connection.commit()
+        except sqlite3.Error as e:
+            result.error = str(e)
+            failed = True
+        result.seconds = time.perf_counter() - started
+        if failed:
+            break
+    
+    if failed and connection.in_transaction:
+        connection.rollback()
+        # Без общей транзакции выполненные операторы уже зафиксированы - откачен только последний
+        return results, wrapped
+    if connection.in_transaction:
+        connection.commit()
+    return results, False
\ No newline at end of file
@@ -0,0 +1,132 @@
+import threading
+import numpy as np
+
+# Целые складываются точно в int64, пока сумма заведомо не переполняется
+INT64_LIMIT = 2 ** 63
+
+class ColumnBuffer:
+    """Колонка загруженных данных в виде массивов numpy.
+    
+    Типы значений классифицируются сравнением массива типов, без цикла
+    Python по ячейкам: числа - только int и float, текст "12" остается текстом.
+    """
+    def __init__(self, values):
+        self.text_index = None
+        self.sort_ranks = None
+        self.permutations = {}
+        self.values = np.empty(len(values), dtype=object)
+        self.values[:] = values
+        # Типы как id объектов типа: сравнение целых вместо объектов
+        kinds = np.fromiter(map(id, map(type, values)), np.int64, len(values))
+        self.kinds = kinds
+        self.present = kinds != id(type(None))
+        floats = kinds == id(float)
+        self.numeric = (kinds == id(int)) | floats
+        self.integers = not floats.any()
+        numbers = self.values
+        if not self.numeric.all():
+            numbers = numbers.copy()
+            numbers[~self.numeric] = 0
+        try:
+            self.numbers = numbers.astype(np.int64 if self.integers else np.float64)
+        except OverflowError:
+            self.integers = False
+            self.numbers = numbers.astype(np.float64)
+
+class ColumnBuffers:
+    """Ленивый кэш колонок для одного снимка данных модели.
+    
+    Колонка строится при первом обращении (в фоновом потоке) и дальше
+    используется любыми выделениями, пока данные модели не изменятся.
+    """
+    def __init__(self, data, edits=None):
+        self.data = data
+        self.edits = dict(edits or {})
+        self.columns = {}
+        self.lock = threading.Lock()
+    
+    def column(self, col):
+        with self.lock:
+            buffer = self.columns.get(col)
+        if buffer is not None:
+            return buffer
+        values = [row[col] for row in self.data]
+        for (row, edit_col), value in self.edits.items():
+            if edit_col == col and row < len(values):
+                values[row] = value
+        buffer = ColumnBuffer(values)
+        with self.lock:
+            self.columns[col] = buffer
+        return buffer
+
+def summarize(buffers, ranges, cancelled=None, row_map=None):
+    """Сводка по прямоугольникам выделения [(top, bottom, left, right)] включительно.
+    
+    row_map - номера строк данных для строк представления (фильтр), если есть.
+    Возвращает словарь count, numeric, sum, avg, min, max, distinct или
+    None при отмене.
+    """
+    count = 0
+    numeric = 0
+    total = 0
+    low = high = None
+    numbers = []
+    others = set()
+    for top, bottom, left, right in ranges:
+        for col in range(left, right + 1):
+            if cancelled and cancelled():
+                return None
+            buffer = buffers.column(col)
+            rows = slice(top, bottom + 1) if row_map is None else row_map[top:bottom + 1]
+            present = buffer.present[rows]
+            mask = buffer.numeric[rows]
+            count += int(np.count_nonzero(present))
+            
+            selected = buffer.numbers[rows][mask]
+            if selected.size:
+                numeric += selected.size
+                column_low, column_high = selected.min(), selected.max()
+                if buffer.integers and max(abs(int(column_low)), abs(int(column_high))) * selected.size < INT64_LIMIT:
+                    total += int(selected.sum())
+                else:
+                    total += float(selected.sum(dtype=np.float64))
+                low = column_low if low is None else min(low, column_low)
+                high = column_high if high is None else max(high, column_high)
+                numbers.append(selected)
+            
+            text = buffer.values[rows][present & ~mask]
+            if text.size:
+                others.update(text.tolist())
+    
+    distinct = len(others)
+    if numbers:
+        # 1 и 1.0 - одно значение, как в SQLite
+        distinct += len(np.unique(np.concatenate([part.astype(np.float64) for part in numbers])))
+    return {
+        'count': count,
+        'numeric': numeric,
+        'sum': total if numeric else None,
+        'avg': total / numeric if numeric else None,
+        'min': low.item() if numeric else None,
+        'max': high.item() if numeric else None,
+        'distinct': distinct
+    }
+
+def format_number(value):
+    if isinstance(value, float) and (not value.is_integer() or abs(value) >= 1e15):
+        return f"{value:.6g}"
+    return f"{int(value):,}".replace(",", " ")
+
+def summary_text(summary):
+    """Строка для статус бара"""
+    parts = [f"Количество: {format_number(summary['count'])}"]
+    if summary['numeric']:
+        parts += [
+            f"Числа: {format_number(summary['numeric'])}",
+            f"Сумма: {format_number(summary['sum'])}",
+            f"Среднее: {format_number(float(summary['avg']))}",
+            f"Мин: {format_number(summary['min'])}",
+            f"Макс: {format_number(summary['max'])}"
+        ]
+    parts.append(f"Различных: {format_number(summary['distinct'])}")
+    return "  ·  ".join(parts)
\ No newline at end of file
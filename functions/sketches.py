@@ -0,0 +1,171 @@
+import hashlib
+import math
+import random
+
+# Погрешности (1 сигма для HLL, 99% для KLL):
+# HyperLogLog с p=14 - 16384 регистра (16 КБ), стандартная ошибка 1.04/sqrt(2^p) ≈ 0.81%
+# KLL с k=200 - несколько тысяч значений в памяти, ошибка ранга около 1.65%
+HLL_PRECISION = 14
+KLL_K = 200
+
+def sketch_key(value):
+    """Байтовое представление значения для хэширования; 2 и 2.0 считаются одним значением"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int):
+        return b"i" + str(value).encode()
+    if isinstance(value, float):
+        return b"f" + repr(value).encode()
+    if isinstance(value, bytes):
+        return b"b" + value
+    return b"s" + str(value).encode('utf-8', 'surrogatepass')
+
+class HyperLogLog:
+    """Приближенное число различных значений за один проход"""
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+    
+    def add(self, value):
+        self.add_many((value,))
+    
+    def add_many(self, values):
+        registers = self.registers
+        shift = 64 - self.precision
+        mask = (1 << shift) - 1
+        blake2b = hashlib.blake2b
+        for value in values:
+            if value is None:
+                continue
+            h = int.from_bytes(blake2b(sketch_key(value), digest_size=8).digest(), 'big')
+            index = h >> shift
+            # Позиция первой единицы в оставшихся битах
+            rank = shift - (h & mask).bit_length() + 1
+            if rank > registers[index]:
+                registers[index] = rank
+    
+    def merge(self, other):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+    
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Поправка для малых множеств (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+class KLLSketch:
+    """Квантили потока (KLL): компакторы уровней с весами 2^h"""
+    def __init__(self, k=KLL_K, c=2 / 3):
+        self.k = k
+        self.c = c
+        self.compactors = [[]]
+        self.size = 0
+        self.count = 0
+        self.max_size = self.capacity(0)
+    
+    def capacity(self, height):
+        depth = len(self.compactors) - height - 1
+        return int(math.ceil(self.c ** depth * self.k)) + 1
+    
+    def update(self, value):
+        self.compactors[0].append(value)
+        self.size += 1
+        self.count += 1
+        if self.size >= self.max_size:
+            self.compress()
+    
+    def update_many(self, values):
+        level = self.compactors[0]
+        for value in values:
+            level.append(value)
+            self.size += 1
+            if self.size >= self.max_size:
+                self.compress()
+                level = self.compactors[0]
+        self.count += len(values)
+    
+    def compress(self):
+        for height in range(len(self.compactors)):
+            level = self.compactors[height]
+            if len(level) < self.capacity(height):
+                continue
+            if height + 1 >= len(self.compactors):
+                self.compactors.append([])
+                self.max_size = sum(self.capacity(h) for h in range(len(self.compactors)))
+            # Из отсортированного уровня наверх уходит каждое второе значение со случайным сдвигом
+            level.sort()
+            keep = [level.pop()] if len(level) % 2 else []
+            self.compactors[height + 1].extend(level[random.randint(0, 1)::2])
+            self.compactors[height] = keep
+            self.size = sum(len(compactor) for compactor in self.compactors)
+            if self.size < self.max_size:
+                break
+    
+    def weighted(self):
+        items = [(value, 1 << height) for height, level in enumerate(self.compactors) for value in level]
+        items.sort(key=lambda item: item[0])
+        return items
+    
+    def quantiles(self, fractions):
+        """Значения для долей из fractions (0..1)"""
+        items = self.weighted()
+        if not items:
+            return [None for _ in fractions]
+        total = sum(weight for _, weight in items)
+        result = []
+        for fraction in fractions:
+            target = fraction * total
+            cumulative = 0
+            answer = items[-1][0]
+            for value, weight in items:
+                cumulative += weight
+                if cumulative >= target:
+                    answer = value
+                    break
+            result.append(answer)
+        return result
+    
+    def quantile(self, fraction):
+        return self.quantiles([fraction])[0]
+
+class ApproxCountDistinct:
+    """approx_count_distinct(x) - агрегат SQLite на HyperLogLog"""
+    def __init__(self):
+        self.sketch = HyperLogLog()
+    
+    def step(self, value):
+        if value is not None:
+            self.sketch.add(value)
+    
+    def finalize(self):
+        return self.sketch.count()
+
+class ApproxQuantile:
+    """approx_quantile(x, q) - агрегат SQLite на KLL, нечисловые значения пропускаются"""
+    def __init__(self):
+        self.sketch = KLLSketch()
+        self.fraction = None
+    
+    def step(self, value, fraction=0.5):
+        if self.fraction is None:
+            self.fraction = min(max(float(fraction), 0.0), 1.0)
+        if isinstance(value, (int, float)):
+            self.sketch.update(value)
+    
+    def finalize(self):
+        return self.sketch.quantile(self.fraction if self.fraction is not None else 0.5)
+
+class ApproxMedian(ApproxQuantile):
+    def step(self, value):
+        super().step(value, 0.5)
+
+SQL_FUNCTIONS = {
+    'approx_count_distinct': (1, ApproxCountDistinct),
+    'approx_quantile': (2, ApproxQuantile),
+    'approx_median': (1, ApproxMedian)
+}
\ No newline at end of file
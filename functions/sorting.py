@@ -0,0 +1,107 @@
+import locale
+import numpy as np
+
+try:
+    from .filtering import text_index
+except ImportError:
+    from filtering import text_index
+
+# Сопоставление SQLite с тем же порядком текста, что и в таблице
+COLLATION = "locale"
+
+def text_key(text):
+    """Ключ сортировки текста по правилам локали (LC_COLLATE) без учета регистра"""
+    try:
+        return locale.strxfrm(text.casefold())
+    except ValueError:
+        # strxfrm не принимает символ NUL
+        return locale.strxfrm(text.casefold().replace("\0", ""))
+
+def compare_text(left, right):
+    left, right = text_key(left), text_key(right)
+    return (left > right) - (left < right)
+
+def register_collation(connection):
+    connection.create_collation(COLLATION, compare_text)
+
+def collation_ranks(texts):
+    """Ранги строк по локали: (ранги, число различных).
+    
+    Ключ strxfrm считается только для различных строк; строки с равным
+    ключом (например, отличающиеся регистром) получают один ранг.
+    """
+    unique = list(set(texts))
+    keys = np.array(list(map(text_key, unique)), dtype=object)
+    distinct, inverse = np.unique(keys, return_inverse=True)
+    rank_of = dict(zip(unique, inverse.ravel().tolist()))
+    return np.fromiter(map(rank_of.__getitem__, texts), np.int64, len(texts)), len(distinct)
+
+def sort_ranks(buffer):
+    """Ранги значений колонки для сортировки.
+    
+    Равные значения получают равный ранг. Порядок: числа (как числа),
+    текст по правилам локали без учета регистра, прочие значения (BLOB)
+    по их представлению, NULL в конце. Считается один раз на снимок данных.
+    """
+    if buffer.sort_ranks is not None:
+        return buffer.sort_ranks
+    ranks = np.empty(len(buffer.values), dtype=np.int64)
+    offset = 0
+    if buffer.numeric.any():
+        unique, inverse = np.unique(buffer.numbers[buffer.numeric], return_inverse=True)
+        ranks[buffer.numeric] = inverse.ravel()
+        offset = len(unique)
+    
+    other = buffer.present & ~buffer.numeric
+    if other.any():
+        texts = other & (buffer.kinds == id(str))
+        blobs = other & ~texts
+        if texts.any():
+            inverse, count = collation_ranks(buffer.values[texts].tolist())
+            ranks[texts] = offset + inverse
+            offset += count
+        if blobs.any():
+            unique, inverse = np.unique(text_index(buffer).exact[blobs], return_inverse=True)
+            ranks[blobs] = offset + inverse.ravel()
+            offset += len(unique)
+    
+    ranks[~buffer.present] = offset
+    buffer.sort_ranks = ranks
+    return ranks
+
+def sort_key(buffer, descending):
+    ranks = sort_ranks(buffer)
+    if not descending:
+        return ranks
+    # По убыванию NULL тоже остаются в конце
+    return np.where(buffer.present, -ranks, 1)
+
+def sort_sql(columns, keys):
+    """ORDER BY для ключей [(колонка, по убыванию)] в порядке таблицы.
+    
+    columns - имена колонок в кавычках. Числа идут перед текстом, как и в
+    SQLite; текст сравнивается сопоставлением COLLATION; NULL в конце при
+    любом направлении.
+    """
+    terms = []
+    for column, descending in keys:
+        name = columns[column]
+        terms.append(f"{name} IS NULL, {name} COLLATE {COLLATION}{' DESC' if descending else ''}")
+    return ", ".join(terms)
+
+def sort_permutation(buffers, keys):
+    """Устойчивая перестановка строк для ключей [(колонка, по убыванию)].
+    
+    Первый ключ главный. Перестановка одной колонки кэшируется в ее буфере,
+    поэтому повторная сортировка по ней ничего не считает.
+    """
+    if len(keys) == 1:
+        column, descending = keys[0]
+        buffer = buffers.column(column)
+        permutation = buffer.permutations.get(descending)
+        if permutation is None:
+            permutation = np.argsort(sort_key(buffer, descending), kind='stable')
+            buffer.permutations[descending] = permutation
+        return permutation
+    # lexsort устойчива, главный ключ - последний в списке
+    return np.lexsort([sort_key(buffers.column(column), descending) for column, descending in reversed(keys)])
\ No newline at end of file
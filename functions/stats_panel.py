@@ -0,0 +1,282 @@
+from PyQt6.QtWidgets import *
+from PyQt6.QtCore import *
+from PyQt6.QtGui import *
+
+try:
+    from .database import open_connection
+    from .profiler import ProfileCache, profile_table
+    from .tracing import tracer
+    from .blobs import blob_display
+except ImportError:
+    from database import open_connection
+    from profiler import ProfileCache, profile_table
+    from tracing import tracer
+    from blobs import blob_display
+
+def format_stat(value):
+    """Короткое представление значения статистики"""
+    if value is None:
+        return "—"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    if isinstance(value, bytes):
+        return blob_display(value)
+    text = str(value)
+    return text if len(text) <= 60 else text[:57] + "..."
+
+def bar(share, width=20):
+    return "█" * max(1 if share > 0 else 0, round(share * width))
+
+class ProfileWorker(QThread):
+    """Профилирование таблицы в фоне на отдельном соединении только для чтения"""
+    progress = pyqtSignal(int)
+    done = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, db_path, table_name, columns, sample, rowid, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.table_name = table_name
+        self.columns = columns
+        self.sample = sample
+        self.rowid = rowid
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def run(self):
+        try:
+            connection = open_connection(self.db_path, 'readonly')
+            try:
+                with tracer.span("db.profile_table", "db", table=self.table_name) as span:
+                    result = profile_table(connection, self.table_name, self.columns, self.sample,
+                                           self.rowid, self.progress.emit, lambda: self.cancelled)
+                    if result:
+                        span.set(rows=result['rows'])
+            finally:
+                connection.close()
+            if result is not None:
+                self.done.emit(result)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+class ColumnStatsPanel(QWidget):
+    """Статистика колонок текущей таблицы"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.connection = None
+        self.schema = None
+        self.table_name = None
+        self.worker = None
+        self.cache = ProfileCache()
+        self.init_ui()
+    
+    def init_ui(self):
+        self.setStyleSheet("""
+            QTreeWidget {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+            }
+            QHeaderView::section {
+                background-color: #202020;
+                color: #a0a0a0;
+                padding: 5px;
+                border: none;
+                border-right: 1px solid #303030;
+            }
+            QLabel, QCheckBox {
+                color: #a0a0a0;
+            }
+            QSpinBox {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 3px;
+            }
+            QPushButton {
+                background-color: #1a1a1a;
+                color: #e0e0e0;
+                border: 1px solid #303030;
+                border-radius: 3px;
+                padding: 5px 10px;
+            }
+            QPushButton:hover {
+                background-color: #252525;
+                border-color: #404040;
+            }
+        """)
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        controls = QHBoxLayout()
+        self.sample_check = QCheckBox("Выборка")
+        self.sample_check.setToolTip("Считать по случайной выборке строк вместо всей таблицы")
+        controls.addWidget(self.sample_check)
+        self.sample_spin = QSpinBox()
+        self.sample_spin.setRange(1000, 10000000)
+        self.sample_spin.setSingleStep(10000)
+        self.sample_spin.setValue(100000)
+        controls.addWidget(self.sample_spin)
+        controls.addStretch()
+        
+        self.run_btn = QPushButton("Рассчитать")
+        self.run_btn.clicked.connect(self.start)
+        controls.addWidget(self.run_btn)
+        self.cancel_btn = QPushButton("Стоп")
+        self.cancel_btn.clicked.connect(self.cancel)
+        self.cancel_btn.setEnabled(False)
+        controls.addWidget(self.cancel_btn)
+        layout.addLayout(controls)
+        
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+        
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Колонка", "Значение"])
+        self.tree.setColumnWidth(0, 180)
+        layout.addWidget(self.tree)
+        
+        self.setLayout(layout)
+    
+    def set_connection(self, connection):
+        self.cancel()
+        self.connection = connection
+        self.cache.clear()
+        self.tree.clear()
+    
+    def set_schema(self, schema):
+        self.schema = schema
+    
+    def current_sample(self):
+        return self.sample_spin.value() if self.sample_check.isChecked() else None
+    
+    def set_table(self, table_name):
+        """Показать профиль из кэша, если данные не менялись"""
+        self.cancel()
+        self.table_name = table_name
+        self.tree.clear()
+        if not table_name or not self.schema:
+            self.status_label.setText("")
+            return
+        
+        result = self.cache.get(table_name, self.current_sample(), self.schema.data_key())
+        if result:
+            self.show_result(result)
+        else:
+            self.status_label.setText(f"{table_name}: нажмите «Рассчитать»")
+    
+    def start(self):
+        if not self.table_name or not self.schema or self.worker:
+            return
+        
+        key = self.schema.data_key()
+        sample = self.current_sample()
+        result = self.cache.get(self.table_name, sample, key)
+        if result:
+            self.show_result(result)
+            return
+        
+        columns = self.schema.get_columns(self.table_name)
+        rowid = self.schema.rowid_alias(self.table_name)
+        total = min(sample, self.schema.row_count(self.table_name)) if sample else \
+            self.schema.row_count(self.table_name)
+        db_path = self.connection.execute("PRAGMA database_list").fetchone()[2]
+        if not db_path:
+            # Базу в памяти другое соединение не видит, считаем на текущем
+            result = profile_table(self.connection, self.table_name, columns, sample, rowid)
+            self.cache.put(self.table_name, sample, key, result)
+            self.show_result(result)
+            return
+        
+        self.worker = ProfileWorker(db_path, self.table_name, columns, sample, rowid, self)
+        self.worker.progress.connect(
+            lambda rows: self.status_label.setText(f"Обработано строк: {rows} из {total}"))
+        self.worker.done.connect(lambda result: self.finish(key, result))
+        self.worker.failed.connect(lambda error: self.status_label.setText(f"Ошибка: {error}"))
+        worker = self.worker
+        self.worker.finished.connect(lambda: self.worker_finished(worker))
+        self.run_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.status_label.setText("Расчет...")
+        self.worker.start()
+    
+    def cancel(self):
+        if self.worker:
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker_finished(self.worker)
+    
+    def worker_finished(self, worker):
+        if worker is not self.worker:
+            return
+        self.worker = None
+        self.run_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+    
+    def finish(self, key, result):
+        self.cache.put(result['table'], result['sample'], key, result)
+        if result['table'] == self.table_name:
+            self.show_result(result)
+    
+    def show_result(self, result):
+        self.tree.clear()
+        source = f"выборка {result['rows']} строк" if result['sample'] else f"{result['rows']} строк"
+        self.status_label.setText(f"{result['table']}: {source}, {result['seconds']:.2f} с")
+        
+        for profile in result['columns']:
+            item = QTreeWidgetItem([f"{profile.name} {profile.type or ''}".strip(),
+                                    f"NULL: {profile.nulls}"])
+            self.tree.addTopLevelItem(item)
+            
+            distinct = profile.distinct
+            rows = [
+                ("NULL", f"{profile.nulls} ({profile.nulls / max(profile.rows, 1):.1%})"),
+                ("Различных", "—" if distinct is None else
+                 str(distinct) if profile.distinct_exact else f"≈{distinct} (±0.8%)"),
+                ("Числа / текст / BLOB", f"{profile.numeric} / {profile.texts} / {profile.blobs}")
+            ]
+            if profile.numeric:
+                rows += [
+                    ("Минимум", format_stat(profile.min)),
+                    ("Максимум", format_stat(profile.max)),
+                    ("Среднее", format_stat(profile.mean)),
+                    ("Ст. отклонение", format_stat(profile.stddev))
+                ]
+                rows += [(f"Квантиль {fraction:.0%} (≈)", format_stat(value))
+                         for fraction, value in profile.quantiles()]
+            if profile.texts:
+                rows += [
+                    ("Мин. текст", format_stat(profile.text_min)),
+                    ("Макс. текст", format_stat(profile.text_max))
+                ]
+            if profile.length_min is not None:
+                rows.append(("Длина", f"{profile.length_min} - {profile.length_max}"))
+            for name, value in rows:
+                QTreeWidgetItem(item, [name, value])
+            
+            top = profile.top_values()
+            if top and top[0][1] > 1:
+                title = "Частые значения" if profile.top_exact else "Частые значения (≈)"
+                group = QTreeWidgetItem(item, [title, ""])
+                for value, count in top:
+                    QTreeWidgetItem(group, [format_stat(value), str(count)])
+            
+            histogram = profile.histogram()
+            if len(histogram) > 1:
+                group = QTreeWidgetItem(item, ["Гистограмма", ""])
+                for low, high, share in histogram:
+                    label = format_stat(low) if low == high else f"{format_stat(low)} - {format_stat(high)}"
+                    QTreeWidgetItem(group, [label, f"{bar(share)} {share:.1%}"])
+            
+            lengths = profile.length_distribution()
+            if len(lengths) > 1:
+                group = QTreeWidgetItem(item, ["Распределение длин", ""])
+                total = sum(count for _, _, count in lengths)
+                for low, high, count in lengths:
+                    label = str(low) if low == high else f"{low} - {high}"
+                    QTreeWidgetItem(group, [label, f"{bar(count / total)} {count}"])
\ No newline at end of file
@@ -1,4 +1,4 @@
-from PyQt6.QtCore import QRegularExpression
+import re
 from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
 from PyQt6.QtGui import QLinearGradient, QPalette, QBrush, QColor
 
@@ -123,8 +123,8 @@ class Styles:
         }
     """
     
-    TREE_WIDGET = """
-        QTreeWidget {
+    TREE_VIEW = """
+        QTreeView {
             background-color: #1a1a1a;
             color: #e0e0e0;
             border: 1px solid #303030;
@@ -132,19 +132,19 @@ class Styles:
             outline: none;
             show-decoration-selected: 1;
         }
-        QTreeWidget::item {
+        QTreeView::item {
             padding: 5px;
             border-bottom: 1px solid #252525;
         }
-        QTreeWidget::item:selected {
+        QTreeView::item:selected {
             background-color: #303030;
             color: #ffffff;
         }
-        QTreeWidget::item:hover {
+        QTreeView::item:hover {
             background-color: #252525;
         }
-        QTreeWidget::branch:has-children:!has-siblings:closed,
-        QTreeWidget::branch:closed:has-children:has-siblings {
+        QTreeView::branch:has-children:!has-siblings:closed,
+        QTreeView::branch:closed:has-children:has-siblings {
             border-image: none;
             image: url(none);
         }
@@ -158,6 +158,21 @@ class Styles:
         }
     """
     
+    TREE_FILTER = """
+        QLineEdit {
+            background-color: #1a1a1a;
+            color: #e0e0e0;
+            border: 1px solid #303030;
+            border-radius: 4px;
+            padding: 5px;
+            margin-bottom: 5px;
+            selection-background-color: #404040;
+        }
+        QLineEdit:focus {
+            border-color: #505050;
+        }
+    """
+    
     TAB_WIDGET = """
         QTabWidget::pane {
             border: 1px solid #303030;
@@ -211,7 +226,7 @@ class Styles:
     """
     
     SQL_EDITOR = """
-        QTextEdit {
+        QTextEdit, QPlainTextEdit {
             background-color: #1a1a1a;
             color: #e0e0e0;
             font-family: 'Consolas', 'Monaco', monospace;
@@ -221,7 +236,7 @@ class Styles:
             padding: 10px;
             selection-background-color: #404040;
         }
-        QTextEdit:focus {
+        QTextEdit:focus, QPlainTextEdit:focus {
             border-color: #505050;
         }
     """
@@ -236,65 +251,170 @@ class Styles:
             background: #404040;
         }
     """
+    
+    RESULT_TABLE = """
+        QTableView {
+            background-color: #1a1a1a;
+            color: #e0e0e0;
+            gridline-color: #303030;
+            border: none;
+            selection-background-color: #404040;
+            selection-color: #ffffff;
+        }
+        QHeaderView::section {
+            background-color: #202020;
+            color: #a0a0a0;
+            padding: 5px;
+            border: none;
+            border-right: 1px solid #303030;
+            border-bottom: 1px solid #303030;
+            font-weight: bold;
+        }
+    """
+    
+    # Цвета количества строк в дереве таблиц (рисует делегат)
+    TREE_COUNT_COLOR = "#606060"
+    
+    # Количество устарело - идет пересчет после изменения базы
+    TREE_COUNT_STALE_COLOR = "#8a6a30"
 
 class SQLHighlighter(QSyntaxHighlighter):
+    """Подсветка SQL за один проход по строке.
+    
+    Состояние блока (многострочный комментарий или строка) передается
+    следующему блоку, поэтому при редактировании Qt перекрашивает только
+    измененные блоки, пока состояние на их границе не меняется.
+    """
+    STATE_NORMAL = 0
+    STATE_COMMENT = 1
+    STATE_STRING = 2
+    STATE_IDENTIFIER = 3
+    
+    KEYWORDS = frozenset([
+        "SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER",
+        "TABLE", "FROM", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL",
+        "ON", "AND", "OR", "NOT", "NULL", "IS", "LIKE", "IN", "BETWEEN",
+        "VALUES", "SET", "ORDER", "BY", "GROUP", "HAVING", "LIMIT", "OFFSET",
+        "PRIMARY", "FOREIGN", "KEY", "REFERENCES", "CONSTRAINT", "UNIQUE",
+        "INDEX", "VIEW", "TRIGGER", "FUNCTION", "PROCEDURE", "BEGIN", "COMMIT",
+        "ROLLBACK", "TRANSACTION", "SAVEPOINT", "RELEASE", "CASCADE", "RESTRICT",
+        "AS", "DISTINCT", "ALL", "UNION", "INTERSECT", "EXCEPT", "EXISTS",
+        "CASE", "WHEN", "THEN", "ELSE", "END", "WITH", "RECURSIVE", "INTO",
+        "ASC", "DESC", "OUTER", "CROSS", "NATURAL", "USING", "DEFAULT",
+        "IF", "REPLACE", "CONFLICT", "DO", "NOTHING", "IGNORE", "ABORT", "FAIL",
+        "PRAGMA", "EXPLAIN", "QUERY", "PLAN", "VACUUM", "ANALYZE", "REINDEX",
+        "ATTACH", "DETACH", "DATABASE", "TEMP", "TEMPORARY", "VIRTUAL",
+        "WITHOUT", "ROWID", "AUTOINCREMENT", "CHECK", "COLLATE", "GLOB",
+        "REGEXP", "MATCH", "ESCAPE", "OVER", "PARTITION", "WINDOW", "ROWS",
+        "RANGE", "RETURNING", "INTEGER", "TEXT", "REAL", "BLOB", "NUMERIC"
+    ])
+    
+    # Один общий шаблон вместо отдельного выражения на каждое слово
+    TOKEN_RE = re.compile(r"""
+        (?P<line_comment>--.*)
+        |(?P<block_comment>/\*)
+        |(?P<string>')
+        |(?P<identifier>")
+        |(?P<number>\b\d+(?:\.\d*)?(?:[eE][+-]?\d+)?\b)
+        |(?P<word>[A-Za-z_][A-Za-z0-9_$]*)(?P<call>[ \t]*\()?
+    """, re.VERBOSE)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.highlighting_rules = []
-        
-        # Ключевые слова SQL
-        keywords = [
-            "SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER",
-            "TABLE", "FROM", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL",
-            "ON", "AND", "OR", "NOT", "NULL", "IS", "LIKE", "IN", "BETWEEN",
-            "VALUES", "SET", "ORDER", "BY", "GROUP", "HAVING", "LIMIT", "OFFSET",
-            "PRIMARY", "FOREIGN", "KEY", "REFERENCES", "CONSTRAINT", "UNIQUE",
-            "INDEX", "VIEW", "TRIGGER", "FUNCTION", "PROCEDURE", "BEGIN", "COMMIT",
-            "ROLLBACK", "TRANSACTION", "SAVEPOINT", "RELEASE", "CASCADE", "RESTRICT"
-        ]
         
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QColor(160, 160, 160))  # Серый для ключевых слов
-        keyword_format.setFontWeight(QFont.Weight.Bold)
+        self.keyword_format = QTextCharFormat()
+        self.keyword_format.setForeground(QColor(160, 160, 160))  # Серый для ключевых слов
+        self.keyword_format.setFontWeight(QFont.Weight.Bold)
         
-        for word in keywords:
-            pattern = f"\\b{word}\\b"
-            rule = (QRegularExpression(pattern, QRegularExpression.PatternOption.CaseInsensitiveOption), 
-                   keyword_format)
-            self.highlighting_rules.append(rule)
+        self.string_format = QTextCharFormat()
+        self.string_format.setForeground(QColor(180, 180, 180))  # Светло-серый для строк
         
-        # Строки
-        string_format = QTextCharFormat()
-        string_format.setForeground(QColor(180, 180, 180))  # Светло-серый для строк
-        rule = (QRegularExpression("'.*'"), string_format)
-        self.highlighting_rules.append(rule)
-        rule = (QRegularExpression("\".*\""), string_format)
-        self.highlighting_rules.append(rule)
+        self.number_format = QTextCharFormat()
+        self.number_format.setForeground(QColor(200, 200, 200))  # Очень светлый серый для чисел
         
-        # Числа
-        number_format = QTextCharFormat()
-        number_format.setForeground(QColor(200, 200, 200))  # Очень светлый серый для чисел
-        rule = (QRegularExpression("\\b\\d+\\b"), number_format)
-        self.highlighting_rules.append(rule)
+        self.comment_format = QTextCharFormat()
+        self.comment_format.setForeground(QColor(80, 80, 80))  # Темно-серый для комментариев
+        self.comment_format.setFontItalic(True)
         
-        # Комментарии
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QColor(80, 80, 80))  # Темно-серый для комментариев
-        comment_format.setFontItalic(True)
-        rule = (QRegularExpression("--[^\n]*"), comment_format)
-        self.highlighting_rules.append(rule)
-        rule = (QRegularExpression("/\\*.*\\*/"), comment_format)
-        self.highlighting_rules.append(rule)
+        self.function_format = QTextCharFormat()
+        self.function_format.setForeground(QColor(140, 140, 140))  # Серый для функций
+    
+    @staticmethod
+    def find_quote_end(text, start, quote):
+        """Позиция после закрывающей кавычки (удвоенная кавычка - экранирование) или -1"""
+        pos = text.find(quote, start)
+        while pos != -1 and text.startswith(quote, pos + 1):
+            pos = text.find(quote, pos + 2)
+        return pos + 1 if pos != -1 else -1
+    
+    def continue_state(self, text, state):
+        """Дочитать конструкцию, начатую в предыдущем блоке"""
+        if state == self.STATE_COMMENT:
+            end = text.find("*/")
+            if end == -1:
+                self.setFormat(0, len(text), self.comment_format)
+                return -1
+            end += 2
+            self.setFormat(0, end, self.comment_format)
+            return end
         
-        # Функции
-        function_format = QTextCharFormat()
-        function_format.setForeground(QColor(140, 140, 140))  # Серый для функций
-        rule = (QRegularExpression("\\b[A-Za-z_]+\\(.*\\)"), function_format)
-        self.highlighting_rules.append(rule)
+        quote = "'" if state == self.STATE_STRING else '"'
+        end = self.find_quote_end(text, 0, quote)
+        if end == -1:
+            self.setFormat(0, len(text), self.string_format)
+            return -1
+        self.setFormat(0, end, self.string_format)
+        return end
     
     def highlightBlock(self, text):
-        for pattern, format in self.highlighting_rules:
-            match_iterator = pattern.globalMatch(text)
-            while match_iterator.hasNext():
-                match = match_iterator.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), format)
\ No newline at end of file
+        self.setCurrentBlockState(self.STATE_NORMAL)
+        pos = 0
+        
+        state = self.previousBlockState()
+        if state > self.STATE_NORMAL:
+            pos = self.continue_state(text, state)
+            if pos == -1:
+                self.setCurrentBlockState(state)
+                return
+        
+        length = len(text)
+        while pos < length:
+            match = self.TOKEN_RE.search(text, pos)
+            if not match:
+                break
+            kind = match.lastgroup
+            start = match.start()
+            
+            if kind == 'line_comment':
+                self.setFormat(start, length - start, self.comment_format)
+                break
+            
+            if kind == 'block_comment':
+                end = text.find("*/", start + 2)
+                if end == -1:
+                    self.setFormat(start, length - start, self.comment_format)
+                    self.setCurrentBlockState(self.STATE_COMMENT)
+                    break
+                self.setFormat(start, end + 2 - start, self.comment_format)
+                pos = end + 2
+                continue
+            
+            if kind in ('string', 'identifier'):
+                end = self.find_quote_end(text, start + 1, match.group(kind))
+                if end == -1:
+                    self.setFormat(start, length - start, self.string_format)
+                    self.setCurrentBlockState(self.STATE_STRING if kind == 'string' else self.STATE_IDENTIFIER)
+                    break
+                self.setFormat(start, end - start, self.string_format)
+                pos = end
+                continue
+            
+            if kind == 'number':
+                self.setFormat(start, match.end() - start, self.number_format)
+            else:
+                word = match.group('word')
+                if word.upper() in self.KEYWORDS:
+                    self.setFormat(start, len(word), self.keyword_format)
+                elif match.group('call'):
+                    self.setFormat(start, len(word), self.function_format)
+            pos = match.end()
\ No newline at end of file
@@ -0,0 +1,79 @@
+import time
+from collections import deque
+
+try:
+    from .blobs import build_table_select, materialize_rows
+    from .schema import quote_identifier
+except ImportError:
+    from blobs import build_table_select, materialize_rows
+    from schema import quote_identifier
+
+# Период опроса новых строк, мс
+TAIL_INTERVAL = 250
+# Сколько последних строк держим в модели; более старые отбрасываются
+TAIL_CAPACITY = 100000
+# Максимум строк за один опрос: при большом отставании догоняем за несколько тиков
+TAIL_BATCH = 20000
+# Окно усреднения скорости поступления, секунды
+RATE_WINDOW = 5.0
+
+class IngestRate:
+    """Скорость поступления строк (строк/с) по скользящему окну"""
+    def __init__(self, window=RATE_WINDOW):
+        self.window = window
+        self.samples = deque()
+        self.total = 0
+    
+    def add(self, count, now=None):
+        now = time.monotonic() if now is None else now
+        self.samples.append((now, count))
+        self.total += count
+        while self.samples and now - self.samples[0][0] > self.window:
+            self.total -= self.samples.popleft()[1]
+    
+    def rate(self):
+        if len(self.samples) < 2:
+            return 0.0
+        span = self.samples[-1][0] - self.samples[0][0]
+        if span <= 0:
+            return 0.0
+        # Первый замер открывает окно, его строки пришли раньше
+        return (self.total - self.samples[0][1]) / span
+
+class TailReader:
+    """Чтение новых строк таблицы с rowid больше последнего прочитанного.
+    
+    Каждый запрос - поиск по B-дереву rowid и чтение только новых строк,
+    поэтому стоимость опроса не зависит от размера таблицы.
+    """
+    def __init__(self, schema, table_name):
+        self.schema = schema
+        self.table_name = table_name
+        self.last_rowid = None
+        self.rowid = quote_identifier(schema.rowid_alias(table_name))
+        self.columns = [column.name for column in schema.get_columns(table_name)]
+    
+    def _fetch(self, connection, where, params, order_by, limit):
+        sql, columns, wrapped = build_table_select(self.schema, self.table_name, limit,
+                                                   where=where, order_by=order_by)
+        return materialize_rows(self.table_name, columns, wrapped, connection.execute(sql, params).fetchall())
+    
+    def start(self, connection, count):
+        """Последние count строк таблицы: (rowids, data) в порядке rowid"""
+        rowids, data = self._fetch(connection, None, (), f"{self.rowid} DESC", count)
+        rowids.reverse()
+        data.reverse()
+        if rowids:
+            self.last_rowid = rowids[-1]
+        return rowids, data
+    
+    def fetch(self, connection, limit=TAIL_BATCH):
+        """Строки, добавленные после последнего чтения: (rowids, data)"""
+        if self.last_rowid is None:
+            # Таблица была пуста - читаем с самого начала
+            rowids, data = self._fetch(connection, None, (), self.rowid, limit)
+        else:
+            rowids, data = self._fetch(connection, f"{self.rowid} > ?", (self.last_rowid,), self.rowid, limit)
+        if rowids:
+            self.last_rowid = rowids[-1]
+        return rowids, data
\ No newline at end of file
@@ -0,0 +1,224 @@
+import cProfile
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+# Папка данных программы: плагины функций, журнал зависаний, профили
+APP_DIR = os.path.join(os.path.expanduser("~"), ".sqlite-table-viewer")
+PROFILE_DIR = os.path.join(APP_DIR, "profiles")
+
+class Span:
+    """Отрезок времени выполнения операции"""
+    __slots__ = ('tracer', 'name', 'category', 'attrs', 'start', 'end',
+                 'thread_id', 'thread_name', 'depth', 'parent')
+    
+    def __init__(self, tracer, name, category, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.start = 0.0
+        self.end = 0.0
+        self.thread_id = 0
+        self.thread_name = ""
+        self.depth = 0
+        self.parent = None
+    
+    @property
+    def duration(self):
+        return self.end - self.start
+    
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+    
+    def __enter__(self):
+        stack = self.tracer._stack()
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.depth = len(stack)
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs['error'] = str(exc)
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._record(self)
+        return False
+
+class _NullSpan:
+    """Пустой отрезок, используется при выключенной трассировке"""
+    __slots__ = ()
+    
+    def set(self, **attrs):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Tracer:
+    """Легковесная трассировка вложенных операций"""
+    def __init__(self, max_spans=5000):
+        self.enabled = False
+        self.spans = deque(maxlen=max_spans)
+        self.version = 0
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+    
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+    
+    def _record(self, span):
+        with self._lock:
+            self.spans.append(span)
+            self.version += 1
+    
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+    
+    def span(self, name, category="app", **attrs):
+        """Контекстный менеджер для замера операции"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, category, attrs)
+    
+    def current(self):
+        """Текущий открытый отрезок потока"""
+        if not self.enabled:
+            return NULL_SPAN
+        stack = self._stack()
+        return stack[-1] if stack else NULL_SPAN
+    
+    def annotate(self, **attrs):
+        """Добавить атрибуты (строки, байты) к текущему отрезку"""
+        if self.enabled:
+            self.current().set(**attrs)
+    
+    def snapshot(self):
+        with self._lock:
+            return list(self.spans)
+    
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.version += 1
+    
+    def export_chrome_trace(self, file_path):
+        """Сохранить трассировку в формате Chrome trace-event JSON"""
+        spans = self.snapshot()
+        pid = os.getpid()
+        events = []
+        threads = {}
+        
+        for span in spans:
+            threads[span.thread_id] = span.thread_name
+            args = {key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value)
+                    for key, value in span.attrs.items()}
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': (span.start - self.origin) * 1e6,
+                'dur': span.duration * 1e6,
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args
+            })
+        
+        for thread_id, thread_name in threads.items():
+            events.append({
+                'name': 'thread_name',
+                'ph': 'M',
+                'pid': pid,
+                'tid': thread_id,
+                'args': {'name': thread_name}
+            })
+        
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        
+        return len(spans)
+
+tracer = Tracer()
+
+class ProfileCapture:
+    """Запись cProfile для следующих N действий пользователя.
+    
+    Профилируются только внешние действия (открытие таблицы, запрос,
+    импорт); вложенные операции попадают в профиль внешнего. Каждое
+    действие сохраняется в свой файл .prof для pstats или snakeviz.
+    """
+    def __init__(self, directory=PROFILE_DIR):
+        self.directory = directory
+        self.remaining = 0
+        self.files = []
+        self.active = False
+    
+    def arm(self, count):
+        self.remaining = count
+        self.files = []
+    
+    def cancel(self):
+        self.remaining = 0
+    
+    def run(self, name, func, args, kwargs):
+        self.remaining -= 1
+        self.active = True
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            self.active = False
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                safe_name = re.sub(r'[^\w.]', '_', name)
+                path = os.path.join(self.directory, f"{datetime.now():%Y%m%d_%H%M%S_%f}_{safe_name}.prof")
+                profile.dump_stats(path)
+                self.files.append(path)
+            except OSError as e:
+                print(f"Error saving profile {name}: {e}")
+
+capture = ProfileCapture()
+
+def traced(name, category="app"):
+    """Декоратор: оборачивает функцию в отрезок трассировки"""
+    def decorator(func):
+        code = func.__code__
+        # Qt передает в слот лишние аргументы сигнала (например, checked),
+        # поэтому обрезаем позиционные аргументы до сигнатуры функции
+        max_args = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if max_args is not None:
+                args = args[:max_args]
+            if capture.remaining and category == "app" and not capture.active:
+                with tracer.span(name, category):
+                    return capture.run(name, func, args, kwargs)
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(tracer, name, category, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
\ No newline at end of file
@@ -0,0 +1,269 @@
+import hashlib
+import importlib.util
+import inspect
+import math
+import os
+import re
+import time
+from functools import lru_cache
+
+try:
+    from .tracing import APP_DIR, tracer
+    from .sketches import SQL_FUNCTIONS as SKETCH_FUNCTIONS
+except ImportError:
+    from tracing import APP_DIR, tracer
+    from sketches import SQL_FUNCTIONS as SKETCH_FUNCTIONS
+
+# Папка пользовательских функций: каждый .py файл с функцией register(registry)
+PLUGIN_DIR = os.environ.get("SQLITE_VIEWER_UDF_DIR", os.path.join(APP_DIR, "udf"))
+EARTH_RADIUS_KM = 6371.0088
+BUILTIN = "встроенная"
+
+class FunctionSpec:
+    """Описание функции SQL: kind - 'scalar', 'aggregate' или 'window'"""
+    def __init__(self, kind, name, implementation, narg, deterministic=False, source=BUILTIN):
+        self.kind = kind
+        self.name = name
+        self.implementation = implementation
+        self.narg = narg
+        self.deterministic = deterministic
+        self.source = source
+        self.calls = 0
+        self.seconds = 0.0
+
+def argument_count(func, skip=0):
+    """Число аргументов SQL по сигнатуре: -1 для *args или необязательных параметров"""
+    parameters = list(inspect.signature(func).parameters.values())[skip:]
+    if any(parameter.kind == parameter.VAR_POSITIONAL or parameter.default is not parameter.empty
+           for parameter in parameters):
+        return -1
+    return len(parameters)
+
+def timed_function(func, spec):
+    """Скалярная функция со счетчиком вызовов и временем; замер только при включенной трассировке"""
+    def call(*args):
+        if not tracer.enabled:
+            return func(*args)
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            spec.seconds += time.perf_counter() - started
+            spec.calls += 1
+    return call
+
+def timed_method(method, spec, counted):
+    def call(self, *args):
+        if not tracer.enabled:
+            return method(self, *args)
+        started = time.perf_counter()
+        try:
+            return method(self, *args)
+        finally:
+            spec.seconds += time.perf_counter() - started
+            if counted:
+                spec.calls += 1
+    return call
+
+def timed_class(cls, spec):
+    """Подкласс агрегата, у которого замеряются step/inverse/value/finalize; вызовом считается step"""
+    methods = {name: timed_method(getattr(cls, name), spec, name == 'step')
+               for name in ('step', 'inverse', 'value', 'finalize') if hasattr(cls, name)}
+    return type(cls.__name__, (cls,), methods)
+
+class FunctionRegistry:
+    """Реестр функций SQL, которые регистрируются на каждом соединении.
+    
+    Встроенный набор и функции из PLUGIN_DIR. Плагин - файл .py с функцией
+    register(registry), которая объявляет функции декораторами:
+        
+        def register(registry):
+            @registry.scalar(deterministic=True)
+            def km(miles):
+                return miles * 1.609344
+    
+    deterministic=True разрешает SQLite использовать функцию в индексах по
+    выражениям и вычислять ее один раз для одинаковых аргументов.
+    """
+    def __init__(self):
+        self.functions = {}
+        self.errors = []
+        self.plugin_dir = PLUGIN_DIR
+        # Файл плагина, который сейчас объявляет функции
+        self._source = BUILTIN
+    
+    def add(self, kind, name, implementation, narg, deterministic=False, source=BUILTIN):
+        if kind == 'window' and not all(hasattr(implementation, method) for method in ("value", "inverse")):
+            raise ValueError(f"Оконная функция {name} должна определять value и inverse")
+        spec = FunctionSpec(kind, name, implementation, narg, deterministic, source)
+        self.functions[(name.lower(), narg)] = spec
+        return spec
+    
+    def _decorator(self, kind, name, narg, deterministic, skip):
+        def decorator(implementation):
+            target = implementation.step if kind != 'scalar' else implementation
+            count = argument_count(target, skip) if narg is None else narg
+            self.add(kind, name or implementation.__name__.lower(), implementation, count,
+                     deterministic, self._source)
+            return implementation
+        return decorator
+    
+    def scalar(self, name=None, narg=None, deterministic=False):
+        """Декоратор скалярной функции; narg по умолчанию - по сигнатуре"""
+        return self._decorator('scalar', name, narg, deterministic, 0)
+    
+    def aggregate(self, name=None, narg=None):
+        """Декоратор класса агрегата с методами step и finalize"""
+        return self._decorator('aggregate', name, narg, False, 1)
+    
+    def window(self, name=None, narg=None):
+        """Декоратор класса оконной функции: step, inverse, value, finalize"""
+        return self._decorator('window', name, narg, False, 1)
+    
+    def load_plugins(self, directory=None):
+        """Загрузить функции из файлов папки; ошибки плагинов собираются в errors.
+        
+        Возвращает число загруженных файлов.
+        """
+        directory = directory or self.plugin_dir
+        for key in [key for key, spec in self.functions.items() if spec.source != BUILTIN]:
+            del self.functions[key]
+        self.errors = []
+        if not os.path.isdir(directory):
+            return 0
+        
+        loaded = 0
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith(".py") or file_name.startswith("_"):
+                continue
+            path = os.path.join(directory, file_name)
+            try:
+                module_spec = importlib.util.spec_from_file_location(f"udf_{file_name[:-3]}", path)
+                module = importlib.util.module_from_spec(module_spec)
+                module_spec.loader.exec_module(module)
+                self._source = file_name
+                try:
+                    module.register(self)
+                finally:
+                    self._source = BUILTIN
+                loaded += 1
+            except Exception as e:
+                self.errors.append((file_name, str(e)))
+                print(f"Error loading UDF plugin {file_name}: {e}")
+        return loaded
+    
+    def register(self, connection):
+        """Зарегистрировать все функции на соединении"""
+        for spec in self.functions.values():
+            if spec.kind == 'scalar':
+                connection.create_function(spec.name, spec.narg, timed_function(spec.implementation, spec),
+                                           deterministic=spec.deterministic)
+            elif spec.kind == 'aggregate':
+                connection.create_aggregate(spec.name, spec.narg, timed_class(spec.implementation, spec))
+            else:
+                connection.create_window_function(spec.name, spec.narg, timed_class(spec.implementation, spec))
+    
+    def stats(self):
+        """Функции с вызовами: [(имя, вызовов, секунд)] по убыванию времени"""
+        rows = [(spec.name, spec.calls, spec.seconds) for spec in self.functions.values() if spec.calls]
+        return sorted(rows, key=lambda row: row[2], reverse=True)
+    
+    def reset_stats(self):
+        for spec in self.functions.values():
+            spec.calls = 0
+            spec.seconds = 0.0
+
+# Встроенные функции
+
+@lru_cache(maxsize=256)
+def compiled(pattern):
+    """Скомпилированное выражение: один и тот же шаблон не разбирается на каждой строке"""
+    return re.compile(pattern)
+
+def regexp(pattern, value):
+    """X REGEXP Y вызывает regexp(Y, X)"""
+    if pattern is None or value is None:
+        return None
+    return compiled(pattern).search(str(value)) is not None
+
+def regexp_replace(value, pattern, replacement):
+    if value is None or pattern is None:
+        return None
+    return compiled(pattern).sub(replacement or "", str(value))
+
+def regexp_substr(value, pattern):
+    """Первое совпадение с шаблоном или NULL"""
+    if value is None or pattern is None:
+        return None
+    match = compiled(pattern).search(str(value))
+    return match.group(0) if match else None
+
+def digest(algorithm):
+    def call(value):
+        if value is None:
+            return None
+        if not isinstance(value, bytes):
+            value = str(value).encode('utf-8')
+        return hashlib.new(algorithm, value).hexdigest()
+    call.__name__ = algorithm
+    return call
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Расстояние по дуге большого круга в километрах"""
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+class Variance:
+    """Выборочная дисперсия (Уэлфорд); inverse позволяет работать как оконная функция"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+    
+    def step(self, value):
+        if isinstance(value, (int, float)):
+            self.count += 1
+            delta = value - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (value - self.mean)
+    
+    def inverse(self, value):
+        if isinstance(value, (int, float)):
+            self.count -= 1
+            if not self.count:
+                self.mean = self.m2 = 0.0
+                return
+            delta = value - self.mean
+            self.mean -= delta / self.count
+            self.m2 -= delta * (value - self.mean)
+    
+    def value(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+    
+    def finalize(self):
+        return self.value()
+
+class StandardDeviation(Variance):
+    def value(self):
+        variance = super().value()
+        return math.sqrt(max(variance, 0.0)) if variance is not None else None
+
+def builtin_registry():
+    registry = FunctionRegistry()
+    registry.add('scalar', 'regexp', regexp, 2, deterministic=True)
+    registry.add('scalar', 'regexp_replace', regexp_replace, 3, deterministic=True)
+    registry.add('scalar', 'regexp_substr', regexp_substr, 2, deterministic=True)
+    for algorithm in ('md5', 'sha1', 'sha256'):
+        registry.add('scalar', algorithm, digest(algorithm), 1, deterministic=True)
+    registry.add('scalar', 'haversine', haversine, 4, deterministic=True)
+    registry.add('window', 'variance', Variance, 1)
+    registry.add('window', 'stddev', StandardDeviation, 1)
+    for name, (narg, aggregate) in SKETCH_FUNCTIONS.items():
+        registry.add('aggregate', name, aggregate, narg)
+    return registry
+
+registry = builtin_registry()
\ No newline at end of file
@@ -0,0 +1,122 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from PyQt6.QtCore import *
+
+try:
+    from .tracing import APP_DIR, Span, tracer
+except ImportError:
+    from tracing import APP_DIR, Span, tracer
+
+STALL_LOG = os.path.join(APP_DIR, "stalls.log")
+# Зависание интерфейса по умолчанию - цикл событий не отвечает дольше, мс
+STALL_THRESHOLD = 1000
+# Период отметок цикла событий и проверок вспомогательного потока, мс
+HEARTBEAT_INTERVAL = 100
+MAX_STALLS = 100
+
+class Stall:
+    """Зависание цикла событий: когда началось, сколько длилось и где стоял поток интерфейса"""
+    def __init__(self, started, stack):
+        self.started = started
+        self.time = datetime.now()
+        self.seconds = 0.0
+        self.stack = stack
+    
+    def location(self):
+        """Последняя строка стека - место, где поток интерфейса был пойман"""
+        lines = [line for line in self.stack.strip().splitlines() if line.strip().startswith("File")]
+        return lines[-1].strip() if lines else ""
+
+class StallWatchdog(QObject):
+    """Сторож зависаний интерфейса.
+    
+    Таймер в потоке интерфейса раз в HEARTBEAT_INTERVAL отмечает время;
+    вспомогательный поток с тем же периодом проверяет возраст отметки.
+    Если цикл событий не отвечает дольше порога, поток снимает стек
+    потока интерфейса (sys._current_frames), а когда отметки
+    возобновляются - записывает зависание в журнал. В обычной работе
+    это одно присваивание и одна проверка за 100 мс.
+    """
+    stalled = pyqtSignal(object)
+    
+    def __init__(self, threshold=STALL_THRESHOLD, log_path=STALL_LOG, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold / 1000
+        self.log_path = log_path
+        self.stalls = deque(maxlen=MAX_STALLS)
+        self.beat = time.perf_counter()
+        self.gui_thread = threading.main_thread().ident
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.timer = QTimer(self)
+        self.timer.setInterval(HEARTBEAT_INTERVAL)
+        self.timer.timeout.connect(self.heartbeat)
+    
+    def heartbeat(self):
+        self.beat = time.perf_counter()
+    
+    def set_threshold(self, threshold):
+        self.threshold = threshold / 1000
+    
+    def start(self):
+        if self.thread:
+            return
+        self.beat = time.perf_counter()
+        self.stop_event.clear()
+        self.timer.start()
+        self.thread = threading.Thread(target=self.run, name="stall-watchdog", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        if not self.thread:
+            return
+        self.timer.stop()
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+    
+    def is_active(self):
+        return self.thread is not None
+    
+    def run(self):
+        stall = None
+        while not self.stop_event.wait(HEARTBEAT_INTERVAL / 1000):
+            beat = self.beat
+            lag = time.perf_counter() - beat
+            if stall is None:
+                if lag > self.threshold:
+                    stall = Stall(beat, self.gui_stack())
+            elif beat > stall.started:
+                # Отметки возобновились - зависание закончилось
+                stall.seconds = beat - stall.started
+                self.record(stall)
+                stall = None
+    
+    def gui_stack(self):
+        frame = sys._current_frames().get(self.gui_thread)
+        return "".join(traceback.format_stack(frame)) if frame else ""
+    
+    def record(self, stall):
+        self.stalls.append(stall)
+        if tracer.enabled:
+            # Зависание видно на временной шкале панели метрик
+            span = Span(tracer, "ui.stall", "ui", {'error': stall.location(), 'stack': stall.stack})
+            span.start = stall.started
+            span.end = stall.started + stall.seconds
+            span.thread_id = self.gui_thread
+            span.thread_name = threading.main_thread().name
+            tracer._record(span)
+        try:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(f"{stall.time:%Y-%m-%d %H:%M:%S} интерфейс не отвечал {stall.seconds:.2f} с\n")
+                f.write(stall.stack)
+                f.write("\n")
+        except OSError as e:
+            print(f"Error writing stall log: {e}")
+        self.stalled.emit(stall)
\ No newline at end of file
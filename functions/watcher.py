@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import time
+from PyQt6.QtCore import *
+
+try:
+    from .database import open_connection
+    from .schema import quote_identifier
+    from .tracing import tracer
+except ImportError:
+    from database import open_connection
+    from schema import quote_identifier
+    from tracing import tracer
+
+DEFAULT_INTERVAL = 2000
+# Как часто пересчет отдает уже посчитанные количества, секунды
+PARTIAL_INTERVAL = 0.2
+
+def database_path(connection):
+    """Путь к файлу основной базы соединения или None для базы в памяти"""
+    return connection.execute("PRAGMA database_list").fetchone()[2] or None
+
+def file_state(path):
+    """(mtime, размер) файла базы и WAL; меняется при любой фиксации транзакции"""
+    state = []
+    for name in (path, path + "-wal"):
+        try:
+            stat = os.stat(name)
+            state.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+class CountWorker(QThread):
+    """Пересчет количества строк таблиц на отдельном соединении только для чтения.
+    
+    partial отдает посчитанное пачками, чтобы дерево заполнялось по ходу.
+    """
+    done = pyqtSignal(object)
+    partial = pyqtSignal(object)
+    
+    def __init__(self, db_path, tables, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.tables = tables
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def run(self):
+        counts = {}
+        batch = {}
+        emitted = time.monotonic()
+        try:
+            connection = open_connection(self.db_path, 'readonly')
+            try:
+                with tracer.span("db.recount_tables", "db", rows=len(self.tables)):
+                    # Одна транзакция чтения - все количества из одного снимка
+                    connection.execute("BEGIN")
+                    for table in self.tables:
+                        if self.cancelled:
+                            return
+                        counts[table] = batch[table] = connection.execute(
+                            f"SELECT COUNT(*) FROM {quote_identifier(table)}").fetchone()[0]
+                        if time.monotonic() - emitted > PARTIAL_INTERVAL:
+                            self.partial.emit(batch)
+                            batch = {}
+                            emitted = time.monotonic()
+                    connection.execute("COMMIT")
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return
+        self.done.emit(counts)
+
+class ChangeWatcher(QObject):
+    """Отслеживание записи в базу другими процессами и нашим соединением.
+    
+    Каждый опрос - два stat() файла базы и WAL; PRAGMA data_version
+    выполняется, только если файлы изменились. Пока база не меняется,
+    в нее не уходит ни одного запроса.
+    """
+    changed = pyqtSignal()
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.connection = None
+        self.path = None
+        self.state = None
+        self.changes = None
+        self.version = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+    
+    def set_connection(self, connection):
+        self.connection = connection
+        self.path = database_path(connection) if connection else None
+        self.sync()
+    
+    def sync(self):
+        """Принять текущее состояние базы как уже показанное"""
+        if not self.connection:
+            self.state = self.changes = self.version = None
+            return
+        self.state = file_state(self.path) if self.path else None
+        self.changes = self.connection.total_changes
+        self.version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+    
+    def start(self, interval=DEFAULT_INTERVAL):
+        self.timer.start(interval)
+    
+    def stop(self):
+        self.timer.stop()
+    
+    def is_active(self):
+        return self.timer.isActive()
+    
+    def poll(self):
+        if not self.connection:
+            return False
+        state = file_state(self.path) if self.path else None
+        changes = self.connection.total_changes
+        if state == self.state and changes == self.changes:
+            return False
+        
+        self.state = state
+        try:
+            version = self.connection.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return False
+        # Файлы меняются и без новых данных (контрольная точка WAL) - проверяем версию
+        if version == self.version and changes == self.changes:
+            return False
+        self.version = version
+        self.changes = changes
+        self.changed.emit()
+        return True
\ No newline at end of file
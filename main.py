@@ -1,5 +1,8 @@
 import sys
 import os
+import json
+import locale
+import sqlite3
 
 # Добавляем путь к модулям
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'functions'))
@@ -8,8 +11,14 @@ from PyQt6.QtWidgets import *
 from PyQt6.QtCore import *
 from PyQt6.QtGui import *
 from styles import Styles
-from database import DatabaseManager
+from database import DatabaseManager, PROFILES, open_connection
 from import_export import ImportExportManager
+from tracing import capture, tracer, traced
+from watcher import ChangeWatcher, CountWorker, DEFAULT_INTERVAL, database_path
+from script import MAX_RESULT_TABS
+from udf import registry
+from memory import DEFAULT_BUDGET_MB, budget
+from watchdog import STALL_THRESHOLD, StallWatchdog
 import utils
 
 class IconManager:
@@ -142,7 +151,19 @@ class SQLiteEditor(QMainWindow):
         self.db_manager = DatabaseManager()
         self.import_export = ImportExportManager()
         self.icon_manager = IconManager()
+        self.settings = QSettings("i000993i", "SQLite Table Viewer")
+        budget.set_limit_mb(self.settings.value("memory/budget_mb", DEFAULT_BUDGET_MB, type=int))
+        self.watcher = ChangeWatcher(self)
+        self.watcher.changed.connect(self.database_changed)
+        self.watchdog = StallWatchdog(self.settings.value("watchdog/threshold", STALL_THRESHOLD, type=int),
+                                      parent=self)
+        self.watchdog.stalled.connect(self.show_stall)
+        self.count_worker = None
+        self.recount_pending = False
+        self.bulk_worker = None
         self.init_ui()
+        self.setup_watcher()
+        self.setup_watchdog()
         self.show_splash()
     
     def show_splash(self):
@@ -183,6 +204,13 @@ class SQLiteEditor(QMainWindow):
         main_layout.setSpacing(0)
         central_widget.setLayout(main_layout)
         
+        # Панель метрик (скрыта по умолчанию)
+        from metrics import MetricsDock
+        self.metrics_dock = MetricsDock(self)
+        self.metrics_dock.enable_check.toggled.connect(self.set_tracing_enabled)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.metrics_dock)
+        self.metrics_dock.hide()
+        
         # Создаем компоненты интерфейса
         self.create_menu()
         self.create_toolbar()
@@ -207,6 +235,18 @@ class SQLiteEditor(QMainWindow):
         self.status_bar.setStyleSheet(Styles.STATUS_BAR)
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Готов к работе")
+        
+        # Сводка по выделенным ячейкам таблицы
+        self.selection_label = QLabel("")
+        self.selection_label.setStyleSheet("color: #a0a0a0; padding: 0 10px;")
+        self.status_bar.addPermanentWidget(self.selection_label)
+        self.data_viewer.summary_changed.connect(self.selection_label.setText)
+        
+        # Память под загруженные строки: просмотр таблицы и результаты скрипта
+        self.memory_label = QLabel(budget.status_text())
+        self.memory_label.setStyleSheet("color: #808080; padding: 0 10px;")
+        self.status_bar.addPermanentWidget(self.memory_label)
+        budget.changed.connect(lambda: self.memory_label.setText(budget.status_text()))
     
     def create_menu(self):
         menubar = self.menuBar()
@@ -220,6 +260,14 @@ class SQLiteEditor(QMainWindow):
         open_action.triggered.connect(self.open_database)
         file_menu.addAction(open_action)
         
+        open_profile_action = QAction(self.icon_manager.get_icon('open'), "Открыть с профилем...", self)
+        open_profile_action.setShortcut("Ctrl+Shift+O")
+        open_profile_action.triggered.connect(self.open_database_with_profile)
+        file_menu.addAction(open_profile_action)
+        
+        self.recent_menu = file_menu.addMenu("Недавние файлы")
+        self.update_recent_menu()
+        
         new_action = QAction(self.icon_manager.get_icon('new'), "Создать базу данных", self)
         new_action.setShortcut("Ctrl+N")
         new_action.triggered.connect(self.create_database)
@@ -249,6 +297,16 @@ class SQLiteEditor(QMainWindow):
         import_json.triggered.connect(self.import_json)
         import_menu.addAction(import_json)
         
+        import_excel = QAction(self.icon_manager.get_icon('import'), "Импорт Excel...", self)
+        import_excel.triggered.connect(self.import_excel)
+        import_menu.addAction(import_excel)
+        
+        import_menu.addSeparator()
+        
+        import_into = QAction(self.icon_manager.get_icon('table'), "Импорт в существующую таблицу...", self)
+        import_into.triggered.connect(self.import_into_table)
+        import_menu.addAction(import_into)
+        
         export_menu = menubar.addMenu("Экспорт")
         
         export_csv = QAction(self.icon_manager.get_icon('export'), "Экспорт CSV", self)
@@ -263,6 +321,20 @@ class SQLiteEditor(QMainWindow):
         export_excel.triggered.connect(self.export_excel)
         export_menu.addAction(export_excel)
         
+        export_menu.addSeparator()
+        
+        export_sql = QAction(self.icon_manager.get_icon('sql'), "Экспорт результата SQL запроса...", self)
+        export_sql.triggered.connect(self.export_sql_result)
+        export_menu.addAction(export_sql)
+        
+        export_view = QAction(self.icon_manager.get_icon('table'), "Экспорт текущего представления...", self)
+        export_view.triggered.connect(self.export_current_view)
+        export_menu.addAction(export_view)
+        
+        bulk_export = QAction(self.icon_manager.get_icon('database'), "Массовый экспорт...", self)
+        bulk_export.triggered.connect(self.bulk_export)
+        export_menu.addAction(bulk_export)
+        
         # Инструменты
         tools_menu = menubar.addMenu("Инструменты")
         
@@ -274,12 +346,75 @@ class SQLiteEditor(QMainWindow):
         optimize_action.triggered.connect(self.optimize_database)
         tools_menu.addAction(optimize_action)
         
+        dump_action = QAction(self.icon_manager.get_icon('export'), "Дамп SQL...", self)
+        dump_action.triggered.connect(self.dump_database)
+        tools_menu.addAction(dump_action)
+        
+        restore_action = QAction(self.icon_manager.get_icon('import'), "Восстановить из дампа...", self)
+        restore_action.triggered.connect(self.restore_dump)
+        tools_menu.addAction(restore_action)
+        
         tools_menu.addSeparator()
         
         history_action = QAction(self.icon_manager.get_icon('sql'), "История запросов", self)
         history_action.triggered.connect(self.show_history)
         tools_menu.addAction(history_action)
         
+        functions_action = QAction("Перезагрузить пользовательские функции", self)
+        functions_action.triggered.connect(self.reload_functions)
+        tools_menu.addAction(functions_action)
+        
+        tools_menu.addSeparator()
+        
+        self.trace_action = QAction("Трассировка операций", self)
+        self.trace_action.setCheckable(True)
+        self.trace_action.toggled.connect(self.set_tracing_enabled)
+        tools_menu.addAction(self.trace_action)
+        
+        self.watchdog_action = QAction("Сторож зависаний интерфейса", self)
+        self.watchdog_action.setCheckable(True)
+        self.watchdog_action.toggled.connect(self.set_watchdog_enabled)
+        tools_menu.addAction(self.watchdog_action)
+        
+        threshold_action = QAction("Порог зависания...", self)
+        threshold_action.triggered.connect(self.set_stall_threshold)
+        tools_menu.addAction(threshold_action)
+        
+        profile_action = QAction("Профилировать следующие действия...", self)
+        profile_action.triggered.connect(self.capture_profiles)
+        tools_menu.addAction(profile_action)
+        
+        metrics_action = self.metrics_dock.toggleViewAction()
+        metrics_action.setText("Панель метрик")
+        tools_menu.addAction(metrics_action)
+        
+        export_trace_action = QAction("Экспорт трассировки (JSON)...", self)
+        export_trace_action.triggered.connect(self.metrics_dock.export_trace)
+        tools_menu.addAction(export_trace_action)
+        
+        tools_menu.addSeparator()
+        
+        self.watch_action = QAction("Следить за изменениями базы", self)
+        self.watch_action.setCheckable(True)
+        self.watch_action.toggled.connect(self.set_watching)
+        tools_menu.addAction(self.watch_action)
+        
+        self.auto_refresh_action = QAction("Автообновление таблицы", self)
+        self.auto_refresh_action.setCheckable(True)
+        self.auto_refresh_action.toggled.connect(
+            lambda checked: self.settings.setValue("watch/auto_refresh", checked))
+        tools_menu.addAction(self.auto_refresh_action)
+        
+        interval_action = QAction("Интервал проверки изменений...", self)
+        interval_action.triggered.connect(self.set_watch_interval)
+        tools_menu.addAction(interval_action)
+        
+        tools_menu.addSeparator()
+        
+        budget_action = QAction("Бюджет памяти для данных...", self)
+        budget_action.triggered.connect(self.set_memory_budget)
+        tools_menu.addAction(budget_action)
+        
         # Помощь
         help_menu = menubar.addMenu("Помощь")
         
@@ -359,12 +494,29 @@ class SQLiteEditor(QMainWindow):
         tables_layout.addStretch()
         layout.addLayout(tables_layout)
         
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabel("Имя таблицы")
-        self.tree.setStyleSheet(Styles.TREE_WIDGET)
-        self.tree.itemDoubleClicked.connect(self.load_table)
+        self.tree_filter = QLineEdit()
+        self.tree_filter.setPlaceholderText("Фильтр по имени...")
+        self.tree_filter.setStyleSheet(Styles.TREE_FILTER)
+        self.tree_filter.setClearButtonEnabled(True)
+        layout.addWidget(self.tree_filter)
+        
+        # Модель и делегат вместо виджета на каждую таблицу: десятки тысяч объектов схемы
+        from schema_tree import SchemaTreeModel, SchemaTreeDelegate
+        self.tree_model = SchemaTreeModel(self)
+        self.tree = QTreeView()
+        self.tree.setModel(self.tree_model)
+        self.tree.setItemDelegate(SchemaTreeDelegate(self.tree))
+        self.tree.setUniformRowHeights(True)
+        self.tree.setStyleSheet(Styles.TREE_VIEW)
+        self.tree.doubleClicked.connect(self.load_table)
         layout.addWidget(self.tree)
         
+        self.tree_filter_timer = QTimer(self)
+        self.tree_filter_timer.setSingleShot(True)
+        self.tree_filter_timer.setInterval(100)
+        self.tree_filter_timer.timeout.connect(lambda: self.tree_model.set_filter(self.tree_filter.text()))
+        self.tree_filter.textChanged.connect(self.tree_filter_timer.start)
+        
         panel.setLayout(layout)
         return panel
     
@@ -381,6 +533,7 @@ class SQLiteEditor(QMainWindow):
         # Вкладка просмотра данных
         from models import TableViewer
         self.data_viewer = TableViewer(self.icon_manager)
+        self.data_viewer.set_schema(self.db_manager.schema)
         self.tabs.addTab(self.data_viewer, self.icon_manager.get_icon('table'), "Просмотр данных")
         
         # Вкладка SQL запросов
@@ -405,6 +558,7 @@ class SQLiteEditor(QMainWindow):
         self.execute_btn = QPushButton(" Выполнить (F5)")
         self.icon_manager.set_button_icon(self.execute_btn, 'sql')
         self.execute_btn.setStyleSheet(Styles.SQL_BUTTON)
+        self.execute_btn.setShortcut("F5")
         self.execute_btn.clicked.connect(self.execute_query)
         sql_toolbar.addWidget(self.execute_btn)
         
@@ -414,63 +568,161 @@ class SQLiteEditor(QMainWindow):
         self.clear_btn.clicked.connect(lambda: self.sql_input.clear())
         sql_toolbar.addWidget(self.clear_btn)
         
+        # Скрипт целиком в одной транзакции: при ошибке ничего не остается
+        self.transaction_check = QCheckBox("Одна транзакция")
+        self.transaction_check.setToolTip("Выполнить все операторы скрипта в одной транзакции "
+                                          "и откатить ее при ошибке")
+        self.transaction_check.setStyleSheet("color: #a0a0a0;")
+        self.transaction_check.setChecked(self.settings.value("sql/single_transaction", True, type=bool))
+        self.transaction_check.toggled.connect(
+            lambda checked: self.settings.setValue("sql/single_transaction", checked))
+        sql_toolbar.addWidget(self.transaction_check)
+        
         sql_toolbar.addStretch()
         
         # SQL редактор
-        self.sql_input = QTextEdit()
+        from editor import SQLEditor
+        self.sql_input = SQLEditor()
+        self.sql_input.set_schema(self.db_manager.schema)
         self.sql_input.setPlaceholderText("Введите SQL запрос...")
         self.sql_input.setStyleSheet(Styles.SQL_EDITOR)
         
         from styles import SQLHighlighter
         self.highlighter = SQLHighlighter(self.sql_input.document())
         
+        # Журнал операторов и результаты скрипта
+        from models import LargeTableModel
+        self.result_tabs = QTabWidget()
+        self.result_tabs.setStyleSheet(Styles.TAB_WIDGET)
+        self.result_tabs.setTabsClosable(True)
+        self.result_tabs.tabCloseRequested.connect(self.close_result_tab)
+        
+        self.statement_model = LargeTableModel()
+        self.statement_view = QTableView()
+        self.statement_view.setModel(self.statement_model)
+        self.statement_view.setStyleSheet(Styles.RESULT_TABLE)
+        self.statement_view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.statement_view.doubleClicked.connect(self.show_statement)
+        self.result_tabs.addTab(self.statement_view, "Сообщения")
+        # Журнал не закрывается
+        self.result_tabs.tabBar().setTabButton(0, QTabBar.ButtonPosition.RightSide, None)
+        
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.setStyleSheet(Styles.SPLITTER)
+        splitter.addWidget(self.sql_input)
+        splitter.addWidget(self.result_tabs)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 2)
+        
         layout.addLayout(sql_toolbar)
-        layout.addWidget(self.sql_input)
+        layout.addWidget(splitter)
         
         widget.setLayout(layout)
         return widget
     
-    def open_database(self):
+    def get_database_path(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, 
             "Открыть базу данных", 
             "", 
             "SQLite files (*.db *.sqlite *.db3);;All files (*.*)"
         )
+        return file_path
+    
+    def open_database(self):
+        file_path = self.get_database_path()
+        if file_path:
+            self.open_database_file(file_path, self.get_recent_profile(file_path))
+    
+    def open_database_with_profile(self):
+        file_path = self.get_database_path()
+        if not file_path:
+            return
         
-        if file_path and self.db_manager.connect(file_path):
+        keys = list(PROFILES)
+        titles = [PROFILES[key]['title'] for key in keys]
+        current = keys.index(self.get_recent_profile(file_path))
+        title, ok = QInputDialog.getItem(self, "Профиль подключения", "Выберите профиль:", titles, current, False)
+        if ok:
+            self.open_database_file(file_path, keys[titles.index(title)])
+    
+    @traced("action.open_database", "app")
+    def open_database_file(self, file_path, profile='default'):
+        # Правки открытой таблицы сохраняются в ее базу до переключения соединения
+        if not self.data_viewer.confirm_discard():
+            return
+        # Пересчет строк прежней базы больше не нужен
+        self.cancel_recount()
+        if self.db_manager.connect(file_path, profile):
             self.data_viewer.set_connection(self.db_manager.connection)
+            self.watcher.set_connection(self.db_manager.connection)
+            self.data_viewer.set_read_only(self.db_manager.is_read_only())
             self.load_tables()
             
             # Обновляем информацию о БД
             self.db_name_label.setText(os.path.basename(file_path))
             size_str = utils.format_size(os.path.getsize(file_path))
-            self.db_size_label.setText(f"Размер: {size_str}")
+            self.db_size_label.setText(f"Размер: {size_str}  |  {PROFILES[profile]['title']}")
             
-            self.status_bar.showMessage(f"База данных загружена: {file_path}")
+            self.add_recent_file(file_path, profile)
+            message = f"База данных загружена: {file_path}"
+            if self.db_manager.skipped_pragmas:
+                message += " · не применено: " + "; ".join(self.db_manager.skipped_pragmas)
+            self.status_bar.showMessage(message)
+        else:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось открыть базу данных:\n{file_path}")
+    
+    def get_recent_files(self):
+        try:
+            return json.loads(self.settings.value("recent_files", "[]"))
+        except (TypeError, ValueError):
+            return []
+    
+    def get_recent_profile(self, file_path):
+        for item in self.get_recent_files():
+            if item['path'] == file_path and item.get('profile') in PROFILES:
+                return item['profile']
+        return 'default'
+    
+    def add_recent_file(self, file_path, profile):
+        recent = [item for item in self.get_recent_files() if item['path'] != file_path]
+        recent.insert(0, {'path': file_path, 'profile': profile})
+        self.settings.setValue("recent_files", json.dumps(recent[:10], ensure_ascii=False))
+        self.update_recent_menu()
+    
+    def update_recent_menu(self):
+        self.recent_menu.clear()
+        recent = self.get_recent_files()
+        for item in recent:
+            profile = item.get('profile', 'default')
+            title = PROFILES.get(profile, PROFILES['default'])['title']
+            action = QAction(f"{os.path.basename(item['path'])}  [{title}]", self)
+            action.setToolTip(item['path'])
+            action.triggered.connect(lambda checked, path=item['path'], prof=profile:
+                                     self.open_database_file(path, prof))
+            self.recent_menu.addAction(action)
+        self.recent_menu.setEnabled(bool(recent))
     
+    @traced("action.load_tables", "app")
     def load_tables(self):
-        self.tree.clear()
-        tables = self.db_manager.get_tables()
-        
-        for table_name, count in tables:
-            item = QTreeWidgetItem([f"{table_name}"])
-            item.setData(0, Qt.ItemDataRole.UserRole, table_name)
-            
-            # Добавляем информацию о количестве записей
-            count_label = QLabel(f"{count} зап.")
-            count_label.setStyleSheet("color: #606060; padding-right: 10px;")
-            self.tree.setItemWidget(item, 0, count_label)
-            
-            self.tree.addTopLevelItem(item)
+        """Имена объектов сразу из кэша схемы, количества строк - из фонового пересчета"""
+        schema = self.db_manager.schema
+        schema.refresh()
+        self.tree_model.set_schema(schema, schema.cached_counts())
+        self.sql_input.update_completions()
+        tracer.annotate(rows=len(self.tree_model.nodes))
+        if self.tree_model.table_names() - set(self.tree_model.counts):
+            self.recount_tables()
     
-    def load_table(self, item):
-        table_name = item.data(0, Qt.ItemDataRole.UserRole)
+    @traced("action.load_table", "app")
+    def load_table(self, index):
+        table_name = index.data(Qt.ItemDataRole.UserRole)
         if table_name:
             self.data_viewer.load_table_data(table_name)
             self.tabs.setCurrentIndex(0)
             self.status_bar.showMessage(f"Загружена таблица {table_name}")
     
+    @traced("action.execute_query", "app")
     def execute_query(self):
         if not self.db_manager.connection:
             QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
@@ -480,23 +732,114 @@ class SQLiteEditor(QMainWindow):
         if not query:
             return
         
-        success, result, columns = self.db_manager.execute_query(query)
+        progress = QProgressDialog("Выполнение скрипта...", "Остановить", 0, 1000, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.setMinimumDuration(500)
         
-        if success:
-            if result is not None:  # SELECT запрос
-                self.data_viewer.current_data = result
-                self.data_viewer.current_headers = columns
-                self.data_viewer.model.update_data(result, columns)
-                self.data_viewer.table.resizeColumnsToContents()
-                
-                self.status_bar.showMessage(f"Запрос выполнен. Получено строк: {len(result)}")
-                self.tabs.setCurrentIndex(0)
+        def on_progress(done, total):
+            # Окно событий раз в 100 операторов: на скрипте из 10 000 INSERT это заметно
+            if done % 100:
+                return True
+            progress.setValue(int(done * 1000 / max(total, 1)))
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+        
+        # Прежние вкладки результатов закрываются - их строки не занимают бюджет нового запуска
+        while self.result_tabs.count() > 1:
+            self.close_result_tab(1)
+        # Открытый курсор прежнего результата помешал бы DDL скрипта
+        self.data_viewer.release_cursor()
+        results, rolled_back = self.db_manager.run_script(query, self.transaction_check.isChecked(), on_progress)
+        progress.close()
+        self.show_script_results(results, rolled_back)
+        
+        failed = results[-1] if results and results[-1].error else None
+        seconds = sum(result.seconds for result in results)
+        message = f"Выполнено операторов: {len(results) - bool(failed)} за {seconds:.3f} с"
+        if rolled_back:
+            message += " · транзакция откачена"
+        self.status_bar.showMessage(message)
+        
+        if any(not result.has_result() for result in results):
+            self.load_tables()
+        if failed:
+            self.result_tabs.setCurrentIndex(0)
+            QMessageBox.critical(self, "Ошибка",
+                                 f"Ошибка выполнения запроса (оператор {failed.number}, "
+                                 f"строка {failed.line}):\n{failed.error}")
+    
+    def show_script_results(self, results, rolled_back):
+        """Журнал операторов и вкладки с результатами.
+        
+        Единственный результат SELECT открывается, как раньше, в просмотре
+        данных (с поиском, фильтрами и экспортом); остальные - во вкладках.
+        """
+        rows = []
+        for result in results:
+            if result.error:
+                status = f"Ошибка: {result.error}"
+            elif result.has_result():
+                status = f"Строк: {len(result.rows)}" + (" (показаны первые)" if result.truncated else "")
             else:
-                self.status_bar.showMessage(f"Запрос выполнен. Таблицы обновлены.")
-                self.load_tables()
+                status = "OK"
+            rows.append((result.number, result.line, " ".join(result.sql.split())[:200],
+                         f"{result.seconds * 1000:.2f}",
+                         "" if result.rowcount is None else result.rowcount, status))
+        if rolled_back:
+            rows.append(("", "", "ROLLBACK", "", "", "Транзакция откачена, изменения скрипта отменены"))
+        self.statement_model.update_data(rows, ["#", "Строка", "Оператор", "Время, мс", "Изменено", "Результат"])
+        self.statement_view.resizeColumnsToContents()
+        
+        while self.result_tabs.count() > 1:
+            self.close_result_tab(1)
+        
+        sets = [result for result in results if result.has_result()]
+        # Строки переходят к моделям, которые их показывают, и учитываются уже за ними
+        for result in sets:
+            budget.release(result)
+        if len(sets) == 1 and not rolled_back and sets[0].sql.upper().startswith(("SELECT", "WITH", "VALUES")):
+            # Обрезанный результат дочитывается из открытого курсора при прокрутке
+            self.data_viewer.show_query_result(sets[0].sql, sets[0].rows, sets[0].columns, sets[0].cursor)
+            self.tabs.setCurrentIndex(0)
+            return
+        
+        from models import LargeTableModel
+        for result in sets:
+            # Вкладки показывают только загруженные строки
+            if result.cursor:
+                result.cursor.close()
+        for result in sets[:MAX_RESULT_TABS]:
+            view = QTableView()
+            view.setStyleSheet(Styles.RESULT_TABLE)
+            model = LargeTableModel(result.rows, result.columns)
+            budget.track(model, result.rows)
+            view.setModel(model)
+            view.resizeColumnsToContents()
+            view.setToolTip(result.sql[:500])
+            self.result_tabs.addTab(view, f"Результат {result.number}")
+        if sets:
+            self.result_tabs.setCurrentIndex(1)
         else:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка выполнения запроса:\n{result}")
+            self.result_tabs.setCurrentIndex(0)
+    
+    def close_result_tab(self, index):
+        if index == 0:
+            return
+        widget = self.result_tabs.widget(index)
+        budget.release(widget.model())
+        self.result_tabs.removeTab(index)
+        widget.deleteLater()
     
+    def show_statement(self, index):
+        """Перейти в редакторе к строке оператора из журнала"""
+        line = self.statement_model.value_at(index.row(), 1)
+        if not isinstance(line, int):
+            return
+        cursor = QTextCursor(self.sql_input.document().findBlockByNumber(line - 1))
+        self.sql_input.setTextCursor(cursor)
+        self.sql_input.setFocus()
+    
+    @traced("action.import_csv", "app")
     def import_csv(self):
         if not self.db_manager.connection:
             QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
@@ -504,6 +847,7 @@ class SQLiteEditor(QMainWindow):
         
         file_path, _ = QFileDialog.getOpenFileName(self, "Импорт CSV", "", "CSV files (*.csv)")
         if file_path:
+            self.data_viewer.release_cursor()
             success, msg = self.import_export.import_csv(file_path, self.db_manager.connection)
             if success:
                 self.load_tables()
@@ -511,6 +855,7 @@ class SQLiteEditor(QMainWindow):
             else:
                 QMessageBox.critical(self, "Ошибка", msg)
     
+    @traced("action.import_json", "app")
     def import_json(self):
         if not self.db_manager.connection:
             QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
@@ -518,6 +863,7 @@ class SQLiteEditor(QMainWindow):
         
         file_path, _ = QFileDialog.getOpenFileName(self, "Импорт JSON", "", "JSON files (*.json)")
         if file_path:
+            self.data_viewer.release_cursor()
             success, msg = self.import_export.import_json(file_path, self.db_manager.connection)
             if success:
                 self.load_tables()
@@ -525,6 +871,103 @@ class SQLiteEditor(QMainWindow):
             else:
                 QMessageBox.critical(self, "Ошибка", msg)
     
+    @traced("action.import_excel", "app")
+    def import_excel(self):
+        if not self.db_manager.connection:
+            QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
+            return
+        
+        from dialogs import ExcelImportDialog
+        
+        file_path, _ = QFileDialog.getOpenFileName(self, "Импорт Excel", "", "Excel files (*.xlsx *.xlsm)")
+        if not file_path:
+            return
+        
+        try:
+            sheets = self.import_export.list_excel_sheets(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось прочитать файл: {str(e)}")
+            return
+        
+        dialog = ExcelImportDialog(sheets, self.db_manager.get_table_names(), self)
+        if not dialog.exec():
+            return
+        options = dialog.get_options()
+        if not options['sheets']:
+            return
+        
+        progress = QProgressDialog("Импорт...", "Отменить", 0, 0, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.show()
+        
+        def on_progress(sheet, rows):
+            progress.setLabelText(f"{sheet}: загружено строк {rows}")
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+        
+        self.data_viewer.release_cursor()
+        success, msg = self.import_export.import_excel(
+            file_path, self.db_manager.connection, options['sheets'], options['header_row'], on_progress
+        )
+        progress.close()
+        if success:
+            self.load_tables()
+            if self.data_viewer.current_table in options['sheets']:
+                self.data_viewer.load_table_data(self.data_viewer.current_table)
+            QMessageBox.information(self, "Успех", msg)
+        else:
+            QMessageBox.critical(self, "Ошибка", msg)
+    
+    @traced("action.import_into_table", "app")
+    def import_into_table(self):
+        if not self.db_manager.connection:
+            QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
+            return
+        
+        from dialogs import ImportIntoTableDialog
+        
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Импорт в таблицу", "",
+            "Данные (*.csv *.json *.jsonl);;CSV files (*.csv);;JSON files (*.json *.jsonl)"
+        )
+        if not file_path:
+            return
+        
+        try:
+            source_columns = self.import_export.read_source_columns(file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось прочитать файл: {str(e)}")
+            return
+        
+        dialog = ImportIntoTableDialog(source_columns, self.db_manager.schema, self)
+        if not dialog.exec():
+            return
+        options = dialog.get_options()
+        
+        progress = QProgressDialog("Импорт...", None, 0, 0, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.show()
+        
+        def on_progress(rows):
+            progress.setLabelText(f"Загружено строк: {rows}")
+            QApplication.processEvents()
+        
+        self.data_viewer.release_cursor()
+        success, msg = self.import_export.import_into_table(
+            file_path, self.db_manager.connection, self.db_manager.schema, options['table'],
+            options['mapping'], options['mode'], options['conflict_columns'],
+            options['defer_indexes'], on_progress
+        )
+        progress.close()
+        if success:
+            self.load_tables()
+            if self.data_viewer.current_table == options['table']:
+                self.data_viewer.refresh_table()
+            QMessageBox.information(self, "Успех", msg)
+        else:
+            QMessageBox.critical(self, "Ошибка", msg)
+    
+    @traced("action.export_csv", "app")
     def export_csv(self):
         if not self.db_manager.connection:
             QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
@@ -545,6 +988,7 @@ class SQLiteEditor(QMainWindow):
                 else:
                     QMessageBox.critical(self, "Ошибка", msg)
     
+    @traced("action.export_json", "app")
     def export_json(self):
         if not self.db_manager.connection:
             QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
@@ -565,6 +1009,7 @@ class SQLiteEditor(QMainWindow):
                 else:
                     QMessageBox.critical(self, "Ошибка", msg)
     
+    @traced("action.export_excel", "app")
     def export_excel(self):
         if not self.db_manager.connection:
             QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
@@ -585,28 +1030,248 @@ class SQLiteEditor(QMainWindow):
                 else:
                     QMessageBox.critical(self, "Ошибка", msg)
     
+    @traced("action.export_query", "app")
+    def export_query(self, query, params, default_name):
+        """Экспорт произвольного запроса без загрузки результата в таблицу"""
+        formats = {
+            "CSV": ("csv", "CSV files (*.csv)", self.import_export.export_csv),
+            "JSON": ("json", "JSON files (*.json)", self.import_export.export_json),
+            "Excel": ("xlsx", "Excel files (*.xlsx)", self.import_export.export_excel)
+        }
+        fmt, ok = QInputDialog.getItem(self, "Экспорт", "Формат:", list(formats), 0, False)
+        if not ok:
+            return
+        
+        extension, file_filter, exporter = formats[fmt]
+        file_path, _ = QFileDialog.getSaveFileName(self, "Сохранить", f"{default_name}.{extension}", file_filter)
+        if not file_path:
+            return
+        # Запрос выполняется на отдельном соединении только для чтения: оператор
+        # изменения данных из вкладки SQL не должен менять базу при экспорте
+        try:
+            connection = open_connection(self.db_manager.current_db, 'readonly')
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Ошибка", f"Ошибка открытия базы для экспорта: {e}")
+            return
+        try:
+            success, msg = exporter(default_name, file_path, connection, query, params)
+        finally:
+            connection.close()
+        if success:
+            QMessageBox.information(self, "Успех", msg)
+        else:
+            QMessageBox.critical(self, "Ошибка", msg)
+    
+    def export_sql_result(self):
+        if not self.db_manager.connection:
+            QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
+            return
+        
+        query = self.sql_input.toPlainText().strip()
+        if not query:
+            QMessageBox.warning(self, "Предупреждение", "Введите SQL запрос на вкладке \"SQL запросы\"")
+            return
+        self.export_query(query, (), "query")
+    
+    def export_current_view(self):
+        if not self.db_manager.connection:
+            QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
+            return
+        
+        source = self.data_viewer.current_query()
+        if source is None:
+            QMessageBox.warning(self, "Предупреждение", "Нет открытой таблицы или результата запроса")
+            return
+        query, params, name = source
+        self.export_query(query, params, name)
+    
+    @traced("action.bulk_export", "app")
+    def bulk_export(self):
+        if not self.db_manager.current_db:
+            QMessageBox.warning(self, "Предупреждение", "Сначала откройте базу данных!")
+            return
+        
+        from dialogs import BulkExportDialog
+        from bulk_export import BulkExporter, BulkExportWorker
+        
+        if self.bulk_worker:
+            QMessageBox.warning(self, "Предупреждение", "Массовый экспорт уже выполняется")
+            return
+        
+        dialog = BulkExportDialog(self.db_manager.get_table_names(), self)
+        if not dialog.exec():
+            return
+        options = dialog.get_options()
+        if not options['tables'] or not os.path.isdir(options['output_dir']):
+            QMessageBox.warning(self, "Предупреждение", "Выберите таблицы и существующую папку")
+            return
+        
+        # Фоновые процессы читают файл, поэтому свои изменения должны быть зафиксированы
+        self.db_manager.connection.commit()
+        exporter = BulkExporter(self.db_manager.current_db, options['output_dir'],
+                                options['format'], options['workers'])
+        
+        # Пока задачи не спланированы, диалог показывает неопределенный прогресс
+        progress = QProgressDialog("Экспорт...", None, 0, 0, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.show()
+        
+        def on_progress(done, total, result):
+            progress.setValue(done)
+            progress.setLabelText(f"{result['file']}: {result['rows']} строк")
+        
+        def on_done(manifest):
+            progress.close()
+            QMessageBox.information(self, "Успех",
+                                    f"Экспортировано таблиц: {len(manifest['tables'])}, "
+                                    f"файлов: {len(manifest['files'])}, "
+                                    f"строк: {sum(manifest['tables'].values())} "
+                                    f"за {manifest['seconds']:.1f} с")
+        
+        def on_failed(message):
+            progress.close()
+            QMessageBox.critical(self, "Ошибка", f"Ошибка экспорта: {message}")
+        
+        self.bulk_worker = BulkExportWorker(exporter, options['tables'], options['shards'], self)
+        self.bulk_worker.planned.connect(progress.setMaximum)
+        self.bulk_worker.progress.connect(on_progress)
+        self.bulk_worker.done.connect(on_done)
+        self.bulk_worker.failed.connect(on_failed)
+        self.bulk_worker.finished.connect(self.bulk_export_finished)
+        self.bulk_worker.start()
+    
+    def bulk_export_finished(self):
+        self.bulk_worker = None
+    
+    @traced("action.create_database", "app")
     def create_database(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Создать базу данных", 
                                                    "database.db", "SQLite files (*.db)")
-        if file_path and self.db_manager.create_database(file_path):
+        if not file_path or not self.data_viewer.confirm_discard():
+            return
+        self.cancel_recount()
+        if self.db_manager.create_database(file_path):
             self.data_viewer.set_connection(self.db_manager.connection)
+            self.watcher.set_connection(self.db_manager.connection)
+            # Новая база всегда открыта на запись, даже если прежняя была только для чтения
+            self.data_viewer.set_read_only(False)
+            self.load_tables()
             self.db_name_label.setText(os.path.basename(file_path))
             self.db_size_label.setText("Размер: 0 Б")
-            self.status_bar.showMessage(f"Создана база данных: {file_path}")
+            message = f"Создана база данных: {file_path}"
+            if self.db_manager.skipped_pragmas:
+                message += " · не применено: " + "; ".join(self.db_manager.skipped_pragmas)
+            self.status_bar.showMessage(message)
     
     def close_database(self):
         if self.db_manager.connection:
+            if not self.data_viewer.confirm_discard():
+                return
+            self.cancel_recount()
+            self.watcher.set_connection(None)
             self.db_manager.close()
             self.data_viewer.clear()
-            self.tree.clear()
+            self.tree_model.clear()
             self.db_name_label.setText("Нет открытой БД")
             self.db_size_label.setText("")
             self.status_bar.showMessage("База данных закрыта")
     
+    def setup_watcher(self):
+        """Восстановить настройки отслеживания изменений"""
+        self.auto_refresh_action.setChecked(self.settings.value("watch/auto_refresh", False, type=bool))
+        self.watch_action.setChecked(self.settings.value("watch/enabled", False, type=bool))
+    
+    def set_watching(self, enabled):
+        self.settings.setValue("watch/enabled", enabled)
+        if enabled:
+            self.watcher.sync()
+            self.watcher.start(self.settings.value("watch/interval", DEFAULT_INTERVAL, type=int))
+        else:
+            self.watcher.stop()
+    
+    def set_watch_interval(self):
+        current = self.settings.value("watch/interval", DEFAULT_INTERVAL, type=int) / 1000
+        seconds, ok = QInputDialog.getDouble(self, "Отслеживание изменений", "Интервал проверки, секунд:",
+                                             current, 0.2, 3600, 1)
+        if ok:
+            self.settings.setValue("watch/interval", int(seconds * 1000))
+            if self.watcher.is_active():
+                self.watcher.start(int(seconds * 1000))
+    
+    def set_memory_budget(self):
+        current = self.settings.value("memory/budget_mb", DEFAULT_BUDGET_MB, type=int)
+        limit, ok = QInputDialog.getInt(self, "Память", "Бюджет памяти под загруженные строки, МБ:",
+                                        current, 64, 1024 * 1024, 64)
+        if ok:
+            self.settings.setValue("memory/budget_mb", limit)
+            budget.set_limit_mb(limit)
+    
+    def database_changed(self):
+        """База изменилась: количества пересчитываются в фоне, представление помечается или обновляется"""
+        # Запись другого процесса: версии схемы и данных надо перечитать сразу
+        self.db_manager.schema.invalidate()
+        self.tree_model.mark_stale()
+        if not self.auto_refresh_action.isChecked():
+            self.data_viewer.mark_stale()
+        self.recount_tables()
+    
+    def recount_tables(self):
+        if self.count_worker:
+            # Пересчет уже идет - повторим после него, изменения не потеряются
+            self.recount_pending = True
+            return
+        
+        tables = self.db_manager.get_table_names()
+        if self.db_manager.schema.schema_version != self.tree_model.schema_version:
+            # Изменилась схема - дерево строится заново и снова запускает пересчет
+            self.load_tables()
+            return
+        
+        key = self.db_manager.schema.data_key()
+        db_path = database_path(self.db_manager.connection)
+        if not db_path:
+            # База в памяти видна только нашему соединению
+            self.counts_ready(key, {name: self.db_manager.schema.row_count(name) for name in tables})
+            return
+        
+        self.count_worker = CountWorker(db_path, tables, self)
+        worker = self.count_worker
+        worker.partial.connect(lambda counts: self.tree_model.set_counts(counts, self.tree_model.stale))
+        worker.done.connect(lambda counts: self.counts_ready(key, counts))
+        worker.finished.connect(lambda: self.recount_finished(worker))
+        worker.start()
+    
+    def recount_finished(self, worker):
+        if worker is not self.count_worker:
+            return
+        self.count_worker = None
+        if self.recount_pending:
+            self.recount_pending = False
+            self.recount_tables()
+    
+    def cancel_recount(self):
+        self.recount_pending = False
+        if self.count_worker:
+            self.count_worker.cancel()
+            self.count_worker.wait()
+            self.count_worker = None
+    
+    def counts_ready(self, key, counts):
+        """Обновить только изменившиеся количества в дереве и, при автообновлении, видимое окно"""
+        if not self.db_manager.connection:
+            return
+        self.db_manager.schema.store_counts(counts, key)
+        self.tree_model.set_counts(counts)
+        
+        if self.auto_refresh_action.isChecked():
+            self.data_viewer.refresh_view(counts.get(self.data_viewer.current_table), automatic=True)
+    
+    @traced("action.refresh_tables", "app")
     def refresh_tables(self):
         self.load_tables()
         self.status_bar.showMessage("Список таблиц обновлен")
     
+    @traced("action.backup_database", "app")
     def backup_database(self):
         if not self.db_manager.current_db:
             QMessageBox.warning(self, "Предупреждение", "Нет открытой базы данных!")
@@ -618,17 +1283,175 @@ class SQLiteEditor(QMainWindow):
         else:
             QMessageBox.critical(self, "Ошибка", msg)
     
+    @traced("action.optimize_database", "app")
     def optimize_database(self):
         if not self.db_manager.connection:
             QMessageBox.warning(self, "Предупреждение", "Нет открытой базы данных!")
             return
         
+        # VACUUM не выполняется, пока на соединении открыт оператор чтения
+        self.data_viewer.release_cursor()
         success, msg = self.db_manager.optimize_database()
         if success:
             QMessageBox.information(self, "Успех", msg)
         else:
             QMessageBox.critical(self, "Ошибка", msg)
     
+    @traced("action.dump_database", "app")
+    def dump_database(self):
+        if not self.db_manager.current_db:
+            QMessageBox.warning(self, "Предупреждение", "Нет открытой базы данных!")
+            return
+        
+        from dump import dump_database
+        
+        default_name = os.path.splitext(self.db_manager.current_db)[0] + ".sql"
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "Дамп SQL", default_name,
+            "SQL (*.sql);;SQL, сжатый gzip (*.sql.gz)"
+        )
+        if not file_path:
+            return
+        
+        if self.db_manager.connection.in_transaction:
+            self.db_manager.connection.commit()
+        
+        progress = QProgressDialog("Дамп...", None, 0, 0, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.show()
+        
+        def on_progress(table, rows):
+            progress.setLabelText(f"{table}: {rows} строк")
+            QApplication.processEvents()
+        
+        try:
+            stats = dump_database(self.db_manager.current_db, file_path, on_progress)
+            progress.close()
+            tracer.annotate(rows=stats['rows'])
+            QMessageBox.information(self, "Успех",
+                                    f"Таблиц: {stats['tables']}, строк: {stats['rows']}, "
+                                    f"размер: {utils.format_size(stats['size'])}, "
+                                    f"время: {stats['seconds']:.1f} с")
+        except Exception as e:
+            progress.close()
+            QMessageBox.critical(self, "Ошибка", f"Ошибка создания дампа: {str(e)}")
+    
+    @traced("action.restore_dump", "app")
+    def restore_dump(self):
+        from dump import restore_dump
+        
+        dump_path, _ = QFileDialog.getOpenFileName(
+            self, "Восстановить из дампа", "",
+            "SQL дампы (*.sql *.sql.gz);;Все файлы (*.*)"
+        )
+        if not dump_path:
+            return
+        
+        # Для продолжения прерванного восстановления выбирается та же база
+        db_path, _ = QFileDialog.getSaveFileName(
+            self, "База для восстановления", os.path.splitext(dump_path.removesuffix(".gz"))[0] + ".db",
+            "SQLite Database (*.db *.sqlite *.sqlite3);;Все файлы (*.*)",
+            options=QFileDialog.Option.DontConfirmOverwrite
+        )
+        if not db_path:
+            return
+        if db_path == self.db_manager.current_db:
+            QMessageBox.warning(self, "Предупреждение", "Нельзя восстанавливать в открытую базу данных")
+            return
+        
+        progress = QProgressDialog("Восстановление...", "Остановить", 0, 1000, self)
+        progress.setWindowModality(Qt.WindowModality.WindowModal)
+        progress.show()
+        
+        def on_progress(done, total):
+            progress.setValue(int(done * 1000 / max(total, 1)))
+            QApplication.processEvents()
+            return not progress.wasCanceled()
+        
+        try:
+            stats = restore_dump(dump_path, db_path, on_progress)
+            progress.close()
+        except Exception as e:
+            progress.close()
+            QMessageBox.critical(self, "Ошибка",
+                                 f"Ошибка восстановления: {str(e)}\n\n"
+                                 f"Выполненные пакеты сохранены, повторный запуск продолжит с места остановки.")
+            return
+        
+        tracer.annotate(rows=stats['statements'])
+        if not stats['completed']:
+            QMessageBox.information(self, "Остановлено",
+                                    f"Выполнено операторов: {stats['statements']}. "
+                                    f"Повторный запуск с той же базой продолжит восстановление.")
+            return
+        
+        reply = QMessageBox.question(self, "Восстановление завершено",
+                                     f"Выполнено операторов: {stats['statements']} "
+                                     f"(пропущено уже выполненных: {stats['skipped']}) "
+                                     f"за {stats['seconds']:.1f} с.\n\nОткрыть восстановленную базу?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.Yes:
+            self.open_database_file(db_path)
+    
+    def set_tracing_enabled(self, enabled):
+        tracer.set_enabled(enabled)
+        if self.trace_action.isChecked() != enabled:
+            self.trace_action.setChecked(enabled)
+        if self.metrics_dock.enable_check.isChecked() != enabled:
+            self.metrics_dock.enable_check.setChecked(enabled)
+    
+    def setup_watchdog(self):
+        """Сторож зависаний включен по умолчанию: в обычной работе он почти ничего не стоит"""
+        self.watchdog_action.setChecked(self.settings.value("watchdog/enabled", True, type=bool))
+    
+    def set_watchdog_enabled(self, enabled):
+        self.settings.setValue("watchdog/enabled", enabled)
+        if enabled:
+            self.watchdog.start()
+        else:
+            self.watchdog.stop()
+    
+    def set_stall_threshold(self):
+        current = self.settings.value("watchdog/threshold", STALL_THRESHOLD, type=int)
+        threshold, ok = QInputDialog.getInt(self, "Сторож зависаний", "Считать зависанием паузу дольше, мс:",
+                                            current, 200, 60000, 100)
+        if ok:
+            self.settings.setValue("watchdog/threshold", threshold)
+            self.watchdog.set_threshold(threshold)
+    
+    def show_stall(self, stall):
+        self.status_bar.showMessage(
+            f"Интерфейс не отвечал {stall.seconds:.1f} с: {stall.location()} (журнал: {self.watchdog.log_path})",
+            10000)
+    
+    def capture_profiles(self):
+        """Записать cProfile для следующих N действий (открытие таблицы, запрос, импорт)"""
+        count, ok = QInputDialog.getInt(self, "Профилирование",
+                                        "Сколько следующих действий профилировать (0 - отменить):",
+                                        capture.remaining or 3, 0, 100)
+        if not ok:
+            return
+        if count:
+            capture.arm(count)
+            self.status_bar.showMessage(f"Профили следующих {count} действий сохранятся в {capture.directory}")
+        else:
+            capture.cancel()
+            self.status_bar.showMessage("Профилирование отменено")
+    
+    def reload_functions(self):
+        """Перечитать плагины функций SQL и зарегистрировать их на открытом соединении"""
+        loaded = registry.load_plugins()
+        if self.db_manager.connection:
+            registry.register(self.db_manager.connection)
+        self.sql_input.set_schema(self.db_manager.schema)
+        
+        message = f"Загружено файлов: {loaded} из {registry.plugin_dir}"
+        if registry.errors:
+            details = "\n".join(f"{file_name}: {error}" for file_name, error in registry.errors)
+            QMessageBox.warning(self, "Пользовательские функции", f"{message}\n\nОшибки:\n{details}")
+        else:
+            self.status_bar.showMessage(message)
+    
     def show_history(self):
         from dialogs import HistoryDialog
         dialog = HistoryDialog(self.db_manager.query_history, self)
@@ -643,12 +1466,26 @@ class SQLiteEditor(QMainWindow):
                          <p style='color: #606060;'>Разработано с использованием PyQt6</p>""")
     
     def closeEvent(self, event):
+        if not self.data_viewer.confirm_discard():
+            event.ignore()
+            return
+        self.watcher.stop()
+        self.watchdog.stop()
+        self.cancel_recount()
+        if self.bulk_worker:
+            # Процессы пула пишут файлы - дожидаемся их, а не обрываем
+            self.bulk_worker.wait()
         self.db_manager.close()
         event.accept()
 
 def main():
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
+    try:
+        # Текст сортируется по правилам системной локали
+        locale.setlocale(locale.LC_COLLATE, "")
+    except locale.Error as e:
+        print(f"Locale not set: {e}")
     
     # Устанавливаем темную палитру
     palette = QPalette()
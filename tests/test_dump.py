@@ -0,0 +1,87 @@
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from dump import dump_database, iter_statements, restore_dump, sql_literal
+
+class IterStatementsTest(unittest.TestCase):
+    def test_multiline_statements_and_comments(self):
+        text = ("-- Dump of x.db\n"
+                "\n"
+                "CREATE TABLE t (a,\n b);\n"
+                "INSERT INTO t VALUES ('line;\nnext;', 1),(2, 'x');\n"
+                "CREATE TRIGGER tr AFTER INSERT ON t BEGIN\n"
+                "  DELETE FROM t WHERE a = 0;\n"
+                "END;\n"
+                "SELECT 1")
+        self.assertEqual(list(iter_statements(io.StringIO(text))), [
+            "CREATE TABLE t (a,\n b);",
+            "INSERT INTO t VALUES ('line;\nnext;', 1),(2, 'x');",
+            "CREATE TRIGGER tr AFTER INSERT ON t BEGIN\n  DELETE FROM t WHERE a = 0;\nEND;",
+            "SELECT 1",
+        ])
+    
+    def test_sql_literal(self):
+        self.assertEqual(sql_literal(None), "NULL")
+        self.assertEqual(sql_literal(float("nan")), "NULL")
+        self.assertEqual(sql_literal(float("-inf")), "-1e999")
+        self.assertEqual(sql_literal(b"\x00\xff"), "X'00ff'")
+        self.assertEqual(sql_literal("it's"), "'it''s'")
+
+class DumpRestoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "source.db")
+        connection = sqlite3.connect(self.source)
+        connection.execute("CREATE TABLE t (id INTEGER PRIMARY KEY AUTOINCREMENT, v, b BLOB)")
+        connection.executemany("INSERT INTO t (v, b) VALUES (?, ?)",
+                               [(f"row '{i}';\n", bytes([i % 256]) * 3) for i in range(200)] +
+                               [(1.5, None), (float("inf"), None)])
+        connection.execute("CREATE INDEX t_v ON t (v)")
+        connection.execute("CREATE VIEW big AS SELECT * FROM t WHERE id > 100")
+        connection.commit()
+        connection.close()
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+    
+    def contents(self, db_path):
+        connection = sqlite3.connect(db_path)
+        try:
+            rows = connection.execute("SELECT * FROM t ORDER BY id").fetchall()
+            objects = connection.execute(
+                "SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite%' ORDER BY name").fetchall()
+            sequence = connection.execute("SELECT seq FROM sqlite_sequence").fetchall()
+            return rows, objects, sequence
+        finally:
+            connection.close()
+    
+    def test_round_trip(self):
+        for name in ("dump.sql", "dump.sql.gz"):
+            with self.subTest(name=name):
+                stats = dump_database(self.source, self.path(name), rows_per_insert=64)
+                self.assertEqual(stats['rows'], 202)
+                target = self.path(name + ".db")
+                self.assertTrue(restore_dump(self.path(name), target)['completed'])
+                self.assertEqual(self.contents(target), self.contents(self.source))
+    
+    def test_resume_after_stop(self):
+        dump_database(self.source, self.path("dump.sql"), rows_per_insert=1)
+        target = self.path("target.db")
+        stats = restore_dump(self.path("dump.sql"), target, progress=lambda done, total: False)
+        self.assertFalse(stats['completed'])
+        stats = restore_dump(self.path("dump.sql"), target)
+        self.assertTrue(stats['completed'])
+        self.assertGreater(stats['skipped'], 0)
+        self.assertEqual(self.contents(target), self.contents(self.source))
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
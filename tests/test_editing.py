@@ -0,0 +1,75 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from editing import ChangeSet, coerce_value
+
+class CoerceValueTest(unittest.TestCase):
+    def test_types(self):
+        self.assertIsNone(coerce_value("null"))
+        self.assertEqual(coerce_value("12"), 12)
+        self.assertEqual(coerce_value("1.5"), 1.5)
+        self.assertEqual(coerce_value("abc"), "abc")
+        # Текстовая ячейка остается текстом
+        self.assertEqual(coerce_value("12", old_value="7"), "12")
+
+class ChangeSetTest(unittest.TestCase):
+    def test_statements_are_grouped(self):
+        changes = ChangeSet("t", ["a", "b"], ["rowid"])
+        changes.set_value(1, "a", 10)
+        changes.set_value(2, "a", 20)
+        changes.set_value(3, "b", "x")
+        changes.set_value(4, "a", 5)
+        changes.delete(4)
+        changes.add_insert({"a": 1, "b": None})
+        changes.cancel_insert(changes.add_insert({"a": 2, "b": 2}))
+        changes.add_insert({"a": None, "b": None})
+        self.assertEqual(changes.count(), 6)
+        self.assertEqual(changes.statements(), [
+            ('DELETE FROM "t" WHERE "rowid" = ?', [[4]]),
+            ('UPDATE "t" SET "a" = ? WHERE "rowid" = ?', [[10, 1], [20, 2]]),
+            ('UPDATE "t" SET "b" = ? WHERE "rowid" = ?', [["x", 3]]),
+            ('INSERT INTO "t" ("a") VALUES (?)', [[1]]),
+            ('INSERT INTO "t" DEFAULT VALUES', [[]]),
+        ])
+    
+    def test_composite_key(self):
+        changes = ChangeSet("t", ["a", "b", "v"], ["a", "b"])
+        changes.set_value((1, "x"), "v", 3)
+        self.assertEqual(changes.statements(),
+                         [('UPDATE "t" SET "v" = ? WHERE "a" = ? AND "b" = ?', [[3, 1, "x"]])])
+    
+    def test_apply(self):
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE t (a, b)")
+        connection.executemany("INSERT INTO t VALUES (?, ?)", [(1, "x"), (2, "y"), (3, "z")])
+        connection.commit()
+        changes = ChangeSet("t", ["a", "b"], ["_rowid_"])
+        changes.set_value(1, "b", "changed")
+        changes.delete(2)
+        changes.add_insert({"a": 4, "b": "w"})
+        self.assertTrue(changes.apply(connection)[0])
+        self.assertTrue(changes.is_empty())
+        self.assertEqual(connection.execute("SELECT a, b FROM t ORDER BY a").fetchall(),
+                         [(1, "changed"), (3, "z"), (4, "w")])
+        connection.close()
+    
+    def test_apply_rolls_back_on_error(self):
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE t (a UNIQUE)")
+        connection.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+        connection.commit()
+        changes = ChangeSet("t", ["a"], ["rowid"])
+        changes.set_value(1, "a", 5)
+        changes.add_insert({"a": 2})
+        success, message = changes.apply(connection)
+        self.assertFalse(success)
+        self.assertFalse(changes.is_empty())
+        self.assertEqual(connection.execute("SELECT a FROM t ORDER BY a").fetchall(), [(1,), (2,)])
+        connection.close()
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
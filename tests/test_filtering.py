@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from filtering import ColumnPredicate, filter_mask, search_sql
+from selection import ColumnBuffers
+from udf import registry
+
+VALUES = ["abc", "Bcd", b"\x00abc", 5, 2.5, None, "b", b"b", "zz", "10"]
+
+class ColumnPredicateTest(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        registry.register(self.connection)
+        self.connection.execute("CREATE TABLE t (v)")
+        self.connection.executemany("INSERT INTO t (rowid, v) VALUES (?, ?)",
+                                    [(row, value) for row, value in enumerate(VALUES)])
+    
+    def tearDown(self):
+        self.connection.close()
+    
+    def matches(self, predicate):
+        buffers = ColumnBuffers([(value,) for value in VALUES])
+        loaded = np.flatnonzero(predicate.evaluate(buffers.column(0))).tolist()
+        condition, params = predicate.sql('"v"')
+        queried = [row[0] for row in self.connection.execute(
+            f"SELECT rowid FROM t WHERE {condition} ORDER BY rowid", params)]
+        return loaded, queried
+    
+    def test_loaded_rows_and_sql_agree(self):
+        cases = [('contains', "b"), ('contains', "BLOB"), ('regex', "^b"), ('=', "b"), ('<', "c"),
+                 ('>', "a"), ('between', "a, c"), ('=', "5"), ('>', "3"), ('between', "1, 6"),
+                 ('=', "10"), ('null', "")]
+        for operator, text in cases:
+            with self.subTest(operator=operator, text=text):
+                loaded, queried = self.matches(ColumnPredicate(0, "v", operator, text))
+                self.assertEqual(loaded, queried)
+    
+    def test_blobs_never_match_text_conditions(self):
+        for operator, text in (('contains', "abc"), ('regex', "."), ('=', "b"), ('<', "zzz")):
+            with self.subTest(operator=operator):
+                for rows in self.matches(ColumnPredicate(0, "v", operator, text)):
+                    self.assertNotIn(2, rows)
+                    self.assertNotIn(7, rows)
+    
+    def test_numbers_compare_as_numbers(self):
+        loaded, _ = self.matches(ColumnPredicate(0, "v", '>', "3"))
+        self.assertEqual(loaded, [3])
+        # Текст "10" - текст, а не число
+        loaded, _ = self.matches(ColumnPredicate(0, "v", '=', "10"))
+        self.assertEqual(loaded, [])
+    
+    def test_invalid_operands(self):
+        for operator, text in (('contains', ""), ('regex', "("), ('between', "1"), ('between', "1, a"),
+                               ('=', "NULL"), ('like', "x")):
+            with self.subTest(operator=operator, text=text):
+                with self.assertRaises(ValueError):
+                    ColumnPredicate(0, "v", operator, text)
+
+class SearchTest(unittest.TestCase):
+    def test_search_mask_and_sql_agree(self):
+        rows = [("abc", 1), (b"abc", "x"), (None, "ABC"), (12, "zz")]
+        buffers = ColumnBuffers(rows)
+        mask = filter_mask(buffers, len(rows), search="ab", columns=2)
+        self.assertEqual(np.flatnonzero(mask).tolist(), [0, 2])
+        
+        connection = sqlite3.connect(":memory:")
+        registry.register(connection)
+        connection.execute("CREATE TABLE t (a, b)")
+        connection.executemany("INSERT INTO t (rowid, a, b) VALUES (?, ?, ?)",
+                               [(row,) + values for row, values in enumerate(rows)])
+        condition, params = search_sql(['"a"', '"b"'], "ab")
+        self.assertEqual([row[0] for row in connection.execute(
+            f"SELECT rowid FROM t WHERE {condition} ORDER BY rowid", params)], [0, 2])
+        connection.close()
+    
+    def test_predicates_combine(self):
+        rows = [(1, "a"), (2, "b"), (3, "a"), (None, "a")]
+        buffers = ColumnBuffers(rows)
+        predicates = [ColumnPredicate(0, "n", '>', "1"), ColumnPredicate(1, "s", '=', "a")]
+        self.assertEqual(np.flatnonzero(filter_mask(buffers, len(rows), predicates)).tolist(), [2])
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
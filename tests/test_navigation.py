@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from navigation import PositionIndex, key_columns, seek
+from schema import SchemaCache
+
+class PositionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE t (v)")
+        # rowid с пропусками: позиция строки не равна rowid
+        self.connection.executemany("INSERT INTO t (rowid, v) VALUES (?, ?)",
+                                    [(i * 3 + 1, i) for i in range(100)])
+        self.connection.execute("CREATE TABLE pk (a, b, v, PRIMARY KEY (a, b)) WITHOUT ROWID")
+        self.connection.executemany("INSERT INTO pk VALUES (?, ?, ?)",
+                                    [(a, b, a * 10 + b) for a in range(10) for b in range(5)])
+        self.schema = SchemaCache()
+        self.schema.attach(self.connection)
+    
+    def tearDown(self):
+        self.connection.close()
+    
+    def test_locate_and_position_of_with_checkpoints(self):
+        index = PositionIndex("t", key_columns(self.schema, "t"), step=7)
+        self.assertTrue(index.build(self.connection))
+        self.assertEqual(len(index.keys), 15)
+        for position in (0, 1, 6, 7, 50, 99):
+            key = index.locate(self.connection, position)
+            self.assertEqual(key, (position * 3 + 1,))
+            self.assertEqual(index.position_of(self.connection, key), position)
+        self.assertIsNone(index.locate(self.connection, 100))
+    
+    def test_locate_without_index(self):
+        index = PositionIndex("t", ["rowid"], step=7)
+        self.assertEqual(index.locate(self.connection, 42), (127,))
+        self.assertEqual(index.position_of(self.connection, (127,)), 42)
+    
+    def test_composite_key(self):
+        columns = key_columns(self.schema, "pk")
+        self.assertEqual(columns, ["a", "b"])
+        index = PositionIndex("pk", columns, step=4)
+        index.build(self.connection)
+        self.assertEqual(index.locate(self.connection, 13), (2, 3))
+        self.assertEqual(index.position_of(self.connection, (2, 3)), 13)
+    
+    def test_cancelled_build(self):
+        index = PositionIndex("t", ["rowid"], step=7)
+        self.assertFalse(index.build(self.connection, lambda: True))
+        self.assertFalse(index.complete)
+
+class SeekTest(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        # Колонка с именем rowid закрывает настоящий rowid
+        self.connection.execute("CREATE TABLE t (rowid TEXT, v)")
+        self.connection.executemany("INSERT INTO t (_rowid_, rowid, v) VALUES (?, ?, ?)",
+                                    [(i * 2, f"r{i}", i) for i in range(1, 20)])
+        self.schema = SchemaCache()
+        self.schema.attach(self.connection)
+    
+    def tearDown(self):
+        self.connection.close()
+    
+    def test_rowid_alias_avoids_user_column(self):
+        self.assertEqual(key_columns(self.schema, "t"), ["_rowid_"])
+        self.assertEqual(seek(self.connection, self.schema, "t", 'rowid', "10"), ((10,), True))
+        # Нет точного совпадения - следующая строка по порядку
+        self.assertEqual(seek(self.connection, self.schema, "t", 'rowid', "11"), ((12,), False))
+        self.assertEqual(seek(self.connection, self.schema, "t", 'rowid', "100"), (None, False))
+    
+    def test_invalid_rowid(self):
+        with self.assertRaises(ValueError):
+            seek(self.connection, self.schema, "t", 'rowid', "abc")
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from sampling import key_filter, rowid_filter, sample_rows, sample_rowids
+
+class SampleRowidsTest(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE dense (v)")
+        self.connection.executemany("INSERT INTO dense VALUES (?)", [(i,) for i in range(5000)])
+        # Занята малая доля диапазона rowid - выборка уходит в резервуар
+        self.connection.execute("CREATE TABLE sparse (v)")
+        self.connection.executemany("INSERT INTO sparse (rowid, v) VALUES (?, ?)",
+                                    [(i * 1000, i) for i in range(500)])
+    
+    def tearDown(self):
+        self.connection.close()
+    
+    def existing(self, table):
+        return {row[0] for row in self.connection.execute(f"SELECT rowid FROM {table}")}
+    
+    def test_dense_sample(self):
+        chosen = sample_rowids(self.connection, "dense", 100, seed=7)
+        self.assertEqual(len(chosen), 100)
+        self.assertEqual(chosen, sorted(set(chosen)))
+        self.assertTrue(set(chosen) <= self.existing("dense"))
+    
+    def test_sparse_sample(self):
+        chosen = sample_rowids(self.connection, "sparse", 50, seed=7)
+        self.assertEqual(len(chosen), 50)
+        self.assertEqual(len(set(chosen)), 50)
+        self.assertTrue(set(chosen) <= self.existing("sparse"))
+    
+    def test_same_seed_same_rows(self):
+        for table in ("dense", "sparse"):
+            self.assertEqual(sample_rowids(self.connection, table, 30, seed=3),
+                             sample_rowids(self.connection, table, 30, seed=3))
+        self.assertNotEqual(sample_rowids(self.connection, "dense", 30, seed=3),
+                            sample_rowids(self.connection, "dense", 30, seed=4))
+    
+    def test_sample_larger_than_table(self):
+        self.assertEqual(sample_rowids(self.connection, "sparse", 1000), sorted(self.existing("sparse")))
+        self.connection.execute("CREATE TABLE empty (v)")
+        self.assertEqual(sample_rowids(self.connection, "empty", 10), [])
+    
+    def test_rowid_alias(self):
+        self.connection.execute("CREATE TABLE clash (rowid TEXT)")
+        self.connection.executemany("INSERT INTO clash (_rowid_, rowid) VALUES (?, ?)",
+                                    [(i, f"r{i}") for i in range(1, 101)])
+        chosen = sample_rowids(self.connection, "clash", 10, seed=1, rowid="_rowid_")
+        self.assertTrue(all(isinstance(rowid, int) for rowid in chosen))
+        where, params = rowid_filter(chosen, "_rowid_")
+        rows = self.connection.execute(f"SELECT _rowid_ FROM clash WHERE {where}", params).fetchall()
+        self.assertEqual([row[0] for row in rows], chosen)
+
+class FilterTest(unittest.TestCase):
+    def test_key_filter(self):
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE t (a, b, PRIMARY KEY (a, b)) WITHOUT ROWID")
+        connection.executemany("INSERT INTO t VALUES (?, ?)", [(a, str(b)) for a in range(5) for b in range(5)])
+        where, params = key_filter(["a", "b"], [(1, "2"), (3, "4"), (9, "9")])
+        self.assertEqual(connection.execute(f"SELECT a, b FROM t WHERE {where} ORDER BY a", params).fetchall(),
+                         [(1, "2"), (3, "4")])
+        where, params = key_filter(["a"], [(2,)])
+        self.assertEqual(connection.execute(f"SELECT COUNT(*) FROM t WHERE {where}", params).fetchone()[0], 5)
+        connection.close()
+    
+    def test_sample_rows(self):
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE t (v)")
+        connection.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(1000)])
+        columns, rows = sample_rows(connection, "SELECT v FROM t", 20, seed=5)
+        self.assertEqual(columns, ["v"])
+        self.assertEqual(len(rows), 20)
+        self.assertEqual(rows, sample_rows(connection, "SELECT v FROM t", 20, seed=5)[1])
+        connection.close()
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
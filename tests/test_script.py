@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from script import has_returning, run_statements, split_statements
+
+class SplitStatementsTest(unittest.TestCase):
+    def test_lines_and_trailing_statement(self):
+        text = "SELECT 1;\n\nSELECT 2;\nSELECT 3"
+        self.assertEqual(split_statements(text), [(1, "SELECT 1;"), (3, "SELECT 2;"), (4, "SELECT 3")])
+    
+    def test_semicolons_in_literals_and_comments(self):
+        text = "SELECT 'a;b';\n-- comment; here\nSELECT 2; /* x; y */"
+        self.assertEqual(split_statements(text), [(1, "SELECT 'a;b';"), (2, "-- comment; here\nSELECT 2;")])
+    
+    def test_trigger_body(self):
+        text = ("CREATE TRIGGER t AFTER INSERT ON a BEGIN\n"
+                "  INSERT INTO b VALUES (1);\n"
+                "  INSERT INTO b VALUES (2);\n"
+                "END;\nSELECT 1;")
+        statements = split_statements(text)
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0][1].endswith("END;"))
+        self.assertEqual(statements[1], (5, "SELECT 1;"))
+    
+    def test_empty_statements_and_comment_tail(self):
+        self.assertEqual(split_statements(";;\n;"), [])
+        self.assertEqual(split_statements("SELECT 1;\n-- done"), [(1, "SELECT 1;")])
+
+class HasReturningTest(unittest.TestCase):
+    def test_dml_with_returning(self):
+        self.assertTrue(has_returning("DELETE FROM t WHERE a > 1 RETURNING *"))
+        self.assertTrue(has_returning("-- note\nINSERT INTO t VALUES (1) RETURNING a"))
+    
+    def test_returning_in_literals_and_comments(self):
+        self.assertFalse(has_returning("INSERT INTO t VALUES ('returning')"))
+        self.assertFalse(has_returning("UPDATE t SET a = 1 -- returning"))
+        self.assertFalse(has_returning('UPDATE "returning" SET a = 1'))
+        self.assertFalse(has_returning("SELECT 1 AS returning"))
+
+class RunStatementsTest(unittest.TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.execute("CREATE TABLE t (a)")
+    
+    def tearDown(self):
+        self.connection.close()
+    
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+    
+    def test_failure_rolls_back_transaction(self):
+        statements = [(1, "INSERT INTO t VALUES (1)"), (2, "INSERT INTO missing VALUES (1)")]
+        results, rolled_back = run_statements(self.connection, statements)
+        self.assertTrue(rolled_back)
+        self.assertIsNotNone(results[-1].error)
+        self.assertEqual(self.count(), 0)
+    
+    def test_failure_without_transaction_keeps_committed(self):
+        statements = [(1, "INSERT INTO t VALUES (1)"), (2, "INSERT INTO missing VALUES (1)")]
+        results, rolled_back = run_statements(self.connection, statements, transaction=False)
+        self.assertFalse(rolled_back)
+        self.assertEqual(self.count(), 1)
+    
+    def test_truncated_returning_applies_all_rows(self):
+        self.connection.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(50)])
+        results, rolled_back = run_statements(self.connection, [(1, "UPDATE t SET a = -a RETURNING a")],
+                                              max_rows=10)
+        self.assertFalse(rolled_back)
+        self.assertTrue(results[0].truncated)
+        self.assertEqual(len(results[0].rows), 10)
+        self.assertEqual(self.connection.execute("SELECT COUNT(*) FROM t WHERE a > 0").fetchone()[0], 0)
+        self.assertFalse(self.connection.in_transaction)
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from sketches import HyperLogLog, KLLSketch, sketch_key
+
+class HyperLogLogTest(unittest.TestCase):
+    def test_small_sets_are_exact_enough(self):
+        sketch = HyperLogLog()
+        sketch.add_many([1, 2, 2, 3, None, "a", "a", b"a"])
+        self.assertEqual(sketch.count(), 5)
+    
+    def test_integral_floats_match_integers(self):
+        self.assertEqual(sketch_key(2.0), sketch_key(2))
+        self.assertNotEqual(sketch_key(2), sketch_key("2"))
+    
+    def test_large_set_within_error(self):
+        sketch = HyperLogLog()
+        sketch.add_many(range(200000))
+        # Стандартная ошибка около 0.81%, допускаем пять сигм
+        self.assertLess(abs(sketch.count() - 200000) / 200000, 0.04)
+    
+    def test_merge_equals_union(self):
+        left, right, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        left.add_many(range(0, 30000))
+        right.add_many(range(20000, 50000))
+        union.add_many(range(0, 50000))
+        left.merge(right)
+        self.assertEqual(left.count(), union.count())
+
+class KLLSketchTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(1)
+    
+    def test_empty(self):
+        self.assertEqual(KLLSketch().quantiles([0.5, 0.9]), [None, None])
+    
+    def test_small_stream_is_exact(self):
+        sketch = KLLSketch()
+        sketch.update_many([5, 1, 4, 2, 3])
+        self.assertEqual(sketch.quantiles([0, 0.5, 1]), [1, 3, 5])
+        self.assertEqual(sketch.count, 5)
+    
+    def test_rank_error_on_large_stream(self):
+        values = list(range(100000))
+        random.shuffle(values)
+        sketch = KLLSketch()
+        sketch.update_many(values)
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(sketch.size, 2000)
+        for fraction in (0.1, 0.5, 0.9, 0.99):
+            # Значение равно своему рангу, ошибка ранга около 1.65%
+            self.assertLess(abs(sketch.quantile(fraction) / len(values) - fraction), 0.03)
+    
+    def test_update_and_update_many_agree_on_count(self):
+        one, many = KLLSketch(), KLLSketch()
+        for value in range(5000):
+            one.update(value)
+        many.update_many(list(range(5000)))
+        self.assertEqual(one.count, many.count)
+        self.assertEqual(sum(weight for _, weight in one.weighted()),
+                         sum(weight for _, weight in many.weighted()))
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file
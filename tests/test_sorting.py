@@ -0,0 +1,65 @@
+import os
+import sqlite3
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "functions"))
+
+from selection import ColumnBuffers
+from sorting import collation_ranks, register_collation, sort_permutation, sort_ranks, sort_sql
+
+VALUES = ["b", None, 3, "A", b"\x01", 1.5, "a", None, b"\x00", "B", 3]
+
+def folded(values):
+    """Равные без учета регистра строки могут идти в любом порядке"""
+    return [value.lower() if isinstance(value, str) else value for value in values]
+
+class SortRanksTest(unittest.TestCase):
+    def test_order_of_kinds(self):
+        ranks = sort_ranks(ColumnBuffers([(value,) for value in VALUES]).column(0)).tolist()
+        order = sorted(range(len(VALUES)), key=lambda row: (ranks[row], row))
+        # Числа, затем текст без учета регистра, затем BLOB, NULL в конце
+        self.assertEqual([VALUES[row] for row in order],
+                         [1.5, 3, 3, "A", "a", "b", "B", b"\x00", b"\x01", None, None])
+    
+    def test_equal_values_share_rank(self):
+        ranks = sort_ranks(ColumnBuffers([(value,) for value in VALUES]).column(0))
+        self.assertEqual(ranks[2], ranks[10])
+        self.assertEqual(ranks[3], ranks[6])
+        self.assertEqual(ranks[1], ranks[7])
+    
+    def test_collation_ranks(self):
+        ranks, count = collation_ranks(["b", "A", "a", "c"])
+        self.assertEqual(ranks.tolist(), [1, 0, 0, 2])
+        self.assertEqual(count, 3)
+
+class SortPermutationTest(unittest.TestCase):
+    def test_descending_keeps_nulls_last(self):
+        buffers = ColumnBuffers([(value,) for value in [2, None, 1, 3]])
+        self.assertEqual(sort_permutation(buffers, [(0, True)]).tolist(), [3, 0, 2, 1])
+        self.assertEqual(sort_permutation(buffers, [(0, False)]).tolist(), [2, 0, 3, 1])
+    
+    def test_stable_multi_key(self):
+        rows = [("x", 2), ("y", 1), ("x", 1), ("y", 2), ("x", 1)]
+        buffers = ColumnBuffers(rows)
+        self.assertEqual(sort_permutation(buffers, [(0, False), (1, True)]).tolist(), [0, 2, 4, 3, 1])
+    
+    def test_sql_order_matches_loaded_rows(self):
+        rows = [(value,) for value in VALUES]
+        connection = sqlite3.connect(":memory:")
+        register_collation(connection)
+        connection.execute("CREATE TABLE t (v)")
+        connection.executemany("INSERT INTO t (rowid, v) VALUES (?, ?)",
+                               [(row, value) for row, (value,) in enumerate(rows)])
+        for descending in (False, True):
+            with self.subTest(descending=descending):
+                keys = [(0, descending)]
+                ordered = [row[0] for row in connection.execute(
+                    f"SELECT v FROM t ORDER BY {sort_sql(['v'], keys)}, rowid")]
+                permutation = sort_permutation(ColumnBuffers(rows), keys).tolist()
+                loaded = [rows[row][0] for row in permutation]
+                self.assertEqual(folded(loaded), folded(ordered))
+        connection.close()
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file